@@ -0,0 +1,125 @@
+import json
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from .history import MARKET_SELECTIONS
+from .repository import OddsRepository
+
+# 参与概率计算的选项（去掉让球数列）
+MARKET_OUTCOMES: Dict[str, tuple] = {
+    market: tuple(key for key in keys if key != "handicap") for market, keys in MARKET_SELECTIONS.items()
+}
+DEVIG_METHODS = ("proportional", "power")
+
+
+class MarketFrame:
+    """单个玩法的列式赔率：odds 为 (行数, 选项数) 的 float64 矩阵，缺失为 NaN"""
+
+    __slots__ = ("market", "match_ids", "odds", "ts")
+
+    def __init__(self, market: str, match_ids: List[str], odds: np.ndarray, ts: Optional[np.ndarray] = None):
+        self.market = market
+        self.match_ids = match_ids
+        self.odds = odds
+        self.ts = ts
+
+    @property
+    def selections(self) -> tuple:
+        return MARKET_OUTCOMES[self.market]
+
+
+def load_slate(
+    repository: OddsRepository,
+    match_ids: Sequence[str],
+    markets: Iterable[str] = MARKET_OUTCOMES,
+) -> Dict[str, MarketFrame]:
+    """把多场比赛的当前赔率一次性读入各玩法的矩阵，行顺序与 match_ids 一致"""
+    markets = list(markets)
+    row_of = {match_id: row for row, match_id in enumerate(match_ids)}
+    col_of = {market: {key: col for col, key in enumerate(MARKET_OUTCOMES[market])} for market in markets}
+    matrices = {market: np.full((len(match_ids), len(MARKET_OUTCOMES[market])), np.nan) for market in markets}
+    for match_id, market, selection, odds in repository.iter_price_rows(match_ids):
+        cols = col_of.get(market)
+        if cols is None or odds is None:
+            continue
+        col = cols.get(selection)
+        if col is not None:
+            matrices[market][row_of[match_id], col] = odds
+    return {market: MarketFrame(market, list(match_ids), matrices[market]) for market in markets}
+
+
+def load_history(
+    repository: OddsRepository,
+    match_ids: Sequence[str],
+    market: str,
+    start: int,
+    end: int,
+) -> MarketFrame:
+    """读取赔率历史为矩阵（每个历史点一行），用于历史回填批量计算"""
+    keys = MARKET_SELECTIONS[market]
+    outcome_cols = [keys.index(key) for key in MARKET_OUTCOMES[market]]
+    ids: List[str] = []
+    ts: List[int] = []
+    vectors: List[list] = []
+    for match_id in match_ids:
+        for point_ts, prices in repository.iter_history(match_id, market, start, end):
+            ids.append(match_id)
+            ts.append(point_ts)
+            vectors.append(json.loads(prices))
+    odds = np.array(vectors, dtype=float).reshape(len(vectors), len(keys))[:, outcome_cols]
+    return MarketFrame(market, ids, odds, np.array(ts, dtype=np.int64))
+
+
+def _power_exponents(implied: np.ndarray, mask: np.ndarray, iterations: int = 50, tol: float = 1e-12) -> np.ndarray:
+    """逐行求 k 使 Σ p_i^k = 1（幂函数去水），所有行同时做牛顿迭代"""
+    k = np.ones(implied.shape[0])
+    logp = np.where(mask, np.log(np.where(mask, implied, 1.0)), 0.0)
+    for _ in range(iterations):
+        pk = np.where(mask, np.exp(logp * k[:, None]), 0.0)
+        f = pk.sum(axis=1) - 1.0
+        slope = (pk * logp).sum(axis=1)
+        step = np.divide(f, slope, out=np.zeros_like(f), where=slope != 0)
+        k -= step
+        if np.all(np.abs(step) < tol):
+            break
+    return k
+
+
+def devig(odds: np.ndarray, method: str = "proportional") -> Dict[str, np.ndarray]:
+    """对整张赔率矩阵一次性计算隐含概率、返还率溢价与去水后的公平概率。
+
+    - implied：1 / 赔率
+    - overround：每行隐含概率之和 - 1（庄家抽水）
+    - fair：proportional 为按比例归一化；power 为 p_i^k 且 Σ = 1
+    - complete：该行所有选项都有赔率，缺项时概率只在已有选项间归一化
+    """
+    if method not in DEVIG_METHODS:
+        raise ValueError(f"不支持的去水方法: {method}")
+    mask = np.isfinite(odds) & (odds > 0)
+    implied = np.where(mask, 1.0 / np.where(mask, odds, 1.0), np.nan)
+    total = np.nansum(implied, axis=1)
+    has_any = mask.any(axis=1)
+    overround = np.where(has_any, total - 1.0, np.nan)
+    if method == "power":
+        k = _power_exponents(np.nan_to_num(implied, nan=1.0), mask)
+        fair = np.where(mask, np.power(np.where(mask, implied, 1.0), k[:, None]), np.nan)
+    else:
+        fair = implied / np.where(has_any, total, np.nan)[:, None]
+    return {"implied": implied, "overround": overround, "fair": fair, "complete": mask.all(axis=1)}
+
+
+def _to_json(array: np.ndarray, decimals: int = 4) -> list:
+    rounded = np.round(array, decimals)
+    return np.where(np.isnan(rounded), None, rounded).tolist()
+
+
+def format_margins(frame: MarketFrame, result: Dict[str, np.ndarray]) -> Dict:
+    """按列式结构输出，避免逐行构造字典"""
+    return {
+        "selections": list(frame.selections),
+        "matchIds": frame.match_ids,
+        "overround": _to_json(result["overround"]),
+        "fair": _to_json(result["fair"]),
+        "complete": result["complete"].tolist(),
+    }
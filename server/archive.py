@@ -0,0 +1,128 @@
+"""已结束比赛的归档：把超过保留期的已结束 / 已取消比赛移出热表，写入按月分区的压缩 NDJSON 文件。
+
+每批比赛先写入 <ARCHIVE_DIR>/<YYYY-MM>/<批次>.ndjson.gz（临时文件写完并 fsync 后再改名，文件要么完整要么不存在），
+再在一个短事务内登记 match_archive 索引并从热表删除。两步之间中断时，下次运行会把这些比赛重新写入新文件，
+索引总是指向最后一次写入的文件，旧文件中的重复记录不会被读取。
+每行一场比赛：matches 行、四张赔率表的行与赔率历史，查询时按索引只读取所在的一个文件。
+"""
+
+import gzip
+import os
+import time
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence
+
+import orjson
+
+from . import settings
+from .slate import PLAY_TABLES
+
+if TYPE_CHECKING:
+    from .repository import OddsRepository
+
+
+def _default(value: Any) -> Any:
+    # MySQL 的 DECIMAL 列
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+
+class ArchiveStore:
+    """按比赛月份分区的归档目录，每批一个 gzip 压缩的 NDJSON 文件"""
+
+    def __init__(self, root: Path, compress_level: int = settings.ARCHIVE_COMPRESS_LEVEL):
+        self.root = Path(root)
+        self.compress_level = compress_level
+
+    def write(self, month: str, records: Sequence[Dict[str, Any]]) -> str:
+        """写入一批记录，返回相对 root 的文件名"""
+        directory = self.root / month
+        directory.mkdir(parents=True, exist_ok=True)
+        name = f"{month}/{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.ndjson.gz"
+        body = b"".join(orjson.dumps(record, default=_default) + b"\n" for record in records)
+        data = gzip.compress(body, compresslevel=self.compress_level, mtime=0)
+        path = self.root / name
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        return name
+
+    def iter_records(self, name: str) -> Iterator[Dict[str, Any]]:
+        with open(self.root / name, "rb") as f:
+            body = gzip.decompress(f.read())
+        for line in body.splitlines():
+            if line:
+                yield orjson.loads(line)
+
+    def find(self, files: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        """按 {match_id: 文件名} 读取记录，每个文件只解压一次；文件缺失的比赛不出现在结果中"""
+        wanted: Dict[str, set] = {}
+        for match_id, name in files.items():
+            wanted.setdefault(name, set()).add(match_id)
+        result: Dict[str, Dict[str, Any]] = {}
+        for name, match_ids in wanted.items():
+            try:
+                for record in self.iter_records(name):
+                    if record["match_id"] in match_ids:
+                        result[record["match_id"]] = record
+            except FileNotFoundError:
+                continue
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        months = []
+        if self.root.is_dir():
+            for directory in sorted(path for path in self.root.iterdir() if path.is_dir()):
+                files = list(directory.glob("*.ndjson.gz"))
+                months.append({
+                    "month": directory.name,
+                    "files": len(files),
+                    "bytes": sum(path.stat().st_size for path in files),
+                })
+        return {"root": str(self.root), "months": months}
+
+
+def record_plays(record: Dict[str, Any]) -> Dict[str, Any]:
+    """归档记录转换为与 OddsRepository.get_plays_bulk 单场结果相同的结构（各玩法只保留接口返回的列）"""
+    match = dict(record["match"])
+    match["is_latest_issue"] = 0
+    wdl = {row["odds_type"]: row for row in record["wdl"]}
+    plays = {
+        name: [{column: row.get(column) for column in columns} for row in record[name]]
+        for name, (_, columns) in PLAY_TABLES.items()
+    }
+    return {"match": match, "wdl": wdl, **plays}
+
+
+def retention_cutoff(days: int, today: Optional[date] = None) -> str:
+    """比赛日期早于该日期（YYYY-MM-DD）的已结束比赛可以归档"""
+    return ((today or date.today()) - timedelta(days=days)).isoformat()
+
+
+def archive_batch(repository: "OddsRepository", store: ArchiveStore, cutoff: str, batch_size: int) -> int:
+    """归档一批比赛，返回归档的场数（0 表示没有可归档的比赛）"""
+    match_ids = repository.list_archivable(cutoff, batch_size)
+    if not match_ids:
+        return 0
+    records = repository.load_archive_records(match_ids)
+    months: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        months.setdefault(record["match"]["match_date"][:7], []).append(record)
+    entries = []
+    for month, group in months.items():
+        name = store.write(month, group)
+        entries.extend(
+            (record["match_id"], record["match"]["match_date"], record["match"].get("league_name"), name)
+            for record in group
+        )
+    return repository.remove_archived(entries)
+
+
+archive_store = ArchiveStore(Path(settings.ARCHIVE_DIR))
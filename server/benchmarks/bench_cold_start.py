@@ -0,0 +1,123 @@
+"""冷启动基准：模块导入耗时，以及进程启动到开始响应（/api/health）和就绪（/api/ready）的时间。
+
+上游为带延迟的本地桩服务，分别在空数据库与已有数据的数据库上启动 uvicorn 子进程::
+
+    python -m server.benchmarks.bench_cold_start --latency 3 --rounds 5
+"""
+
+import argparse
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .. import settings
+from .stub_sporttery import StubSportteryServer
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def _child_env(**overrides: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update(overrides)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    return env
+
+
+def import_seconds(rounds: int, sqlite_path: str) -> Dict[str, float]:
+    """每轮在新进程中导入 server.main，只计导入本身"""
+    code = "import time; t = time.perf_counter(); import server.main; print(time.perf_counter() - t)"
+    timings = []
+    for _ in range(rounds):
+        output = subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", code],
+            env=_child_env(SQLITE_PATH=sqlite_path),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        timings.append(float(output.stdout.strip().splitlines()[-1]))
+    return {"median_s": round(statistics.median(timings), 3), "min_s": round(min(timings), 3)}
+
+
+def _get(url: str) -> Optional[int]:
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status
+    except urllib.error.HTTPError as exc:
+        return exc.code
+    except (urllib.error.URLError, OSError):
+        return None
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve_timings(sqlite_path: str, api_url: str, timeout: float) -> Dict[str, Any]:
+    """启动 uvicorn 子进程，轮询健康检查与就绪探针"""
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-W", "ignore", "-m", "uvicorn", "server.main:app", "--port", str(port), "--log-level", "warning"],
+        env=_child_env(SQLITE_PATH=sqlite_path, SPORTTERY_API_URL=api_url, SYNC_INTERVAL_SECONDS="3600"),
+        cwd=str(ROOT),
+    )
+    result: Dict[str, Any] = {"serving_s": None, "ready_s": None}
+    try:
+        deadline = started + timeout
+        while time.perf_counter() < deadline:
+            if result["serving_s"] is None and _get(f"{base}/api/health") == 200:
+                result["serving_s"] = round(time.perf_counter() - started, 3)
+            if result["serving_s"] is not None and _get(f"{base}/api/ready") == 200:
+                result["ready_s"] = round(time.perf_counter() - started, 3)
+                with urllib.request.urlopen(f"{base}/api/ready", timeout=1) as response:
+                    payload = json.loads(response.read())
+                result["state"] = payload["state"]
+                result["startup"] = payload["startup"]
+                break
+            time.sleep(0.02)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="冷启动基准测试")
+    parser.add_argument("--latency", type=float, default=3.0, help="桩服务单请求延迟（秒），模拟缓慢的上游")
+    parser.add_argument("--rounds", type=int, default=5, help="导入耗时的测量轮数")
+    parser.add_argument("--db", default=settings.SQLITE_PATH, help="已有数据的 SQLite 数据库，复制后使用")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="cold-start-"))
+    try:
+        existing = workdir / "existing.sqlite"
+        shutil.copyfile(args.db, existing)
+        with StubSportteryServer(latency=args.latency) as stub:
+            result = {
+                "upstream_latency_s": args.latency,
+                "import": import_seconds(args.rounds, str(workdir / "import.sqlite")),
+                "empty_db": serve_timings(str(workdir / "empty.sqlite"), stub.url, args.timeout),
+                "existing_db": serve_timings(str(existing), stub.url, args.timeout),
+            }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
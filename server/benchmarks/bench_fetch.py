@@ -0,0 +1,105 @@
+"""抓取阶段基准：顺序阻塞抓取 vs 异步并发抓取（整包读取各玩法池的响应体）。
+
+同步服务本身按流式读取（见 SportterySyncService.stream_pools），这里的两种抓取方式只作为基准对照，
+不做重试。基于本地桩服务离线运行，不访问真实上游，也不写数据库::
+
+    python -m server.benchmarks.bench_fetch --latency 0.3 --rounds 5
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Dict, Tuple
+
+import httpx
+import orjson
+
+from .. import settings
+from .stub_sporttery import StubSportteryServer
+
+
+def pool_url(api_url: str, pool_code: str) -> str:
+    return f"{api_url}?channel=c&poolCode={pool_code}"
+
+
+def fetch_sequential(client: httpx.Client, api_url: str) -> Dict[str, Dict]:
+    """逐个阻塞抓取全部玩法池"""
+    pools = {}
+    for pool_name, pool_code in settings.POOL_CODES.items():
+        response = client.get(pool_url(api_url, pool_code))
+        response.raise_for_status()
+        pools[pool_name] = orjson.loads(response.content)
+    return pools
+
+
+async def fetch_concurrent(api_url: str) -> Tuple[Dict[str, Dict], Dict[str, float]]:
+    """并发抓取全部玩法池（并发数 FETCH_CONCURRENCY），返回 (各池数据, 各池耗时毫秒)"""
+    semaphore = asyncio.Semaphore(max(1, settings.FETCH_CONCURRENCY))
+
+    async def fetch(client: httpx.AsyncClient, pool_code: str) -> Tuple[Dict, float]:
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(pool_url(api_url, pool_code))
+            response.raise_for_status()
+            return orjson.loads(response.content), (time.perf_counter() - started) * 1000
+
+    async with httpx.AsyncClient(timeout=settings.HTTP_TIMEOUT, headers={"User-Agent": settings.USER_AGENT}) as client:
+        results = await asyncio.gather(*(fetch(client, code) for code in settings.POOL_CODES.values()))
+    pools = {name: data for name, (data, _) in zip(settings.POOL_CODES, results)}
+    timings = {name: round(elapsed, 1) for name, (_, elapsed) in zip(settings.POOL_CODES, results)}
+    return pools, timings
+
+
+def bench_sequential(api_url: str, rounds: int) -> list:
+    timings = []
+    with httpx.Client(timeout=settings.HTTP_TIMEOUT, headers={"User-Agent": settings.USER_AGENT}) as client:
+        for _ in range(rounds):
+            started = time.perf_counter()
+            fetch_sequential(client, api_url)
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def bench_concurrent(api_url: str, rounds: int) -> Tuple[list, Dict[str, float]]:
+    timings = []
+    per_pool: Dict[str, float] = {}
+    for _ in range(rounds):
+        started = time.perf_counter()
+        pools, per_pool = asyncio.run(fetch_concurrent(api_url))
+        timings.append((time.perf_counter() - started) * 1000)
+        assert len(pools) == len(settings.POOL_CODES)
+    return timings, per_pool
+
+
+def summarize(timings: list) -> dict:
+    return {
+        "mean_ms": round(statistics.mean(timings), 1),
+        "min_ms": round(min(timings), 1),
+        "max_ms": round(max(timings), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="抓取阶段基准测试")
+    parser.add_argument("--latency", type=float, default=0.3, help="桩服务单请求延迟（秒）")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    with StubSportteryServer(latency=args.latency) as stub:
+        sequential = bench_sequential(stub.url, args.rounds)
+        concurrent, per_pool = bench_concurrent(stub.url, args.rounds)
+    result = {
+        "latency_s": args.latency,
+        "pools": len(settings.POOL_CODES),
+        "concurrency": settings.FETCH_CONCURRENCY,
+        "sequential": summarize(sequential),
+        "concurrent": summarize(concurrent),
+        "per_pool_ms": per_pool,
+    }
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
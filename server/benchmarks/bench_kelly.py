@@ -0,0 +1,120 @@
+"""多注 Kelly 组合基准：计时 5 / 10 / 15 注同时投注时的联合求解，并与逐注独立 Kelly 对比。
+
+赔率取自合成赛程，命中概率为赔率隐含概率乘以 1 ~ 1 + edge 的随机倍数（即用户认为每注都有优势），
+每场比赛 1~3 注（可能是同一玩法的互斥选项）。对每组投注校验满 Kelly 解的期望对数增长
+不低于逐注独立 Kelly 缩放到资金上限内的期望对数增长::
+
+    python -m server.benchmarks.bench_kelly --rounds 20
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import date
+
+import numpy as np
+
+from ..kelly import fit_marginals, independent_fraction, market_prior, match_atoms, optimize, scenario_matrix, win_mask
+from ..parlay import Leg
+from .synthetic import SyntheticSlate
+
+
+def slate_prices(slate: SyntheticSlate) -> dict:
+    """与 repo.get_prices 结构相同的价格表"""
+    prices = {}
+    for match in slate.matches:
+        markets = {market: dict(options) for market, options in match.odds.items()}
+        markets["hhad"]["handicap"] = match.handicap
+        prices[str(match.match_id)] = markets
+    return prices
+
+
+def random_bets(slate: SyntheticSlate, prices: dict, count: int, edge: float, rng: random.Random):
+    """count 注：(legs, probabilities)，每场比赛 1~3 注"""
+    legs, probabilities = [], []
+    for match in rng.sample(slate.matches, len(slate.matches)):
+        match_id = str(match.match_id)
+        picks = min(rng.randint(1, 3), count - len(legs))
+        market = rng.choice(list(match.odds))
+        options = list(match.odds[market].items())
+        for selection, odds in rng.sample(options, picks):
+            legs.append(Leg(match_id, market, selection, odds, prices[match_id]["hhad"]["handicap"] if market == "hhad" else None))
+            probabilities.append(min(rng.uniform(1.0, 1.0 + edge) / odds, 0.95))
+        if len(legs) >= count:
+            return legs, probabilities
+    raise ValueError("合成赛程的比赛数不足")
+
+
+def growth(legs, probabilities, prices, allocation) -> float:
+    """给定各注比例在同一情景矩阵上的期望对数增长"""
+    positions = {}
+    for index, leg in enumerate(legs):
+        positions.setdefault(leg.match_id, []).append(index)
+    matches = []
+    for match_id, columns in positions.items():
+        masks = [win_mask(legs[i].market, legs[i].selection, legs[i].handicap) for i in columns]
+        grid = fit_marginals(market_prior(prices[match_id]), masks, [probabilities[i] for i in columns])
+        matches.append((*match_atoms(grid, masks), columns))
+    probs, returns = scenario_matrix(matches, np.array([leg.odds for leg in legs]))
+    return float(probs @ np.log(1.0 + returns @ allocation))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="多注 Kelly 组合基准")
+    parser.add_argument("--sizes", default="5,10,15", help="同时投注的注数，逗号分隔")
+    parser.add_argument("--rounds", type=int, default=20, help="每个注数的随机投注组数")
+    parser.add_argument("--edge", type=float, default=0.25, help="命中概率相对隐含概率的最大倍数 - 1")
+    parser.add_argument("--fraction", type=float, default=0.5)
+    parser.add_argument("--max-exposure", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    slate = SyntheticSlate(date.today(), 1, 40, args.seed)
+    prices = slate_prices(slate)
+    rng = random.Random(args.seed)
+    report = []
+    for size in map(int, args.sizes.split(",")):
+        timings, scenarios, iterations, gains, overstaked = [], [], [], [], 0
+        rounds = 0
+        while rounds < args.rounds:
+            legs, probabilities = random_bets(slate, prices, size, args.edge, rng)
+            started = time.perf_counter()
+            try:
+                result = optimize(legs, probabilities, prices, args.fraction, args.max_exposure)
+            except ValueError:
+                # 随机抬高后同一场比赛的概率相互矛盾，重新抽取
+                continue
+            timings.append((time.perf_counter() - started) * 1000)
+            scenarios.append(result["scenarios"])
+            iterations.append(result["iterations"])
+            rounds += 1
+
+            independent = np.array([independent_fraction(leg.odds, p, 1.0) for leg, p in zip(legs, probabilities)])
+            if independent.sum() * args.fraction > args.max_exposure:
+                overstaked += 1
+            # 满 Kelly 比较：独立 Kelly 缩放到同一资金上限内，联合解的期望对数增长不应更低
+            full = optimize(legs, probabilities, prices, 1.0, args.max_exposure)
+            scaled = independent * min(1.0, (1.0 - 1e-9) * args.max_exposure / max(independent.sum(), 1e-12))
+            baseline = growth(legs, probabilities, prices, scaled)
+            assert full["expectedGrowth"] >= baseline - 1e-9, f"{size} 注：联合解的期望对数增长低于逐注独立 Kelly"
+            gains.append(full["expectedGrowth"] - baseline)
+        report.append(
+            {
+                "bets": size,
+                "rounds": rounds,
+                "median_ms": round(statistics.median(timings), 2),
+                "max_ms": round(max(timings), 2),
+                "median_scenarios": int(statistics.median(scenarios)),
+                "max_scenarios": max(scenarios),
+                "median_iterations": int(statistics.median(iterations)),
+                "independent_overstaked": overstaked,
+                "median_growth_gain": round(statistics.median(gains), 6),
+            }
+        )
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
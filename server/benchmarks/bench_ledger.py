@@ -0,0 +1,125 @@
+"""投注账本基准：增量维护的统计读取 vs 按前端口径每次全量扫描投注记录，以及导入与逐条结算的写入耗时。
+
+随机生成一个账本（草稿 / 投注中 / 已结算混合，含串关），批量导入后逐条结算一部分投注中的记录，
+最后用全量重放（rebuild_ledger）校验增量统计逐字段一致。使用 SQLITE_PATH 指向的数据库（会写入账本表）::
+
+    python -m server.benchmarks.bench_ledger --bets 20000 --rounds 50
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+import uuid
+
+from fastapi.testclient import TestClient
+
+from ..database import get_db, init_db, iter_query
+from ..ledger import LedgerUpdate
+from ..main import app, ledger_repo
+
+
+def random_bets(count: int, seed: int) -> list:
+    rng = random.Random(seed)
+    bets = []
+    for index in range(count):
+        status = rng.choice(("saved", "betting", "betting", "settled", "settled", "settled", "settled"))
+        legs = [
+            {
+                "homeTeam": f"主队{rng.randint(1, 200)}",
+                "awayTeam": f"客队{rng.randint(1, 200)}",
+                "odds": round(rng.uniform(1.3, 3.5), 2),
+                "betType": rng.choice(("胜平负", "让球", "大小球", "比分")),
+            }
+            for _ in range(rng.choice((1, 1, 1, 2, 3)))
+        ]
+        bets.append({
+            "id": f"bench-{index}",
+            "stake": rng.choice((10, 20, 50, 100, 200)),
+            "fee": rng.choice((0, 0, 0, 1)),
+            "status": status,
+            "result": rng.choice(("win", "lose", "lose", "half-win", "half-lose")) if status == "settled" else "pending",
+            "betTime": f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}",
+            "legs": legs,
+        })
+    return bets
+
+
+def full_scan(ledger_id: str, starting_capital: float) -> LedgerUpdate:
+    """前端 statStore 的做法：每次读取都扫描全部记录重新计算"""
+    fields = ("bet_id", "bet_type", "stake", "odds", "fee", "result", "status", "profit", "bet_time", "settle_seq", "settled_at")
+    sql = (
+        f"SELECT {', '.join(fields)} FROM ledger_bets WHERE ledger_id = ? "
+        "ORDER BY settle_seq IS NULL, settle_seq, bet_time, bet_id"
+    )
+    with get_db() as conn:
+        return LedgerUpdate.replay(starting_capital, [dict(zip(fields, row)) for row in iter_query(conn, sql, (ledger_id,))])
+
+
+def timed(func, rounds: int) -> float:
+    func()
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(samples), 3)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="投注账本基准")
+    parser.add_argument("--bets", type=int, default=20000)
+    parser.add_argument("--settle", type=int, default=500, help="导入后逐条结算的投注中记录数")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    init_db()
+    client = TestClient(app)
+    ledger_id = f"bench-{uuid.uuid4().hex[:8]}"
+    bets = random_bets(args.bets, args.seed)
+
+    started = time.perf_counter()
+    response = client.post(f"/api/ledgers/{ledger_id}/bets:import", json={"bets": bets, "startingCapital": 10000})
+    import_seconds = time.perf_counter() - started
+    assert response.status_code == 200, response.text
+
+    betting = [bet["id"] for bet in bets if bet["status"] == "betting"][:args.settle]
+    rng = random.Random(args.seed)
+    samples = []
+    for bet_id in betting:
+        started = time.perf_counter()
+        response = client.post(f"/api/ledgers/{ledger_id}/bets/{bet_id}/settle", json={"result": rng.choice(("win", "lose"))})
+        samples.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.text
+
+    incremental = client.get(f"/api/ledgers/{ledger_id}/stats").json()
+    ledger_repo.rebuild_ledger(ledger_id)
+    rebuilt = client.get(f"/api/ledgers/{ledger_id}/stats").json()
+    incremental.pop("updatedAt")
+    rebuilt.pop("updatedAt")
+    assert incremental == rebuilt, "增量统计与全量重放不一致"
+
+    print(
+        json.dumps(
+            {
+                "bets": args.bets,
+                "settled": incremental["settledCount"],
+                "import": {"seconds": round(import_seconds, 3), "bets_per_second": round(args.bets / import_seconds)},
+                "settle_median_ms": round(statistics.median(samples), 3) if samples else None,
+                "stats_read_ms": {
+                    "incremental_repository": timed(lambda: ledger_repo.get_ledger_stats(ledger_id, "week"), args.rounds),
+                    "incremental_endpoint": timed(lambda: client.get(f"/api/ledgers/{ledger_id}/stats").content, args.rounds),
+                    "full_scan": timed(lambda: full_scan(ledger_id, 10000), max(3, args.rounds // 10)),
+                },
+                "buckets": {"days": len(incremental["trendSeries"]), "weeks": len(incremental["periodStats"])},
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""串关计算基准：汇总计算（对称多项式）与逐注枚举的耗时和峰值内存。
+
+不依赖数据库，使用随机生成的多玩法选项::
+
+    python -m server.benchmarks.bench_parlay --matches 8 10 12 --options 3
+"""
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from typing import List
+
+from ..parlay import Leg, evaluate, group_by_match, iter_tickets, ticket_odds
+
+_CHOICES = [
+    ("had", "win"), ("had", "draw"), ("had", "lose"),
+    ("crs", "1:0"), ("crs", "2:1"), ("ttg", "2"), ("ttg", "3"), ("hafu", "胜胜"), ("hafu", "平胜"),
+]
+
+
+def random_legs(matches: int, options: int, seed: int = 7) -> List[Leg]:
+    rnd = random.Random(seed)
+    legs = []
+    for n in range(matches):
+        for market, selection in rnd.sample(_CHOICES, options):
+            legs.append(Leg(str(n), market, selection, round(rnd.uniform(1.3, 12.0), 2)))
+    return legs
+
+
+def measure(func):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func()
+    elapsed = (time.perf_counter() - started) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, round(elapsed, 2), round(peak / 1024, 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="串关计算基准")
+    parser.add_argument("--matches", type=int, nargs="+", default=[8, 10, 12])
+    parser.add_argument("--options", type=int, default=3, help="每场选项数")
+    parser.add_argument("--enumerate-limit", type=int, default=2_000_000, help="超过该注数时跳过逐注枚举")
+    args = parser.parse_args()
+
+    results = []
+    for matches in args.matches:
+        groups = group_by_match(random_legs(matches, args.options))
+        # 全部 2..M 串组合，8 场时即 8串247
+        sizes = tuple(range(2, matches + 1))
+        summary, summary_ms, summary_kb = measure(lambda: evaluate(groups, sizes))
+        row = {
+            "matches": matches,
+            "optionsPerMatch": args.options,
+            "sizes": list(sizes),
+            "ticketCount": summary["ticketCount"],
+            "summary_ms": summary_ms,
+            "summary_peak_kb": summary_kb,
+        }
+        if summary["ticketCount"] <= args.enumerate_limit:
+            def stream():
+                return sum(ticket_odds(ticket) for ticket in iter_tickets(groups, sizes))
+
+            def materialize():
+                tickets = list(iter_tickets(groups, sizes))
+                return sum(ticket_odds(ticket) for ticket in tickets)
+
+            _, row["stream_ms"], row["stream_peak_kb"] = measure(stream)
+            _, row["materialize_ms"], row["materialize_peak_kb"] = measure(materialize)
+        results.append(row)
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""玩法池解析吞吐基准（场/秒）：响应解码与解析表生成行元组分别计时。
+
+解码对比标准库 json、orjson 整包解码与流式解析器；解析按玩法池计时，指纹全部失效（每场都生成写入行）::
+
+    python -m server.benchmarks.bench_parse --per-day 200 --days 3 --rounds 5
+"""
+
+import argparse
+import json
+import time
+from datetime import date
+from typing import Any, Callable, Dict
+
+import orjson
+
+from ..repository import SyncBatch
+from ..scraper.markets import BASE_POOL, POOL_MARKETS
+from ..scraper.sporttery_service import SportterySyncService
+from ..scraper.stream import MatchStreamParser
+from .synthetic import SyntheticSlate
+
+
+def matches_per_second(func: Callable[[], Any], matches: int, rounds: int) -> int:
+    """取多轮中最快的一轮，折算为每秒处理的比赛场数"""
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return round(matches / best)
+
+
+def stream_decode(payload: bytes, chunk_size: int = 64 * 1024) -> None:
+    parser = MatchStreamParser()
+    for start in range(0, len(payload), chunk_size):
+        parser.feed(payload[start:start + chunk_size])
+    parser.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="玩法池解析吞吐基准")
+    parser.add_argument("--per-day", type=int, default=200, help="每天比赛场数")
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    pools = SyntheticSlate(date.today(), args.days, args.per_day, seed=args.seed).pools()
+    service = SportterySyncService.__new__(SportterySyncService)
+    service.incremental = True
+    service.stats = service._new_stats()
+    service.seen_matches, service.new_matches, service.changed_matches = set(), set(), set()
+
+    def parse(pool_name: str, data: Dict) -> None:
+        service.fingerprints = {}
+        service.parse_pool(pool_name, data, SyncBatch())
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for pool_name, data in pools.items():
+        payload = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        matches = sum(len(group["subMatchList"]) for group in data["value"]["matchInfoList"])
+        results[pool_name] = {
+            "markets": [schema.market for schema in POOL_MARKETS.get(pool_name, ())],
+            "payload_kb": round(len(payload) / 1024, 1),
+            "decode_json": matches_per_second(lambda: json.loads(payload), matches, args.rounds),
+            "decode_orjson": matches_per_second(lambda: orjson.loads(payload), matches, args.rounds),
+            "decode_stream": matches_per_second(lambda: stream_decode(payload), matches, args.rounds),
+            "parse": matches_per_second(lambda: parse(pool_name, data), matches, args.rounds),
+        }
+
+    slate_matches = sum(len(group["subMatchList"]) for group in pools[BASE_POOL]["value"]["matchInfoList"])
+
+    def parse_slate() -> None:
+        for pool_name, data in pools.items():
+            parse(pool_name, data)
+
+    print(
+        json.dumps(
+            {
+                "matches": slate_matches,
+                "pools": results,
+                # 一场比赛的全部玩法池（4 个池）解析完成计为一场
+                "slate_parse": matches_per_second(parse_slate, slate_matches, args.rounds),
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
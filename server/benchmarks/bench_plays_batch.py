@@ -0,0 +1,61 @@
+"""批量玩法接口基准：逐场 GET /api/matches/{id}/plays vs 一次 POST /api/plays:batch。
+
+关闭读缓存与响应快照，比较的是每次请求实际的数据库与序列化开销；使用 SQLITE_PATH 指向的已有数据::
+
+    python -m server.benchmarks.bench_plays_batch --date 2025-11-14 --rounds 20
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from fastapi.testclient import TestClient
+
+from ..cache import read_cache, snapshot_cache
+from ..database import pool_stats
+from ..main import app, repo
+
+
+def timed(func, rounds: int) -> dict:
+    func()
+    samples = []
+    acquired = pool_stats()["checkouts"]
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {
+        "median_ms": round(statistics.median(samples), 2),
+        "checkouts_per_round": round((pool_stats()["checkouts"] - acquired) / rounds, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="批量玩法接口基准")
+    parser.add_argument("--date", default=None, help="赛事日期，不传时取未开赛的比赛")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    read_cache.max_entries = 0
+    snapshot_cache.max_entries = 0
+    client = TestClient(app)
+    match_ids = repo.list_match_ids(date=args.date)
+
+    def per_match():
+        return [client.get(f"/api/matches/{match_id}/plays").json() for match_id in match_ids]
+
+    def batch():
+        return client.post("/api/plays:batch", json={"matchIds": match_ids}).json()["items"]
+
+    assert per_match() == batch(), "批量接口与逐场接口返回不一致"
+    result = {
+        "matches": len(match_ids),
+        "per_match": timed(per_match, args.rounds),
+        "batch": timed(batch, args.rounds),
+    }
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""同步调度模拟：固定间隔抓取全部玩法池 vs 按开赛时间与变化率的自适应调度。
+
+以合成赛程的开赛时间推进虚拟时钟，不访问上游与数据库。每次抓取中比赛内容有变化的比例按距开赛时间给定
+（临场最高），统计上游请求数、解析写入的比赛场次，每场比赛开赛前最后一小时内相邻两次刷新的最大间隔，
+以及开赛时数据的年龄（最后一次刷新距开赛的时间）::
+
+    python -m server.benchmarks.bench_schedule --per-day 60 --days 2
+"""
+
+import argparse
+import json
+import statistics
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List
+
+from .. import settings
+from ..sync_plan import SyncPlanner
+from .synthetic import SyntheticSlate
+
+
+def change_ratio(lead: float) -> float:
+    """距开赛 lead 秒的比赛在一次抓取间隔内赔率变化的概率"""
+    if lead <= 3600:
+        return 0.6
+    if lead <= 6 * 3600:
+        return 0.2
+    return 0.05
+
+
+def simulate(kickoffs: List[int], start: int, end: int, adaptive: bool) -> Dict[str, Any]:
+    planner = SyncPlanner()
+    requests = 0
+    ingested = 0
+    refreshed: Dict[int, List[int]] = {kickoff: [] for kickoff in set(kickoffs)}
+    last_fixed = None
+    for now in range(start, end, settings.SYNC_TICK_SECONDS):
+        upcoming = [kickoff for kickoff in kickoffs if kickoff >= now]
+        if adaptive:
+            planner.load_kickoffs(upcoming)
+            plan = planner.due(now)
+            if plan is None:
+                continue
+            pools, kickoff_before = plan.pools, plan.kickoff_before
+        else:
+            if last_fixed is not None and now - last_fixed < settings.SYNC_INTERVAL_SECONDS:
+                continue
+            last_fixed = now
+            pools, kickoff_before = list(settings.POOL_CODES), None
+        covered = [kickoff for kickoff in upcoming if kickoff_before is None or kickoff <= kickoff_before]
+        changed = round(sum(change_ratio(kickoff - now) for kickoff in covered))
+        planner.record(now, pools, kickoff_before, {pool: {"attempts": 1, "matches": len(covered), "changed": changed} for pool in pools})
+        requests += len(pools)
+        ingested += len(pools) * len(covered)
+        for kickoff in set(covered):
+            refreshed[kickoff].append(now)
+
+    # 开赛前最后一小时：相邻两次刷新（含最后一次刷新到开赛）的最大间隔，以及开赛时数据的年龄
+    gaps, ages = [], []
+    for kickoff, times in refreshed.items():
+        window = [t for t in times if t >= kickoff - 3600]
+        if not start + 3600 <= kickoff <= end or not window:
+            continue
+        points = window + [kickoff]
+        gaps.append(max(b - a for a, b in zip(points, points[1:])))
+        ages.append(kickoff - window[-1])
+    return {
+        "upstream_requests": requests,
+        "matches_ingested": ingested,
+        "last_hour_max_gap_s": {"median": statistics.median(gaps), "max": max(gaps)} if gaps else None,
+        "age_at_kickoff_s": {"median": statistics.median(ages), "max": max(ages)} if ages else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="同步调度模拟")
+    parser.add_argument("--per-day", type=int, default=60)
+    parser.add_argument("--days", type=int, default=2, help="模拟天数（赛程多生成一天，保证最后一天仍有未来比赛）")
+    args = parser.parse_args()
+
+    first = date.today()
+    slate = SyntheticSlate(first, args.days + 1, args.per_day)
+    kickoffs = sorted(match.kickoff_ts for match in slate.matches)
+    # 起点偏移 7 分 15 秒，避免固定间隔的抓取恰好落在整点开赛时刻
+    start = int(datetime.combine(first, datetime.min.time()).timestamp()) + 435
+    end = int(datetime.combine(first + timedelta(days=args.days), datetime.min.time()).timestamp())
+    print(
+        json.dumps(
+            {
+                "days": args.days,
+                "matches_per_day": args.per_day,
+                "fixed": simulate(kickoffs, start, end, adaptive=False),
+                "adaptive": simulate(kickoffs, start, end, adaptive=True),
+                "settings": {
+                    "SYNC_INTERVAL_SECONDS": settings.SYNC_INTERVAL_SECONDS,
+                    "SYNC_MAX_INTERVAL_SECONDS": settings.SYNC_MAX_INTERVAL_SECONDS,
+                    "SYNC_KICKOFF_WINDOW_SECONDS": settings.SYNC_KICKOFF_WINDOW_SECONDS,
+                    "SYNC_KICKOFF_INTERVAL_SECONDS": settings.SYNC_KICKOFF_INTERVAL_SECONDS,
+                    "SYNC_REQUEST_BUDGET": settings.SYNC_REQUEST_BUDGET,
+                },
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""自动结算基准：按比赛结果一次结算大量投注中的记录（单关与串关，覆盖 had/hhad/crs/ttg/hafu）。
+
+合成赛程的赛果经本地桩服务由 ResultsSyncService 抓取入库，然后计时 settle_open_bets，
+逐条校验记录结果与按 selection_wins 直接计算的结果一致，并用全量重放校验各账本的增量统计。
+使用 SQLITE_PATH 指向的数据库（会写入比赛结果与账本表）::
+
+    python -m server.benchmarks.bench_settlement --legs 100000 --ledgers 20
+"""
+
+import argparse
+import json
+import random
+import time
+import uuid
+from datetime import date, timedelta
+
+from ..database import init_db
+from ..ledger import normalize_bet
+from ..main import format_ledger_stats, ledger_repo
+from ..outcomes import match_result, selection_wins
+from ..scraper.results import ResultsSyncService, parse_result
+from ..settlement import settle_open_bets
+from .stub_sporttery import RESULTS_KEY, StubSportteryServer
+from .synthetic import SyntheticSlate
+
+
+def random_bets(slate: SyntheticSlate, legs: int, seed: int) -> list:
+    """投注中的记录，共约 legs 个选项；约一半为 2~3 场串关"""
+    rng = random.Random(seed)
+    bets = []
+    count = 0
+    while count < legs:
+        matches = rng.sample(slate.matches, rng.choice((1, 1, 2, 3)))
+        bet_legs = []
+        for match in matches:
+            market = rng.choice(list(match.odds))
+            selection, odds = rng.choice(list(match.odds[market].items()))
+            bet_legs.append({
+                "matchId": str(match.match_id),
+                "market": market,
+                "selection": selection,
+                "handicap": match.handicap if market == "hhad" else None,
+                "homeTeam": match.home[1],
+                "awayTeam": match.away[1],
+                "odds": odds,
+            })
+        bets.append({
+            "id": f"auto-{len(bets)}",
+            "stake": rng.choice((10, 20, 50, 100)),
+            "status": "betting",
+            "betTime": f"{matches[0].kickoff:%Y-%m-%d} {rng.randint(0, 11):02d}:{rng.randint(0, 59):02d}",
+            "legs": bet_legs,
+        })
+        count += len(bet_legs)
+    return bets
+
+
+def expected_result(bet: dict, scores: dict) -> str:
+    for leg in bet["legs"]:
+        home, away, half_home, half_away = scores[leg["matchId"]]
+        half = match_result(half_home, half_away)
+        if not selection_wins(leg["market"], leg["selection"], home, away, half, leg["handicap"]):
+            return "lose"
+    return "win"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="自动结算基准")
+    parser.add_argument("--legs", type=int, default=100000, help="待结算的选项总数")
+    parser.add_argument("--ledgers", type=int, default=20)
+    parser.add_argument("--per-day", type=int, default=60, help="合成赛程每天的比赛场数")
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    init_db()
+    slate = SyntheticSlate(date.today() - timedelta(days=args.days), args.days, args.per_day, args.seed, status="Finished")
+    bets = random_bets(slate, args.legs, args.seed)
+    prefix = f"settle-{uuid.uuid4().hex[:8]}"
+    ledgers = {f"{prefix}-{index}": bets[index::args.ledgers] for index in range(args.ledgers)}
+
+    started = time.perf_counter()
+    for ledger_id, group in ledgers.items():
+        ledger_repo.add_bets(ledger_id, [normalize_bet(bet) for bet in group], check_balance=False)
+    import_seconds = time.perf_counter() - started
+
+    payload = slate.results(args.seed)
+    with StubSportteryServer(payloads={RESULTS_KEY: json.dumps(payload).encode()}) as stub:
+        service = ResultsSyncService(api_url=stub.results_url)
+        try:
+            results = service.run_once()
+        finally:
+            service.close()
+
+    stats = settle_open_bets(ledger_repo)
+
+    scores = {row[0]: row[2:6] for row in map(parse_result, payload["value"]["matchResult"])}
+    mismatched = 0
+    for ledger_id, group in ledgers.items():
+        settled = {}
+        page = 1
+        while True:
+            listing = ledger_repo.list_bets(ledger_id, page=page, page_size=1000)
+            settled.update((bet["bet_id"], bet) for bet in listing["items"])
+            if page * 1000 >= listing["total"]:
+                break
+            page += 1
+        for bet in group:
+            record = settled[bet["id"]]
+            if record["status"] != "settled" or record["result"] != expected_result(bet, scores):
+                mismatched += 1
+        # 比较接口输出（已按前端口径舍入），累加顺序不同带来的浮点误差不计
+        before = format_ledger_stats(ledger_id, "week", ledger_repo.get_ledger_stats(ledger_id, "week"))
+        ledger_repo.rebuild_ledger(ledger_id)
+        after = format_ledger_stats(ledger_id, "week", ledger_repo.get_ledger_stats(ledger_id, "week"))
+        before.pop("updatedAt")
+        after.pop("updatedAt")
+        assert before == after, f"{ledger_id}: 增量统计与全量重放不一致"
+    assert mismatched == 0, f"{mismatched} 条记录的结算结果与赛果不一致"
+
+    print(
+        json.dumps(
+            {
+                "bets": len(bets),
+                "legs": stats["legs"],
+                "ledgers": args.ledgers,
+                "matches": len(slate.matches),
+                "import_seconds": round(import_seconds, 3),
+                "results_sync": results,
+                "settlement": stats,
+                "legs_per_second": round(stats["legs"] / stats["seconds"]) if stats["seconds"] else None,
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""内存赛程基准：读接口由数据库回答 vs 由内存赛程回答的延迟与连接取用次数，以及每场比赛占用的内存。
+
+关闭读缓存与响应快照，两种方式的返回逐字节比较；内存对比 Slate 与同样数据物化为查询结果字典（get_plays_bulk）的大小。
+使用 SQLITE_PATH 指向的已有数据::
+
+    python -m server.benchmarks.bench_slate --rounds 50
+"""
+
+import argparse
+import json
+import statistics
+import time
+import tracemalloc
+
+from fastapi.testclient import TestClient
+
+from ..cache import read_cache, snapshot_cache
+from ..database import init_db, pool_stats
+from ..main import app, repo
+from ..slate import deep_size, slate_store
+
+
+def timed(func, rounds: int) -> dict:
+    func()
+    samples = []
+    acquired = pool_stats()["checkouts"]
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "checkouts_per_round": round((pool_stats()["checkouts"] - acquired) / rounds, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="内存赛程基准")
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    init_db()
+    read_cache.max_entries = 0
+    snapshot_cache.max_entries = 0
+    client = TestClient(app)
+
+    # 先构建一次，让连接与语句缓存不计入内存统计
+    repo.load_slate()
+    tracemalloc.start()
+    slate = repo.load_slate()
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    slate_store.enabled = True
+    slate_store.current = slate
+    match_ids = [record.match_id for record in slate.ordered]
+    if not match_ids:
+        raise SystemExit("SQLITE_PATH 中没有未结束的比赛，请先同步或写入合成数据")
+    sample = match_ids[len(match_ids) // 2]
+    league = slate.ordered[0].league
+
+    cases = {
+        "GET /api/matches": lambda: client.get("/api/matches", params={"page_size": 50}).content,
+        "GET /api/matches?league": lambda: client.get("/api/matches", params={"league": league}).content,
+        "GET /api/matches/{id}": lambda: client.get(f"/api/matches/{sample}").content,
+        "GET /api/matches/{id}/plays": lambda: client.get(f"/api/matches/{sample}/plays").content,
+        "POST /api/plays:batch": lambda: client.post("/api/plays:batch", json={"matchIds": match_ids[:50]}).content,
+        "GET /api/analytics/margins": lambda: client.get("/api/analytics/margins").content,
+    }
+    endpoints = {}
+    for name, func in cases.items():
+        slate_store.enabled = False
+        expected, database = func(), timed(func, args.rounds)
+        slate_store.enabled = True
+        assert func() == expected, f"{name}: 内存赛程与数据库返回不一致"
+        endpoints[name] = {"database": database, "slate": timed(func, args.rounds)}
+
+    slate_store.enabled = False
+    rows = repo.get_plays_bulk(match_ids)
+    rows_bytes = deep_size(rows)
+    slate_store.enabled = True
+    print(
+        json.dumps(
+            {
+                "matches": len(slate),
+                "odds_rows": slate.odds_rows,
+                "build_ms": round(timed(repo.load_slate, 5)["median_ms"], 1),
+                "memory": {
+                    "slate_bytes_per_match": round(slate.nbytes / len(slate)),
+                    "traced_bytes_per_match": round(traced / len(slate)),
+                    "dict_rows_bytes_per_match": round(rows_bytes / len(slate)),
+                },
+                "endpoints": endpoints,
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
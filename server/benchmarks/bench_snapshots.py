@@ -0,0 +1,81 @@
+"""响应快照基准：逐请求 format + FastAPI 默认序列化 vs 预序列化快照的 CPU 时间与响应字节数。
+
+使用 SQLITE_PATH 指向的已有数据，读缓存保持开启，两种方式都不访问数据库::
+
+    python -m server.benchmarks.bench_snapshots --requests 2000 --date 2025-11-14
+"""
+
+import argparse
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from starlette.requests import Request
+
+from ..main import format_match, repo
+from ..snapshots import get_snapshot, snapshot_response
+
+
+def make_request(headers: dict) -> Request:
+    raw = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw, "query_string": b""})
+
+
+def list_payload(date) -> dict:
+    data = repo.list_matches(date=date, page=1, page_size=50)
+    return {"items": [format_match(row) for row in data["items"]], "total": data["total"], "page": 1, "pageSize": 50}
+
+
+def plays_payload(match_id: str) -> dict:
+    match = repo.get_match(match_id)
+    wdl = repo.get_wdl_odds(match_id)
+    plays = {
+        "had": wdl.get("had"),
+        "hhad": wdl.get("hhad"),
+        "crs": repo.get_scores(match_id),
+        "ttg": repo.get_total_goals(match_id),
+        "hafu": repo.get_hafu(match_id),
+    }
+    return {"match": format_match(match), "plays": plays}
+
+
+def cpu_per_request(func, requests: int) -> float:
+    func()
+    started = time.process_time()
+    for _ in range(requests):
+        func()
+    return round((time.process_time() - started) / requests * 1e6, 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="响应快照基准")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--date", default=None, help="赛事日期，不传时取未开赛的比赛")
+    args = parser.parse_args()
+
+    match_ids = repo.list_match_ids(date=args.date)
+    cases = [("matches", lambda: list_payload(args.date))]
+    if match_ids:
+        cases.append(("plays", lambda: plays_payload(match_ids[0])))
+
+    results = []
+    for name, build in cases:
+        snapshot = get_snapshot(("bench", name), build)
+        identity = make_request({})
+        compressed = make_request({"Accept-Encoding": "br, gzip"})
+        revalidate = make_request({"If-None-Match": snapshot.etag})
+        results.append({
+            "endpoint": name,
+            "baseline_us": cpu_per_request(lambda: JSONResponse(jsonable_encoder(build())), args.requests),
+            "snapshot_us": cpu_per_request(lambda: snapshot_response(compressed, get_snapshot(("bench", name), build)), args.requests),
+            "identity_bytes": len(snapshot_response(identity, snapshot).body),
+            "gzip_bytes": len(snapshot.gzip or snapshot.body),
+            "br_bytes": len(snapshot_response(compressed, snapshot).body),
+            "not_modified_bytes": len(snapshot_response(revalidate, snapshot).body),
+        })
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
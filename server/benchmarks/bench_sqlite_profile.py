@@ -0,0 +1,165 @@
+"""SQLite 性能配置基准：同步写入进行中时的读接口延迟。
+
+每个配置在独立子进程中运行（配置在导入时读取），使用临时数据库，关闭读缓存与响应快照后
+通过 TestClient 请求接口，分别测量空闲与后台持续全量写入时 /api/matches、/plays 的 p50/p99::
+
+    python -m server.benchmarks.bench_sqlite_profile --copies 20 --duration 5
+"""
+
+import argparse
+import copy
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+PROFILES = ("default", "wal")
+
+
+def scaled_pools(copies: int) -> Dict[str, dict]:
+    """把录制的玩法池复制 copies 份（比赛 ID 依次偏移），得到更大的赛程"""
+    from .. import settings
+    from .stub_sporttery import FIXTURES_DIR
+
+    pools = {}
+    for pool_name in settings.POOL_CODES:
+        data = json.loads((FIXTURES_DIR / f"{pool_name}.json").read_bytes())
+        groups = data["value"]["matchInfoList"]
+        scaled = []
+        for n in range(copies):
+            for group in groups:
+                group = copy.deepcopy(group)
+                for match in group["subMatchList"]:
+                    match["matchId"] = int(match["matchId"]) + n * 1_000_000
+                scaled.append(group)
+        data["value"]["matchInfoList"] = scaled
+        pools[pool_name] = data
+    return pools
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(latencies: List[float]) -> dict:
+    return {
+        "requests": len(latencies),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(max(latencies), 2),
+    }
+
+
+def run_worker(copies: int, duration: float, readers: int) -> dict:
+    from fastapi.testclient import TestClient
+
+    from .. import main
+    from ..database import init_db
+    from ..repository import OddsRepository, SyncBatch
+    from ..scraper.sporttery_service import SportterySyncService
+
+    init_db()
+    repo = OddsRepository()
+    service = SportterySyncService(repository=repo)
+    service.close()
+    pools = scaled_pools(copies)
+
+    def build_batch() -> SyncBatch:
+        batch = SyncBatch()
+        for pool_name, data in pools.items():
+            service.parse_pool(pool_name, data, batch)
+        return batch
+
+    batch = build_batch()
+    repo.write_batch(batch)
+    match_ids = [str(m["matchId"]) for g in pools["had_hhad"]["value"]["matchInfoList"] for m in g["subMatchList"]]
+    date = pools["had_hhad"]["value"]["matchInfoList"][0]["businessDate"]
+
+    def measure(writing: bool) -> dict:
+        stop = threading.Event()
+        latencies: List[float] = []
+        lock = threading.Lock()
+        writes: List[float] = []
+
+        def reader(offset: int) -> None:
+            client = TestClient(main.app)
+            local: List[float] = []
+            i = offset
+            while not stop.is_set():
+                started = time.perf_counter()
+                if i % 2:
+                    client.get("/api/matches", params={"date": date, "page_size": 20})
+                else:
+                    client.get(f"/api/matches/{match_ids[i % len(match_ids)]}/plays")
+                local.append((time.perf_counter() - started) * 1000)
+                i += 1
+            with lock:
+                latencies.extend(local)
+
+        def writer() -> None:
+            while not stop.is_set():
+                started = time.perf_counter()
+                repo.write_batch(batch)
+                writes.append((time.perf_counter() - started) * 1000)
+
+        threads = [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+        if writing:
+            threads.append(threading.Thread(target=writer))
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        result = summarize(latencies)
+        if writes:
+            result["sync_writes"] = len(writes)
+            result["sync_write_mean_ms"] = round(statistics.mean(writes), 1)
+        return result
+
+    return {"rows_per_sync": len(batch), "idle": measure(False), "during_sync": measure(True)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SQLite 性能配置基准")
+    parser.add_argument("--copies", type=int, default=20, help="录制赛程的复制份数")
+    parser.add_argument("--duration", type=float, default=5.0, help="每个阶段的测量时长（秒）")
+    parser.add_argument("--readers", type=int, default=4, help="并发读线程数")
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES))
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.copies, args.duration, args.readers)))
+        return
+
+    results = {}
+    for profile in args.profiles:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(
+                os.environ,
+                SQLITE_PROFILE=profile,
+                SQLITE_PATH=str(Path(tmp) / "bench.sqlite"),
+                DB_TYPE="sqlite",
+                READ_CACHE_MAX_ENTRIES="0",
+                SNAPSHOT_MAX_ENTRIES="0",
+            )
+            output = subprocess.run(
+                [sys.executable, "-m", "server.benchmarks.bench_sqlite_profile", "--worker",
+                 "--copies", str(args.copies), "--duration", str(args.duration), "--readers", str(args.readers)],
+                env=env, check=True, capture_output=True, text=True,
+            ).stdout
+            results[profile] = json.loads(output.strip().splitlines()[-1])
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
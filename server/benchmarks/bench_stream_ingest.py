@@ -0,0 +1,125 @@
+"""同步峰值内存基准：整包解析（json 全量载入、整次同步一个写入单元）vs 流式解析分批写入。
+
+用合成赛程生成不同规模的玩法池，由本地桩服务提供；每次测量在独立子进程中对空 SQLite 库做一次全量同步，
+记录 tracemalloc 峰值与常驻内存（RSS）峰值的增量::
+
+    python -m server.benchmarks.bench_stream_ingest --sizes 50,200,800
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict
+
+from .. import settings
+from .stub_sporttery import StubSportteryServer
+from .synthetic import SyntheticSlate
+
+MODES = ("whole_document", "streaming")
+
+
+def whole_document(service) -> None:
+    """改为流式之前的同步方式：全部玩法池整包载入后解析为一个写入单元"""
+    from ..repository import SyncBatch
+    from .bench_fetch import fetch_concurrent
+
+    pools, _ = asyncio.run(fetch_concurrent(service.api_url))
+    match_ids = {
+        str(match_data.get("matchId"))
+        for data in pools.values()
+        for group in data["value"]["matchInfoList"]
+        for match_data in group["subMatchList"]
+    }
+    service.fingerprints = service.repository.load_fingerprints(list(match_ids))
+    batch = SyncBatch()
+    for pool_name in settings.POOL_CODES:
+        service.parse_pool(pool_name, pools[pool_name], batch)
+    service.write(batch)
+
+
+def run_child(mode: str, api_url: str) -> Dict[str, Any]:
+    """子进程：初始化空库后执行一次全量同步"""
+    from ..database import init_db
+    from ..scraper.sporttery_service import SportterySyncService
+
+    init_db()
+    service = SportterySyncService(api_url=api_url)
+    service.incremental = False
+    # 与没有实时推送订阅者时的定时同步一致
+    service.track_price_changes = False
+    # Linux 上 ru_maxrss 单位为 KB
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    started = time.perf_counter()
+    if mode == "streaming":
+        service.run_once(incremental=False)
+    else:
+        whole_document(service)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    service.close()
+    return {
+        "traced_peak_mb": round(peak / 1024 / 1024, 1),
+        "rss_growth_mb": round((rss_after - rss_before) / 1024, 1),
+        "seconds": round(elapsed, 2),
+    }
+
+
+def measure(mode: str, api_url: str, sqlite_path: str) -> Dict[str, Any]:
+    # run_once 在 finalize_sync 中会重建内存赛程，整包模式不经过这一步；关闭内存赛程使两种模式只比较抓取、解析与写入
+    env = dict(os.environ, SQLITE_PATH=sqlite_path, SYNC_LEADER_LOCK="0", SLATE_ENABLED="0")
+    output = subprocess.run(
+        [sys.executable, "-W", "ignore", "-m", "server.benchmarks.bench_stream_ingest", "--child", mode, "--api-url", api_url],
+        env=env,
+        cwd=str(Path(__file__).resolve().parents[2]),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="同步峰值内存基准")
+    parser.add_argument("--sizes", default="50,200,800", help="每天比赛场数（共 --days 天），逗号分隔")
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--api-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.api_url)))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="stream-ingest-") as workdir:
+        for per_day in [int(size) for size in args.sizes.split(",")]:
+            slate = SyntheticSlate(date.today(), args.days, per_day)
+            payloads = {
+                settings.POOL_CODES[name]: json.dumps(data, ensure_ascii=False).encode("utf-8")
+                for name, data in slate.pools().items()
+            }
+            row: Dict[str, Any] = {
+                "matches": len(slate.matches),
+                "payload_mb": round(sum(map(len, payloads.values())) / 1024 / 1024, 1),
+            }
+            with StubSportteryServer(payloads=payloads) as stub:
+                for mode in MODES:
+                    row[mode] = measure(mode, stub.url, os.path.join(workdir, f"{mode}-{per_day}.sqlite"))
+            results.append(row)
+    print(json.dumps({"batch_size": settings.SYNC_STREAM_BATCH_SIZE, "results": results}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""SQLite 线程连接基准：模拟线程池工作线程反复启动、退出（如 AnyIO 空闲回收），校验打开的连接数有界。
+
+每一轮启动 --threads 个短命线程，各自通过 get_db() 执行一次查询后退出；每轮结束后打开的连接数
+不应超过仍存活的线程数。同时记录单次获取连接（含新建）的耗时。使用 SQLITE_PATH 指向的数据库::
+
+    python -m server.benchmarks.bench_thread_connections --threads 200 --rounds 5
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+
+from .. import settings
+from ..database import get_db, init_db, pool_stats
+
+
+def burst(count: int, timings: list) -> None:
+    def work() -> None:
+        started = time.perf_counter()
+        with get_db() as conn:
+            conn.execute("SELECT 1").fetchone()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    threads = [threading.Thread(target=work) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SQLite 线程连接基准")
+    parser.add_argument("--threads", type=int, default=200, help="每轮的短命线程数")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    if settings.DB_TYPE != "sqlite":
+        raise SystemExit("只适用于 SQLite（MySQL 使用固定大小的连接池）")
+
+    init_db()
+    timings: list = []
+    open_after = []
+    for _ in range(args.rounds):
+        burst(args.threads, timings)
+        stats = pool_stats()
+        open_after.append(stats["open"])
+        # 本轮线程均已退出，只剩主线程（init_db）的连接
+        assert stats["open"] <= threading.active_count(), f"打开的连接数 {stats['open']} 超过存活线程数"
+
+    stats = pool_stats()
+    print(
+        json.dumps(
+            {
+                "threads_per_round": args.threads,
+                "rounds": args.rounds,
+                "open_after_round": open_after,
+                "created": stats.get("created"),
+                "acquire_median_ms": round(statistics.median(timings), 3),
+                "acquire_p95_ms": round(sorted(timings)[int(len(timings) * 0.95)], 3),
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
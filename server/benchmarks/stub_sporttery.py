@@ -0,0 +1,137 @@
+"""本地竞彩接口桩服务。
+
+按 poolCode 返回 fixtures/ 下录制的玩法池 JSON，赛果接口（路径含 getMatchResult）返回 fixtures/results.json，
+可注入响应延迟与随机失败，用于离线联调、测试和基准测试抓取阶段::
+
+    python -m server.benchmarks.stub_sporttery --port 7002 --latency 0.3
+    SPORTTERY_API_URL=http://127.0.0.1:7002/gateway \
+        RESULTS_API_URL=http://127.0.0.1:7002/gateway/getMatchResultV1.qry uvicorn server.main:app
+"""
+
+import argparse
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+from .. import settings
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+# 赛果接口响应在 payloads 中的键
+RESULTS_KEY = "results"
+
+
+def load_fixtures(fixtures_dir: Path = FIXTURES_DIR) -> Dict[str, bytes]:
+    """读取录制数据，返回 {poolCode 参数: 响应字节}，赛果响应的键为 RESULTS_KEY"""
+    payloads: Dict[str, bytes] = {}
+    for pool_name, pool_code in settings.POOL_CODES.items():
+        path = fixtures_dir / f"{pool_name}.json"
+        if path.exists():
+            payloads[pool_code] = path.read_bytes()
+    path = fixtures_dir / "results.json"
+    if path.exists():
+        payloads[RESULTS_KEY] = path.read_bytes()
+    return payloads
+
+
+class StubSportteryServer:
+    """在后台线程运行的桩服务，可作为上下文管理器使用"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        payloads: Optional[Dict[str, bytes]] = None,
+    ):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.payloads = payloads if payloads is not None else load_fixtures()
+        self.requests = 0
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/gateway/uniform/football/getMatchCalculatorV1.qry"
+
+    @property
+    def results_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/gateway/uniform/football/getMatchResultV1.qry"
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if stub.failure_rate and random.random() < stub.failure_rate:
+                    self.send_error(503, "stub failure")
+                    return
+                url = urlparse(self.path)
+                if "getMatchResult" in url.path:
+                    pool_code = RESULTS_KEY
+                else:
+                    pool_code = parse_qs(url.query).get("poolCode", [""])[0]
+                body = stub.payloads.get(pool_code)
+                if body is None:
+                    self.send_error(404, "unknown poolCode")
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json;charset=UTF-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "StubSportteryServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "StubSportteryServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="竞彩接口桩服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7002)
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的固定延迟（秒）")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="随机返回 503 的概率")
+    parser.add_argument("--fixtures", default=str(FIXTURES_DIR), help="玩法池 JSON 目录，可用 synthetic 生成")
+    args = parser.parse_args()
+    server = StubSportteryServer(
+        args.host, args.port, args.latency, args.failure_rate, payloads=load_fixtures(Path(args.fixtures))
+    )
+    print(f"Serving {len(server.payloads)} pools at {server.url} (results at {server.results_url})")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+"""基准测试套件：用合成赛程生成数据，运行解析 / 同步写入 / 各仓储查询的微基准，
+以及对每个 HTTP 接口的并发负载测试，结果输出为 JSON 便于长期比较。
+
+SQLite 使用临时数据库；MySQL 使用 MYSQL_* 配置的库（会建表并写入数据，请使用专用的空库）::
+
+    python -m server.benchmarks.suite --output bench.json
+    python -m server.benchmarks.suite --db mysql --output bench-mysql.json
+    python -m server.benchmarks.suite --baseline bench.json --fail-on-regression
+
+--baseline 按相同指标与上次结果比较，微基准中位耗时或接口 p95 变慢、吞吐下降超过 --threshold 时记为回退。
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .bench_sqlite_profile import percentile
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "rounds": len(samples),
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "min_ms": round(min(samples), 3),
+    }
+
+
+def micro(func: Callable[[], Any], rounds: int, warmup: int = 1) -> Dict[str, float]:
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# 负载测试 ---------------------------------------------------------------------------
+
+class ApiServer:
+    """在后台线程运行 uvicorn（关闭 lifespan，不启动定时同步）"""
+
+    def __init__(self, app):
+        import uvicorn
+
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self.server = uvicorn.Server(
+            uvicorn.Config(app, host="127.0.0.1", port=self.port, lifespan="off", log_level="warning", access_log=False)
+        )
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "ApiServer":
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.should_exit = True
+        self.thread.join()
+
+
+async def _load(base_url: str, make_request: Callable[[int], Tuple[str, str, Optional[dict]]], concurrency: int, duration: float) -> Dict[str, Any]:
+    import httpx
+
+    latencies: List[float] = []
+    errors = 0
+    received = 0
+    counter = iter(range(10 ** 9))
+    deadline = time.perf_counter() + duration
+
+    async def worker(client: "httpx.AsyncClient") -> None:
+        nonlocal errors, received
+        while time.perf_counter() < deadline:
+            method, path, body = make_request(next(counter))
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                received += len(response.content)
+                if response.status_code >= 400:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    started = time.perf_counter()
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits, headers={"Accept-Encoding": "br, gzip"}) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    result = summarize(latencies)
+    result.pop("rounds")
+    result.update({
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "bytes_per_request": round(received / max(1, len(latencies))),
+    })
+    return result
+
+
+async def _live_connect(base_url: str, concurrency: int, duration: float) -> Dict[str, Any]:
+    """SSE 连接建立到收到 hello 事件的耗时"""
+    import httpx
+
+    latencies: List[float] = []
+    deadline = time.perf_counter() + duration
+
+    async def worker(client: "httpx.AsyncClient") -> None:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            async with client.stream("GET", "/api/live") as response:
+                async for line in response.aiter_lines():
+                    if line.startswith("event: hello"):
+                        break
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    result = summarize(latencies)
+    result["requests"] = result.pop("rounds")
+    return result
+
+
+# 套件主体 ---------------------------------------------------------------------------
+
+def run_suite(args) -> Dict[str, Any]:
+    from .. import settings
+    from ..cache import read_cache, snapshot_cache
+    from ..database import init_db
+    from ..main import app
+    from ..repository import OddsRepository, SyncBatch
+    from ..scraper.sporttery_service import SportterySyncService
+    from .stub_sporttery import StubSportteryServer
+    from .synthetic import build_slates
+
+    init_db()
+    repo = OddsRepository()
+    current, past = build_slates(args.per_day, args.days, args.history_days, args.seed)
+    current_pools, past_pools = current.pools(), past.pools()
+
+    def parsed(pools: Dict[str, dict], service: SportterySyncService) -> SyncBatch:
+        batch = SyncBatch()
+        for pool_name, data in pools.items():
+            service.parse_pool(pool_name, data, batch)
+        return batch
+
+    setup_started = time.perf_counter()
+    loader = SportterySyncService(repository=repo)
+    loader.close()
+    for pools in (past_pools, current_pools):
+        repo.write_batch(parsed(pools, loader))
+    history_points = repo.insert_history(
+        past.history(args.lead_hours, seed=args.seed)
+    ) + repo.insert_history(current.history(args.lead_hours, seed=args.seed))
+    repo.finalize_sync(len(current.matches), 0)
+    setup_seconds = round(time.perf_counter() - setup_started, 1)
+
+    match_ids = [str(match.match_id) for match in current.matches]
+    past_ids = [str(match.match_id) for match in past.matches]
+    first_day = current.matches[0].business_date.isoformat()
+    league = current.matches[0].league[1]
+    history_window = (past.matches[0].kickoff_ts - 7 * 86400, current.matches[-1].kickoff_ts)
+    rounds = args.rounds
+
+    # 微基准：关闭读缓存与响应快照，测量的是真实解析 / 写入 / 查询开销
+    read_cache.max_entries = 0
+    snapshot_cache.max_entries = 0
+    results: Dict[str, Dict[str, Any]] = {}
+
+    fresh = SportterySyncService(repository=repo)
+    fresh.close()
+    for pool_name, data in current_pools.items():
+        def parse_one(pool_name=pool_name, data=data):
+            fresh.fingerprints = {}
+            fresh.parse_pool(pool_name, data, SyncBatch())
+        results[f"parse.{pool_name}"] = micro(parse_one, rounds)
+
+    incremental = SportterySyncService(repository=repo)
+    incremental.close()
+    incremental.fingerprints = repo.load_fingerprints(match_ids)
+    results["parse.unchanged_slate"] = micro(lambda: parsed(current_pools, incremental), rounds)
+
+    full_batch = parsed(current_pools, fresh)
+    results["sync.write_batch"] = micro(lambda: repo.write_batch(full_batch), max(3, rounds // 4))
+
+    stub_payloads = {
+        settings.POOL_CODES[name]: json.dumps(data, ensure_ascii=False).encode("utf-8") for name, data in current_pools.items()
+    }
+    with StubSportteryServer(payloads=stub_payloads) as stub:
+        syncer = SportterySyncService(repository=repo, api_url=stub.url)
+        results["sync.run_once_incremental"] = micro(lambda: syncer.run_once(incremental=True), max(3, rounds // 4))
+        results["sync.run_once_full"] = micro(lambda: syncer.run_once(incremental=False), max(3, rounds // 4))
+        syncer.close()
+
+        # 游标取自第一页（与测量的请求同为每页 20 场），只有一页时没有下一页游标，跳过两个游标用例
+        cursor = repo.list_matches(page_size=20, with_total=False)["next_cursor"]
+        notes: List[str] = []
+        if cursor is None:
+            notes.append("在售比赛不超过一页（20 场），跳过 repo.list_matches.cursor 与 GET /api/matches?cursor")
+        sample = match_ids[len(match_ids) // 2]
+        queries: Dict[str, Callable[[], Any]] = {
+            "repo.get_latest_issue": repo.get_latest_issue,
+            "repo.list_matches": lambda: repo.list_matches(page_size=20),
+            "repo.list_matches.cursor": lambda: repo.list_matches(page_size=20, cursor=cursor, with_total=False),
+            "repo.list_matches.offset_deep": lambda: repo.list_matches(page=max(1, len(match_ids) // 20), page_size=20, with_total=False),
+            "repo.list_matches.league": lambda: repo.list_matches(league=league, page_size=20),
+            "repo.count_matches": repo.count_matches,
+            "repo.list_match_ids": lambda: repo.list_match_ids(date=first_day),
+            "repo.get_match": lambda: repo.get_match(sample),
+            "repo.get_wdl_odds": lambda: repo.get_wdl_odds(sample),
+            "repo.get_scores": lambda: repo.get_scores(sample),
+            "repo.get_total_goals": lambda: repo.get_total_goals(sample),
+            "repo.get_hafu": lambda: repo.get_hafu(sample),
+            "repo.fetch_wdl_for_matches": lambda: repo.fetch_wdl_for_matches(match_ids[:50]),
+            "repo.get_plays_bulk": lambda: repo.get_plays_bulk(match_ids[:100]),
+            "repo.get_prices": lambda: repo.get_prices(match_ids[:100]),
+            "repo.get_match_leagues": lambda: repo.get_match_leagues(match_ids[:100]),
+            "repo.load_fingerprints": lambda: repo.load_fingerprints(match_ids),
+            "repo.iter_history": lambda: sum(1 for _ in repo.iter_history(past_ids[0], "crs", *history_window)),
+        }
+        if cursor is None:
+            queries.pop("repo.list_matches.cursor")
+        for name, func in queries.items():
+            results[name] = micro(func, rounds)
+
+        # 负载测试：恢复缓存配置，与线上行为一致
+        read_cache.max_entries = settings.READ_CACHE_MAX_ENTRIES
+        snapshot_cache.max_entries = settings.SNAPSHOT_MAX_ENTRIES
+        parlay_legs = [
+            {"matchId": str(match.match_id), "market": "had", "selection": "win"}
+            for match in current.matches if "had" in match.odds
+        ][:4]
+        endpoints: Dict[str, Callable[[int], Tuple[str, str, Optional[dict]]]] = {
+            "GET /api/health": lambda i: ("GET", "/api/health", None),
+            "GET /api/matches": lambda i: ("GET", "/api/matches?page_size=20", None),
+            "GET /api/matches?cursor": lambda i: ("GET", f"/api/matches?page_size=20&include_total=false&cursor={cursor}", None),
+            "GET /api/matches?date": lambda i: ("GET", f"/api/matches?date={first_day}&page={i % 3 + 1}", None),
+            "GET /api/matches/{id}": lambda i: ("GET", f"/api/matches/{match_ids[i % len(match_ids)]}", None),
+            "GET /api/matches/{id}/plays": lambda i: ("GET", f"/api/matches/{match_ids[i % len(match_ids)]}/plays", None),
+            "GET /api/matches/{id}/history": lambda i: (
+                "GET", f"/api/matches/{past_ids[i % len(past_ids)]}/history?market=had&start={history_window[0]}&end={history_window[1]}", None,
+            ),
+            "POST /api/plays:batch": lambda i: ("POST", "/api/plays:batch", {"matchIds": match_ids[:100]}),
+            "POST /api/parlay": lambda i: ("POST", "/api/parlay", {"legs": parlay_legs, "parlayType": f"{len(parlay_legs)}_1"}),
+            "GET /api/analytics/margins": lambda i: ("GET", f"/api/analytics/margins?date={first_day}", None),
+        }
+        if cursor is None:
+            endpoints.pop("GET /api/matches?cursor")
+        load: Dict[str, Dict[str, Any]] = {}
+        settings.SPORTTERY_API_URL = stub.url
+        with ApiServer(app) as server:
+            for name, make_request in endpoints.items():
+                load[name] = asyncio.run(_load(server.base_url, make_request, args.concurrency, args.duration))
+            load["POST /api/sync"] = asyncio.run(_load(server.base_url, lambda i: ("POST", "/api/sync", None), 1, args.duration))
+            load["GET /api/live (hello)"] = asyncio.run(_live_connect(server.base_url, args.concurrency, args.duration))
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "db": settings.DB_TYPE,
+            "sqliteProfile": settings.SQLITE_PROFILE if settings.DB_TYPE == "sqlite" else None,
+            "args": vars(args),
+            "data": {
+                "currentMatches": len(current.matches),
+                "pastMatches": len(past.matches),
+                "historyPoints": history_points,
+                "setupSeconds": setup_seconds,
+            },
+            "notes": notes,
+        },
+        "micro": results,
+        "load": load,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """与基线比较，返回超出阈值的回退项"""
+    regressions = []
+    checks = [("micro", "median_ms", 1), ("load", "p95_ms", 1), ("load", "rps", -1)]
+    for section, metric, direction in checks:
+        for name, values in current.get(section, {}).items():
+            before = baseline.get(section, {}).get(name, {}).get(metric)
+            after = values.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            if change * direction > threshold:
+                regressions.append({"section": section, "name": name, "metric": metric, "baseline": before, "current": after, "change": round(change, 3)})
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="基准测试套件")
+    parser.add_argument("--db", choices=["sqlite", "mysql"], default="sqlite")
+    parser.add_argument("--per-day", type=int, default=40, help="合成赛程每天的比赛场数")
+    parser.add_argument("--days", type=int, default=3, help="在售天数")
+    parser.add_argument("--history-days", type=int, default=60, help="已结束赛程的天数（决定赔率历史的时间跨度）")
+    parser.add_argument("--lead-hours", type=float, default=48, help="每场比赛开赛前记录历史的时长")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--rounds", type=int, default=30, help="每个微基准的重复次数")
+    parser.add_argument("--concurrency", type=int, default=8, help="负载测试并发连接数")
+    parser.add_argument("--duration", type=float, default=3.0, help="每个接口的负载测试时长（秒）")
+    parser.add_argument("--output", help="结果 JSON 文件，不传时输出到标准输出")
+    parser.add_argument("--baseline", help="用于比较的上次结果 JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="视为回退的相对变化")
+    parser.add_argument("--fail-on-regression", action="store_true", help="存在回退时以非零状态退出")
+    args = parser.parse_args()
+
+    # 配置在导入时读取，必须在导入服务端模块之前设置
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DB_TYPE"] = args.db
+        if args.db == "sqlite":
+            os.environ["SQLITE_PATH"] = str(Path(tmp) / "bench.sqlite")
+        result = run_suite(args)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        result["regressions"] = compare(result, baseline, args.threshold)
+        result["meta"]["baselineCommit"] = baseline.get("meta", {}).get("commit")
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output, encoding="utf-8")
+    else:
+        print(output)
+    regressions = result.get("regressions") or []
+    for item in regressions:
+        print(f"regression: {item['section']} {item['name']} {item['metric']} {item['baseline']} -> {item['current']}", file=sys.stderr)
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
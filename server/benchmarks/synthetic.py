@@ -0,0 +1,314 @@
+"""合成赛程生成器：按任意规模生成与竞彩接口格式一致的玩法池数据，以及多个月的赔率历史。
+
+每场比赛按主客队进球期望（上下半场独立泊松分布）计算五个玩法各选项的概率，
+再加上各玩法的返还率溢价得到赔率，因此各玩法赔率之间相互一致；赛果按同样的进球期望抽样。
+生成结果只取决于参数与 seed::
+
+    python -m server.benchmarks.synthetic --per-day 40 --days 3 --out /tmp/slate
+    python -m server.benchmarks.stub_sporttery --fixtures /tmp/slate
+"""
+
+import argparse
+import json
+import math
+import random
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .. import settings
+from ..history import MARKET_SELECTIONS
+from ..outcomes import MAX_ENUM_GOALS, iter_outcomes, selection_wins
+
+LEAGUES = [
+    ("72", "英超", "英格兰超级联赛"), ("73", "世预赛", "世界杯预选赛"), ("74", "西甲", "西班牙甲级联赛"),
+    ("75", "意甲", "意大利甲级联赛"), ("76", "德甲", "德国甲级联赛"), ("77", "法甲", "法国甲级联赛"),
+    ("78", "荷甲", "荷兰甲级联赛"), ("79", "葡超", "葡萄牙超级联赛"), ("80", "日职", "日本职业联赛"),
+    ("81", "韩职", "韩国职业联赛"), ("82", "欧冠", "欧洲冠军联赛"), ("83", "英冠", "英格兰冠军联赛"),
+]
+KICKOFF_TIMES = ["12:00:00", "15:30:00", "19:00:00", "20:00:00", "22:00:00", "23:30:00"]
+WEEKDAYS = "一二三四五六日"
+HANDICAPS = (-2.0, -1.0, 1.0, 2.0)
+# 各玩法的返还率溢价（隐含概率之和 - 1）
+MARGINS = {"had": 0.12, "hhad": 0.12, "crs": 0.35, "ttg": 0.25, "hafu": 0.28}
+FIRST_HALF_SHARE = 0.45
+MAX_ODDS = 1000.0
+
+_HALF_INDEX = {"win": 0, "draw": 1, "lose": 2}
+_CRS_OTHER_KEYS = {"胜其他": "s1sh", "平其他": "spsh", "负其他": "sash"}
+_HAFU_KEYS = {"胜": "h", "平": "d", "负": "a"}
+_WDL_KEYS = {"win": "h", "draw": "d", "lose": "a"}
+
+
+def _payload_key(market: str, selection: str) -> str:
+    if market in ("had", "hhad"):
+        return _WDL_KEYS[selection]
+    if market == "crs":
+        if selection in _CRS_OTHER_KEYS:
+            return _CRS_OTHER_KEYS[selection]
+        home, away = selection.split(":")
+        return f"s{int(home):02d}s{int(away):02d}"
+    if market == "ttg":
+        return "s7" if selection == "7+" else f"s{selection}"
+    return _HAFU_KEYS[selection[0]] + _HAFU_KEYS[selection[1]]
+
+
+_MASKS: Dict[Tuple[str, float], Dict[str, np.ndarray]] = {}
+
+
+def _selection_masks(market: str, handicap: float = 0.0) -> Dict[str, np.ndarray]:
+    """各选项在 (半场结果, 主队进球, 客队进球) 网格上的命中掩码"""
+    key = (market, handicap)
+    if key not in _MASKS:
+        size = MAX_ENUM_GOALS + 1
+        masks = {}
+        for selection in MARKET_SELECTIONS[market]:
+            if selection == "handicap":
+                continue
+            mask = np.zeros((3, size, size), dtype=bool)
+            for home, away, half in iter_outcomes():
+                mask[_HALF_INDEX[half], home, away] = selection_wins(market, selection, home, away, half, handicap)
+            masks[selection] = mask
+        _MASKS[key] = masks
+    return _MASKS[key]
+
+
+def _poisson(lam: float) -> np.ndarray:
+    goals = np.arange(MAX_ENUM_GOALS + 1)
+    return np.exp(-lam + goals * math.log(lam) - np.array([math.lgamma(g + 1) for g in goals]))
+
+
+def outcome_grid(lam_home: float, lam_away: float) -> np.ndarray:
+    """(半场结果, 主队进球, 客队进球) 的概率网格，上下半场进球相互独立"""
+    size = MAX_ENUM_GOALS + 1
+    first = np.outer(_poisson(lam_home * FIRST_HALF_SHARE), _poisson(lam_away * FIRST_HALF_SHARE))
+    second = np.outer(_poisson(lam_home * (1 - FIRST_HALF_SHARE)), _poisson(lam_away * (1 - FIRST_HALF_SHARE)))
+    grid = np.zeros((3, size, size))
+    for h in range(size):
+        for a in range(size):
+            half = _HALF_INDEX["win" if h > a else "lose" if h < a else "draw"]
+            grid[half, h:, a:] += first[h, a] * second[:size - h, :size - a]
+    return grid
+
+
+class SyntheticMatch:
+    __slots__ = ("match_id", "business_date", "code", "kickoff", "league", "home", "away", "handicap", "single", "odds", "goals")
+
+    def __init__(self, match_id: int, business_date: date, code: str, kickoff: datetime, league, home, away, handicap, single):
+        self.match_id = match_id
+        self.business_date = business_date
+        self.code = code
+        self.kickoff = kickoff
+        self.league = league
+        self.home = home
+        self.away = away
+        self.handicap = handicap
+        self.single = single
+        # {market: {selection: 赔率}}
+        self.odds: Dict[str, Dict[str, float]] = {}
+        # 主客队进球期望，用于生成赛果
+        self.goals: Tuple[float, float] = (0.0, 0.0)
+
+    @property
+    def kickoff_ts(self) -> int:
+        return int(self.kickoff.timestamp())
+
+
+def price_market(grid: np.ndarray, market: str, handicap: float = 0.0) -> Dict[str, float]:
+    masks = _selection_masks(market, handicap)
+    probs = {selection: float(grid[mask].sum()) for selection, mask in masks.items()}
+    total = sum(probs.values())
+    margin = 1 + MARGINS[market]
+    return {
+        selection: round(min(MAX_ODDS, max(1.01, total / (p * margin))) if p > 0 else MAX_ODDS, 2)
+        for selection, p in probs.items()
+    }
+
+
+class SyntheticSlate:
+    """从 start 起连续 days 天、每天 per_day 场比赛的合成赛程"""
+
+    def __init__(self, start: date, days: int, per_day: int, seed: int = 7, status: str = "Selling"):
+        self.status = status
+        self.matches: List[SyntheticMatch] = []
+        rnd = random.Random(f"{seed}:{start.isoformat()}")
+        for offset in range(days):
+            day = start + timedelta(days=offset)
+            for n in range(per_day):
+                league = LEAGUES[rnd.randrange(len(LEAGUES))]
+                strength = rnd.gauss(0, 0.35)
+                lam_home = max(0.2, 1.45 * math.exp(strength))
+                lam_away = max(0.2, 1.15 * math.exp(-strength))
+                kickoff = datetime.combine(day, datetime.strptime(KICKOFF_TIMES[n % len(KICKOFF_TIMES)], "%H:%M:%S").time())
+                handicap = -1.0 if strength > 0 else 1.0
+                if abs(strength) > 0.5:
+                    handicap *= 2
+                match = SyntheticMatch(
+                    match_id=day.toordinal() * 1000 + n,
+                    business_date=day,
+                    code=f"周{WEEKDAYS[day.weekday()]}{n + 1:03d}",
+                    kickoff=kickoff,
+                    league=league,
+                    home=(str(rnd.randrange(100, 9999)), f"主队{rnd.randrange(1000)}"),
+                    away=(str(rnd.randrange(100, 9999)), f"客队{rnd.randrange(1000)}"),
+                    handicap=handicap,
+                    single=int(rnd.random() < 0.3),
+                )
+                match.goals = (lam_home, lam_away)
+                grid = outcome_grid(lam_home, lam_away)
+                for market in MARKET_SELECTIONS:
+                    # 少量比赛不开售胜平负，只有让球胜平负
+                    if market == "had" and rnd.random() < 0.05:
+                        continue
+                    match.odds[market] = price_market(grid, market, handicap if market == "hhad" else 0.0)
+                self.matches.append(match)
+
+    def _base(self, match: SyntheticMatch) -> Dict:
+        day = match.business_date
+        return {
+            "matchId": match.match_id,
+            "matchNumDate": day.strftime("%y%m%d"),
+            "matchNumStr": match.code,
+            "leagueId": match.league[0],
+            "leagueAbbName": match.league[1],
+            "leagueAllName": match.league[2],
+            "matchDate": match.kickoff.strftime("%Y-%m-%d"),
+            "matchTime": match.kickoff.strftime("%H:%M:%S"),
+            "homeTeamId": match.home[0],
+            "homeTeamAbbName": match.home[1],
+            "homeRank": "",
+            "awayTeamId": match.away[0],
+            "awayTeamAbbName": match.away[1],
+            "awayRank": "",
+            "bettingSingle": match.single,
+            "matchStatus": self.status,
+            "matchTips": "",
+            "oddsUpdateTime": None,
+        }
+
+    def _pool_fields(self, match: SyntheticMatch, pool_name: str) -> Dict:
+        def encoded(market: str) -> Dict[str, str]:
+            prices = match.odds.get(market)
+            if not prices:
+                return {}
+            return {_payload_key(market, selection): f"{odds:.2f}" for selection, odds in prices.items()}
+
+        if pool_name == "had_hhad":
+            had, hhad = encoded("had"), encoded("hhad")
+            for data in (had, hhad):
+                if data:
+                    data.update({"h_trend": None, "d_trend": None, "a_trend": None})
+            if hhad:
+                hhad["goalLineValue"] = f"{match.handicap:+g}"
+            pools = [{"poolCode": "HAD", "single": match.single}] if had else []
+            pools.append({"poolCode": "HHAD", "single": 0})
+            return {"had": had, "hhad": hhad, "poolList": pools}
+        return {pool_name: encoded(pool_name)}
+
+    def pools(self) -> Dict[str, Dict]:
+        """{玩法池名: 接口响应}，与 fixtures/ 下录制数据的结构一致"""
+        result = {}
+        for pool_name in settings.POOL_CODES:
+            groups: Dict[date, List[Dict]] = {}
+            for match in self.matches:
+                groups.setdefault(match.business_date, []).append({**self._base(match), **self._pool_fields(match, pool_name)})
+            result[pool_name] = {
+                "success": True,
+                "emptyFlag": False,
+                "errorCode": "0",
+                "errorMessage": "处理成功",
+                "value": {
+                    "matchInfoList": [
+                        {"businessDate": day.isoformat(), "subMatchList": sub} for day, sub in sorted(groups.items())
+                    ],
+                },
+            }
+        return result
+
+    def results(self, seed: int = 7) -> Dict:
+        """赛果接口响应：按各场进球期望随机生成上下半场比分，与 fixtures/results.json 的结构一致"""
+        rng = np.random.default_rng(seed)
+        items = []
+        for match in self.matches:
+            expected = np.array(match.goals)
+            half = rng.poisson(expected * FIRST_HALF_SHARE)
+            full = half + rng.poisson(expected * (1 - FIRST_HALF_SHARE))
+            items.append({
+                "matchId": match.match_id,
+                "matchDate": match.kickoff.strftime("%Y-%m-%d"),
+                "matchNumStr": match.code,
+                "leagueNameAbbr": match.league[1],
+                "homeTeam": match.home[1],
+                "awayTeam": match.away[1],
+                "sectionsNo1": f"{half[0]}:{half[1]}",
+                "sectionsNo999": f"{full[0]}:{full[1]}",
+            })
+        return {
+            "success": True,
+            "errorCode": "0",
+            "errorMessage": "处理成功",
+            "value": {"matchResult": items, "pageNo": 1, "pages": 1, "pageSize": len(items), "total": len(items)},
+        }
+
+    def history(
+        self,
+        lead_hours: float = 48,
+        interval_seconds: int = 600,
+        change_rate: float = 0.1,
+        seed: int = 7,
+    ) -> Iterator[Tuple[str, str, int, str]]:
+        """开赛前 lead_hours 小时内、每 interval_seconds 一次同步的赔率历史点 (match_id, market, ts, prices)。
+
+        首个同步写入全部玩法，之后每次同步每个玩法以 change_rate 的概率随机游走一次，只有变化时才产生新点，
+        与 OddsRepository 的去重写入规则一致。
+        """
+        rnd = random.Random(seed)
+        ticks = max(1, int(lead_hours * 3600 // interval_seconds))
+        for match in self.matches:
+            match_id = str(match.match_id)
+            start = (match.kickoff_ts - ticks * interval_seconds) // interval_seconds * interval_seconds
+            prices = {market: dict(values) for market, values in match.odds.items()}
+            for tick in range(ticks):
+                ts = start + tick * interval_seconds
+                for market, values in prices.items():
+                    if tick and rnd.random() >= change_rate:
+                        continue
+                    if tick:
+                        for selection in values:
+                            values[selection] = round(min(MAX_ODDS, max(1.01, values[selection] * math.exp(rnd.gauss(0, 0.03)))), 2)
+                    keys = MARKET_SELECTIONS[market]
+                    vector = [match.handicap if key == "handicap" else values.get(key) for key in keys]
+                    yield match_id, market, ts, json.dumps(vector, separators=(",", ":"))
+
+
+def build_slates(per_day: int, days: int, history_days: int, seed: int = 7, today: Optional[date] = None):
+    """当前在售赛程（今天起 days 天）与已结束的历史赛程（此前 history_days 天）"""
+    today = today or date.today()
+    current = SyntheticSlate(today, days, per_day, seed)
+    past = SyntheticSlate(today - timedelta(days=history_days), history_days, per_day, seed, status="Finished")
+    return current, past
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="生成合成玩法池数据")
+    parser.add_argument("--per-day", type=int, default=40, help="每天的比赛场数")
+    parser.add_argument("--days", type=int, default=3, help="在售天数")
+    parser.add_argument("--start", default=None, help="起始日期 YYYY-MM-DD，默认今天")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", required=True, help="输出目录，文件名与 fixtures/ 一致")
+    args = parser.parse_args()
+
+    start = date.fromisoformat(args.start) if args.start else date.today()
+    slate = SyntheticSlate(start, args.days, args.per_day, args.seed)
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    for pool_name, data in slate.pools().items():
+        (out / f"{pool_name}.json").write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    (out / "results.json").write_text(json.dumps(slate.results(args.seed), ensure_ascii=False), encoding="utf-8")
+    print(f"Wrote {len(slate.matches)} matches to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from . import settings
+
+
+class ReadCache:
+    """进程内读缓存：LRU 淘汰 + TTL 过期，并按同步代数整体失效。
+
+    数据只在同步完成后变化，finalize_sync 调用 bump_generation 清空缓存；
+    TTL 用于兜底按当前时间过滤的查询以及其它进程完成的同步。
+    缓存值在多个请求间共享，调用方不能修改返回的对象。
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        if not self.enabled:
+            return loader()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self.generation
+        value = loader()
+        with self._lock:
+            # 加载期间发生了同步，结果可能已过期，不写入缓存
+            if generation == self.generation:
+                self._entries[key] = (now + self.ttl_seconds, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def bump_generation(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "generation": self.generation,
+                "entries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hitRate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+read_cache = ReadCache(settings.READ_CACHE_MAX_ENTRIES, settings.READ_CACHE_TTL_SECONDS)
+# 序列化后的接口响应快照（见 snapshots.py），与读缓存同时失效
+snapshot_cache = ReadCache(settings.SNAPSHOT_MAX_ENTRIES, settings.READ_CACHE_TTL_SECONDS)
+
+
+def cached(func: Callable) -> Callable:
+    """OddsRepository 查询方法的读缓存装饰器，按方法名与参数缓存结果"""
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        key = (name, args, tuple(sorted(kwargs.items())))
+        return read_cache.get_or_load(key, lambda: func(self, *args, **kwargs))
+
+    return wrapper
@@ -1,64 +1,125 @@
 import sqlite3
+import threading
 from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict
-
-import pymysql
+from typing import Any, Dict, Iterator, Optional, Sequence
 
 from . import settings
+from .leader import process_lock
+from .metrics import db_acquire_seconds, observe
+from .migrations import migrate
+from .pool import ConnectionPool, ThreadLocalConnections
 
 _DB_PATH = Path(settings.SQLITE_PATH)
-_SCHEMA = Path(settings.SCHEMA_PATH)
-_SCHEMA_MYSQL = Path(settings.SCHEMA_MYSQL_PATH)
+
+# SQLite 性能配置：journal_mode 持久保存在数据库文件中，只在初始化时设置；其余为连接级 PRAGMA
+SQLITE_PROFILES: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "default": {
+        "database": {"journal_mode": "DELETE"},
+        "connection": {},
+    },
+    "wal": {
+        "database": {"journal_mode": "WAL"},
+        "connection": {
+            "synchronous": "NORMAL",
+            "cache_size": -settings.SQLITE_CACHE_SIZE_KB,
+            "mmap_size": settings.SQLITE_MMAP_SIZE,
+            "temp_store": "MEMORY",
+        },
+    },
+}
+
+
+def _sqlite_profile() -> Dict[str, Dict[str, Any]]:
+    try:
+        return SQLITE_PROFILES[settings.SQLITE_PROFILE]
+    except KeyError:
+        raise ValueError(f"未知的 SQLITE_PROFILE: {settings.SQLITE_PROFILE}，可选 {', '.join(SQLITE_PROFILES)}")
+
+
+_initialized = False
+_init_lock = threading.Lock()
 
 
 def init_db() -> None:
-    """初始化数据库"""
-    if settings.DB_TYPE == "mysql":
-        _init_mysql_db()
-    else:
-        _init_sqlite_db()
+    """初始化数据库并升级到最新结构版本。每个进程只执行一次，多个进程同时启动时由进程间锁串行"""
+    global _initialized
+    if _initialized:
+        return
+    with _init_lock:
+        if _initialized:
+            return
+        lock = process_lock("schema")
+        if not lock.acquire(timeout=settings.SCHEMA_LOCK_TIMEOUT):
+            raise RuntimeError("等待其它进程完成数据库初始化超时")
+        try:
+            if settings.DB_TYPE == "mysql":
+                _init_mysql_db()
+            else:
+                _init_sqlite_db()
+        finally:
+            lock.release()
+        _initialized = True
 
 
 def _init_sqlite_db() -> None:
     """初始化 SQLite 数据库"""
     _DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(_DB_PATH)
+    conn = sqlite3.connect(_DB_PATH, timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000)
     try:
-        with open(_SCHEMA, "r", encoding="utf-8") as f:
-            conn.executescript(f.read())
+        for name, value in _sqlite_profile()["database"].items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        migrate(conn, "sqlite")
     finally:
         conn.close()
 
 
 def _init_mysql_db() -> None:
     """初始化 MySQL 数据库"""
+    import pymysql
+
     conn = pymysql.connect(**settings.MYSQL_CONFIG)
     try:
-        with conn.cursor() as cursor:
-            with open(_SCHEMA_MYSQL, "r", encoding="utf-8") as f:
-                # 分割SQL语句并逐个执行
-                sql_commands = f.read().split(';')
-                for command in sql_commands:
-                    command = command.strip()
-                    if command:
-                        cursor.execute(command)
-        conn.commit()
+        migrate(conn, "mysql")
     finally:
         conn.close()
 
 
+def schema_version() -> int:
+    with get_db() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT MAX(version) FROM schema_version")
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+    if not row:
+        return 0
+    value = next(iter(row.values())) if isinstance(row, dict) else row[0]
+    return int(value or 0)
+
+
 def _connect_sqlite() -> sqlite3.Connection:
     """连接 SQLite 数据库"""
-    conn = sqlite3.connect(_DB_PATH)
+    # 连接按线程复用，只在所属线程内使用；关闭时可能来自其它线程，因此关闭同线程检查
+    conn = sqlite3.connect(
+        _DB_PATH,
+        check_same_thread=False,
+        timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+        cached_statements=settings.SQLITE_CACHED_STATEMENTS,
+    )
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA foreign_keys = ON")
+    for name, value in _sqlite_profile()["connection"].items():
+        conn.execute(f"PRAGMA {name} = {value}")
     return conn
 
 
 def _connect_mysql():
     """连接 MySQL 数据库"""
+    import pymysql
+
     conn = pymysql.connect(
         **settings.MYSQL_CONFIG,
         cursorclass=pymysql.cursors.DictCursor,
@@ -75,22 +136,62 @@ def _connect():
         return _connect_sqlite()
 
 
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """按配置惰性创建连接池：MySQL 为固定容量连接池，SQLite 为每线程一个连接"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                if settings.DB_TYPE == "mysql":
+                    _pool = ConnectionPool(
+                        _connect_mysql,
+                        size=settings.DB_POOL_SIZE,
+                        timeout=settings.DB_POOL_TIMEOUT,
+                        recycle=settings.DB_POOL_RECYCLE_SECONDS,
+                        ping_interval=settings.DB_POOL_PING_INTERVAL,
+                        ping=lambda conn: conn.ping(reconnect=False),
+                    )
+                else:
+                    _pool = ThreadLocalConnections(_connect_sqlite, recycle=settings.DB_POOL_RECYCLE_SECONDS)
+    return _pool
+
+
+def pool_stats() -> Dict[str, Any]:
+    """连接池统计：取用次数、等待次数与时长、峰值占用等"""
+    return _get_pool().stats()
+
+
+def close_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
 @contextmanager
 def get_db():
-    """获取数据库连接的上下文管理器"""
-    conn = _connect()
+    """获取数据库连接的上下文管理器，连接来自连接池，退出时提交并归还"""
+    pool = _get_pool()
+    with observe(db_acquire_seconds):
+        entry = pool.acquire()
+    conn = entry.conn
+    broken = False
     try:
-        if settings.DB_TYPE == "mysql":
-            yield conn
-            conn.commit()
-        else:
-            yield conn
-            conn.commit()
+        yield conn
+        conn.commit()
     except Exception:
-        conn.rollback()
+        try:
+            conn.rollback()
+        except Exception:
+            broken = True
         raise
     finally:
-        conn.close()
+        pool.release(entry, discard=broken)
 
 
 def _execute_sqlite(conn: sqlite3.Connection, sql: str, params=None) -> Any:
@@ -118,6 +219,28 @@ def _execute(conn, sql: str, params=None) -> Any:
         return _execute_sqlite(conn, sql, params)
 
 
+def iter_query(conn, sql: str, params: Sequence[Any] = (), batch_size: int = 500) -> Iterator[tuple]:
+    """逐批读取查询结果（元组形式），MySQL 使用非缓冲游标，避免大结果集一次性载入内存"""
+    if settings.DB_TYPE == "mysql":
+        from pymysql.cursors import SSCursor
+
+        with conn.cursor(SSCursor) as cursor:
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+    else:
+        cur = conn.execute(sql, params)
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield tuple(row)
+
+
 def touch_sync_status(conn) -> None:
     """确保 sync_status 表有记录"""
     if settings.DB_TYPE == "mysql":
@@ -131,24 +254,41 @@ def touch_sync_status(conn) -> None:
         )
 
 
-def update_sync_status(conn, total_matches: int, total_odds: int) -> None:
-    """更新同步状态"""
+def update_sync_status(conn, total_matches: Optional[int], total_odds: Optional[int], changes: Optional[Dict[str, int]] = None) -> None:
+    """更新同步状态，changes 为本次同步的新增/变更/跳过赛事数；总数为 None 时保留原值"""
     now = datetime.utcnow().isoformat()
+    changes = changes or {}
+    values = (
+        now,
+        total_matches,
+        total_odds,
+        changes.get("new", 0),
+        changes.get("changed", 0),
+        changes.get("skipped", 0),
+    )
     touch_sync_status(conn)
     
     if settings.DB_TYPE == "mysql":
         with conn.cursor() as cursor:
             cursor.execute(
-                "UPDATE sync_status SET last_synced_at = %s, total_matches = %s, total_odds = %s WHERE id = 1",
-                (now, total_matches, total_odds),
+                "UPDATE sync_status SET last_synced_at = %s, total_matches = COALESCE(%s, total_matches), total_odds = COALESCE(%s, total_odds), "
+                "new_matches = %s, changed_matches = %s, skipped_matches = %s WHERE id = 1",
+                values,
             )
     else:
         conn.execute(
-            "UPDATE sync_status SET last_synced_at = ?, total_matches = ?, total_odds = ? WHERE id = 1",
-            (now, total_matches, total_odds),
+            "UPDATE sync_status SET last_synced_at = ?, total_matches = COALESCE(?, total_matches), total_odds = COALESCE(?, total_odds), "
+            "new_matches = ?, changed_matches = ?, skipped_matches = ? WHERE id = 1",
+            values,
         )
 
 
+_SYNC_STATUS_SQL = (
+    "SELECT last_synced_at, total_matches, total_odds, new_matches, changed_matches, skipped_matches "
+    "FROM sync_status WHERE id = 1"
+)
+
+
 def fetch_sync_status() -> Dict[str, Any]:
     """获取同步状态"""
     with get_db() as conn:
@@ -156,14 +296,21 @@ def fetch_sync_status() -> Dict[str, Any]:
         
         if settings.DB_TYPE == "mysql":
             with conn.cursor() as cursor:
-                cursor.execute("SELECT last_synced_at, total_matches, total_odds FROM sync_status WHERE id = 1")
+                cursor.execute(_SYNC_STATUS_SQL)
                 row = cursor.fetchone()
                 if row:
                     return row
         else:
-            cur = conn.execute("SELECT last_synced_at, total_matches, total_odds FROM sync_status WHERE id = 1")
+            cur = conn.execute(_SYNC_STATUS_SQL)
             row = cur.fetchone()
             if row:
                 return dict(row)
         
-        return {"last_synced_at": None, "total_matches": 0, "total_odds": 0}
+        return {
+            "last_synced_at": None,
+            "total_matches": 0,
+            "total_odds": 0,
+            "new_matches": 0,
+            "changed_matches": 0,
+            "skipped_matches": 0,
+        }
@@ -0,0 +1,43 @@
+import json
+from typing import Dict, Iterable, List, Tuple
+
+# 各玩法历史序列的价格向量顺序，每个历史点只存一个与之对齐的 JSON 数组
+MARKET_SELECTIONS: Dict[str, Tuple[str, ...]] = {
+    "had": ("win", "draw", "lose"),
+    "hhad": ("handicap", "win", "draw", "lose"),
+    "crs": (
+        "1:0", "2:0", "2:1", "3:0", "3:1", "3:2", "4:0", "4:1", "4:2", "5:0", "5:1", "5:2", "胜其他",
+        "0:0", "1:1", "2:2", "3:3", "平其他",
+        "0:1", "0:2", "1:2", "0:3", "1:3", "2:3", "0:4", "1:4", "2:4", "0:5", "1:5", "2:5", "负其他",
+    ),
+    "ttg": ("0", "1", "2", "3", "4", "5", "6", "7+"),
+    "hafu": ("胜胜", "胜平", "胜负", "平胜", "平平", "平负", "负胜", "负平", "负负"),
+}
+
+HistoryPoint = Tuple[int, str]
+
+
+def downsample(points: Iterable[HistoryPoint], start: int, end: int, max_points: int) -> List[HistoryPoint]:
+    """按时间等宽分桶降采样，每桶只保留最后一个点。
+
+    赔率是阶梯序列，桶内最后一个点即桶结束时的价格。逐点消费输入，
+    内存只与 max_points 相关，与序列长度无关。
+    """
+    width = max(1, -(-(end - start + 1) // max_points))
+    result: List[HistoryPoint] = []
+    last_bucket = None
+    for ts, prices in points:
+        bucket = (max(ts, start) - start) // width
+        if bucket == last_bucket:
+            result[-1] = (ts, prices)
+        else:
+            result.append((ts, prices))
+            last_bucket = bucket
+    return result
+
+
+def format_series(market: str, points: List[HistoryPoint]) -> Dict:
+    return {
+        "selections": list(MARKET_SELECTIONS[market]),
+        "points": [[ts, json.loads(prices)] for ts, prices in points],
+    }
@@ -0,0 +1,226 @@
+"""多注同时投注的 Kelly 组合：在全部赛果情景上最大化对数资金增长，求各注的资金比例。
+
+前端 calcKellyStake 逐注独立计算，同一时间有多注未结算、或同一场比赛下注了互斥的选项时会超额投注。
+这里把每场比赛的赛果表示为 (半场结果, 主队进球, 客队进球) 网格上的概率分布：先由当前比分与半全场赔率
+去水得到先验，再按用户给出的各选项命中概率做比例拟合（IPF），同一场比赛的选项因此共享同一个分布，
+互斥的选项不会同时命中。各场比赛相互独立，按"哪些注同时命中"把网格压缩为少量原子事件后求笛卡尔积，
+得到 (情景数, 注数) 的收益矩阵，目标函数与梯度都是一次矩阵乘法。
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .outcomes import MAX_ENUM_GOALS, iter_outcomes, match_result, selection_wins
+from .parlay import Leg
+
+_SIZE = MAX_ENUM_GOALS + 1
+_HALF_INDEX = {"win": 0, "draw": 1, "lose": 2}
+_HAFU_LABELS = {"win": "胜", "draw": "平", "lose": "负"}
+# 先验中混入的均匀分布权重，保证缺少赔率的赛果也有概率，比例拟合可以调整到
+_PRIOR_FLOOR = 1e-6
+# 合计投注比例的上限略小于 1，任何情景下剩余资金都为正
+_MAX_BUDGET = 1.0 - 1e-9
+
+
+@lru_cache(maxsize=1)
+def _feasible() -> np.ndarray:
+    """网格中可能出现的赛果（半场领先方在全场必须有进球）"""
+    mask = np.zeros((3, _SIZE, _SIZE), dtype=bool)
+    for home, away, half in iter_outcomes():
+        mask[_HALF_INDEX[half], home, away] = True
+    mask.setflags(write=False)
+    return mask
+
+
+@lru_cache(maxsize=1024)
+def win_mask(market: str, selection: str, handicap: Optional[float] = None) -> np.ndarray:
+    """选项在网格上的命中掩码，不可能的赛果为 False"""
+    mask = np.zeros((3, _SIZE, _SIZE), dtype=bool)
+    for home, away, half in iter_outcomes():
+        mask[_HALF_INDEX[half], home, away] = selection_wins(market, selection, home, away, half, handicap)
+    mask.setflags(write=False)
+    return mask
+
+
+def _implied(prices: Dict[str, Any]) -> Dict[str, float]:
+    return {selection: 1.0 / odds for selection, odds in prices.items() if selection != "handicap" and odds}
+
+
+def market_prior(prices: Dict[str, Dict[str, Any]]) -> np.ndarray:
+    """由一场比赛的当前赔率去水得到赛果先验：比分赔率给出全场比分分布（"其他"比分均分），
+    半全场赔率给出同一全场结果下半场结果的条件分布；缺少赔率时对应部分取均匀分布
+    """
+    feasible = _feasible()
+    scores = np.zeros((_SIZE, _SIZE))
+    for label, weight in _implied(prices.get("crs") or {}).items():
+        mask = win_mask("crs", label).any(axis=0)
+        scores[mask] += weight / mask.sum()
+    if not scores.any():
+        scores[:] = 1.0
+    hafu = _implied(prices.get("hafu") or {})
+    halves = np.ones((3, _SIZE, _SIZE))
+    if hafu:
+        for home in range(_SIZE):
+            for away in range(_SIZE):
+                full = _HAFU_LABELS[match_result(home, away)]
+                for half, index in _HALF_INDEX.items():
+                    halves[index, home, away] = hafu.get(_HAFU_LABELS[half] + full, 0.0)
+    halves = np.where(feasible, halves, 0.0)
+    total = halves.sum(axis=0)
+    # 只剩一种可能的半场结果（如 0:0）或没有半全场赔率覆盖时，在可能的半场结果间均分
+    halves = np.where(total > 0, halves / np.where(total > 0, total, 1.0), feasible / feasible.sum(axis=0))
+    grid = halves * scores
+    grid /= grid.sum()
+    return (1 - _PRIOR_FLOOR) * grid + _PRIOR_FLOOR * feasible / feasible.sum()
+
+
+def fit_marginals(
+    prior: np.ndarray,
+    masks: Sequence[np.ndarray],
+    targets: Sequence[float],
+    iterations: int = 500,
+    tol: float = 1e-9,
+) -> np.ndarray:
+    """迭代比例拟合：在先验上做最小调整，使各选项的命中概率等于 targets；概率相互矛盾时 ValueError"""
+    grid = prior.copy()
+    for _ in range(iterations):
+        worst = 0.0
+        for mask, target in zip(masks, targets):
+            hit = grid[mask].sum()
+            if not 0 < hit < 1:
+                raise ValueError("选项在所有赛果下都命中或都不命中")
+            worst = max(worst, abs(hit - target))
+            grid[mask] *= target / hit
+            grid[~mask] *= (1 - target) / (1 - hit)
+        if worst < tol:
+            return grid
+    raise ValueError("同一场比赛的概率相互矛盾（例如互斥选项的概率之和超过 1）")
+
+
+def match_atoms(grid: np.ndarray, masks: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """把一场比赛的网格按"哪些注同时命中"压缩为原子事件：(概率, (原子数, 注数) 的命中矩阵)"""
+    pattern = np.zeros(grid.shape, dtype=np.int64)
+    for bit, mask in enumerate(masks):
+        pattern |= mask.astype(np.int64) << bit
+    probs = np.bincount(pattern.ravel(), weights=grid.ravel(), minlength=1 << len(masks))
+    atoms = np.flatnonzero(probs > 1e-15)
+    wins = (atoms[:, None] >> np.arange(len(masks))) & 1
+    return probs[atoms] / probs[atoms].sum(), wins.astype(bool)
+
+
+def scenario_matrix(
+    matches: Sequence[Tuple[np.ndarray, np.ndarray, Sequence[int]]],
+    odds: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """各场比赛的原子事件 (概率, 命中矩阵, 对应的注序号) 求笛卡尔积，返回 (情景概率, (情景数, 注数) 的单位收益)"""
+    probs = np.ones(1)
+    wins = np.zeros((1, len(odds)), dtype=bool)
+    for atom_probs, atom_wins, columns in matches:
+        count = len(atom_probs)
+        probs = np.multiply.outer(probs, atom_probs).ravel()
+        wins = np.repeat(wins, count, axis=0)
+        wins[:, list(columns)] = np.tile(atom_wins, (len(wins) // count, 1))
+    return probs, np.where(wins, odds - 1.0, -1.0)
+
+
+def _project(f: np.ndarray, budget: float) -> np.ndarray:
+    """投影到 {f >= 0, Σf <= budget}"""
+    f = np.maximum(f, 0.0)
+    if f.sum() <= budget:
+        return f
+    u = np.sort(f)[::-1]
+    excess = np.cumsum(u) - budget
+    rho = np.flatnonzero(u - excess / np.arange(1, len(u) + 1) > 0)[-1]
+    return np.maximum(f - excess[rho] / (rho + 1), 0.0)
+
+
+def solve_growth(
+    probs: np.ndarray,
+    returns: np.ndarray,
+    budget: float,
+    iterations: int = 2000,
+    tol: float = 1e-10,
+) -> Tuple[np.ndarray, int]:
+    """max Σ π·log(1 + R f)，f >= 0、Σf <= budget：投影梯度上升，Barzilai-Borwein 步长加回溯，返回 (f, 迭代次数)"""
+    budget = min(budget, _MAX_BUDGET)
+
+    def objective(f: np.ndarray) -> Tuple[float, np.ndarray]:
+        wealth = 1.0 + returns @ f
+        return float(probs @ np.log(wealth)), returns.T @ (probs / wealth)
+
+    f = np.zeros(returns.shape[1])
+    value, grad = objective(f)
+    step = 1.0
+    for iteration in range(1, iterations + 1):
+        while True:
+            candidate = _project(f + step * grad, budget)
+            if np.all(returns @ candidate > -1.0):
+                candidate_value, candidate_grad = objective(candidate)
+                # 投影梯度的 Armijo 条件
+                if candidate_value >= value + 1e-4 * grad @ (candidate - f):
+                    break
+            step /= 2
+            if step < 1e-16:
+                return f, iteration
+        moved = candidate - f
+        if np.abs(moved).max() < tol:
+            return candidate, iteration
+        curvature = moved @ (grad - candidate_grad)
+        step = float(moved @ moved / curvature) if curvature > 0 else step * 2
+        f, value, grad = candidate, candidate_value, candidate_grad
+    return f, iterations
+
+
+def independent_fraction(odds: float, probability: float, fraction: float) -> float:
+    """前端 calcKellyStake 的逐注独立 Kelly 比例"""
+    b = max(odds - 1.0, 0.0)
+    if not b:
+        return 0.0
+    kelly = (probability * (b + 1) - 1) / b
+    return max(min(kelly * fraction, 1.0), 0.0)
+
+
+def optimize(
+    legs: Sequence[Leg],
+    probabilities: Sequence[float],
+    prices: Dict[str, Dict[str, Dict[str, Any]]],
+    fraction: float = 0.5,
+    max_exposure: float = 1.0,
+    max_scenarios: Optional[int] = None,
+) -> Dict[str, Any]:
+    """联合求解各注的资金比例。fraction 为 Kelly 比例（对满 Kelly 解按比例缩小），
+    max_exposure 为合计投注比例上限；返回各注比例与组合的期望对数增长、亏损概率等。
+    概率相互矛盾或情景数超过 max_scenarios 时 ValueError
+    """
+    odds = np.array([leg.odds for leg in legs], dtype=float)
+    positions: Dict[str, List[int]] = {}
+    for index, leg in enumerate(legs):
+        positions.setdefault(leg.match_id, []).append(index)
+    matches = []
+    for match_id, columns in positions.items():
+        masks = [win_mask(legs[i].market, legs[i].selection, legs[i].handicap) for i in columns]
+        try:
+            grid = fit_marginals(market_prior(prices.get(match_id, {})), masks, [probabilities[i] for i in columns])
+        except ValueError as exc:
+            raise ValueError(f"比赛 {match_id}: {exc}")
+        matches.append((*match_atoms(grid, masks), columns))
+    scenarios = int(np.prod([len(atom_probs) for atom_probs, _, _ in matches]))
+    if max_scenarios is not None and scenarios > max_scenarios:
+        raise ValueError(f"赛果情景数 {scenarios} 超过上限 {max_scenarios}，请减少同时计算的比赛或选项")
+    probs, returns = scenario_matrix(matches, odds)
+
+    full, iterations = solve_growth(probs, returns, max_exposure / fraction)
+    allocation = full * fraction
+    wealth = 1.0 + returns @ allocation
+    return {
+        "fractions": allocation,
+        "fullKelly": full,
+        "expectedGrowth": float(probs @ np.log(wealth)),
+        "expectedReturn": float(probs @ (wealth - 1.0)),
+        "lossProbability": float(probs[wealth < 1.0 - 1e-12].sum()),
+        "worstCase": float(wealth.min() - 1.0),
+        "scenarios": len(probs),
+        "iterations": iterations,
+    }
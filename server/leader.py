@@ -0,0 +1,151 @@
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+from . import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _lock_fd(fd: int) -> None:
+    """非阻塞加锁，已被占用时抛出 OSError"""
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+
+
+def _unlock_fd(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    """基于文件锁的进程间互斥锁（SQLite 部署使用）。
+
+    锁随文件描述符存在，持有进程退出或崩溃时由操作系统自动释放；
+    文件内容为持有者 pid，仅用于排查。
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._fd: Optional[int] = None
+
+    def acquire(self, timeout: float = 0) -> bool:
+        if self._fd is not None:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                _lock_fd(fd)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    os.close(fd)
+                    return False
+                time.sleep(0.05)
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode("ascii"))
+        self._fd = fd
+        return True
+
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def release(self) -> None:
+        fd, self._fd = self._fd, None
+        if fd is None:
+            return
+        try:
+            _unlock_fd(fd)
+        finally:
+            os.close(fd)
+
+
+class MySQLLock:
+    """基于 GET_LOCK 的进程间互斥锁（MySQL 部署使用）。
+
+    锁属于独立的数据库会话（不占用连接池），持有进程退出或连接断开时由 MySQL 自动释放；
+    held() 会确认会话仍然存活且仍持有锁。
+    """
+
+    def __init__(self, name: str):
+        # MySQL 锁名最长 64 个字符，且在整个实例内共享
+        self.name = name[:64]
+        self._conn = None
+
+    def _query(self, conn, sql: str, params) -> Optional[int]:
+        with conn.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        value = next(iter(row.values())) if isinstance(row, dict) else row[0]
+        return None if value is None else int(value)
+
+    def acquire(self, timeout: float = 0) -> bool:
+        if self.held():
+            return True
+        import pymysql
+
+        conn = pymysql.connect(**settings.MYSQL_CONFIG, autocommit=True)
+        try:
+            acquired = self._query(conn, "SELECT GET_LOCK(%s, %s)", (self.name, int(timeout))) == 1
+        except Exception:
+            conn.close()
+            raise
+        if not acquired:
+            conn.close()
+            return False
+        self._conn = conn
+        return True
+
+    def held(self) -> bool:
+        if self._conn is None:
+            return False
+        try:
+            self._conn.ping(reconnect=False)
+            if self._query(self._conn, "SELECT IS_USED_LOCK(%s) = CONNECTION_ID()", (self.name,)) == 1:
+                return True
+        except Exception as exc:
+            logger.warning("Lost MySQL lock %s: %s", self.name, exc)
+        self._close()
+        return False
+
+    def release(self) -> None:
+        if self._conn is None:
+            return
+        try:
+            self._query(self._conn, "SELECT RELEASE_LOCK(%s)", (self.name,))
+        except Exception:
+            pass
+        self._close()
+
+    def _close(self) -> None:
+        conn, self._conn = self._conn, None
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+def process_lock(name: str):
+    """按数据库类型创建进程间锁：SQLite 为数据库文件旁的锁文件，MySQL 为以库名区分的命名锁"""
+    if settings.DB_TYPE == "mysql":
+        return MySQLLock(f"{settings.MYSQL_CONFIG['database']}.{name}")
+    db_path = Path(settings.SQLITE_PATH)
+    return FileLock(db_path.with_name(f"{db_path.name}.{name}.lock"))
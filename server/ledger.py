@@ -0,0 +1,333 @@
+"""投注账本：与前端 betStore / statStore 相同的投注规范化、盈亏计算与统计口径，统计量随写入增量维护。
+
+每次写入（新增、下注、结算、删除未结算的记录）只更新账本汇总行、投注时间所在的日 / 周 / 月分桶与玩法分组各一行，
+读取统计只读这些汇总，耗时与投注条数无关。峰值、回撤与连红连黑按结算顺序（settle_seq）累计；
+删除已结算的记录或修改初始资金会改变之后每一步的峰值，此时按结算顺序重放该账本的全部记录（见 LedgerUpdate.replay）。
+"""
+
+import secrets
+import time
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+STATUSES = ("saved", "betting", "settled")  # 草稿 / 投注中 / 已结算
+RESULTS = ("pending", "win", "lose", "half-win", "half-lose")
+# 已结算记录可用的结果（pending 只用于草稿与投注中的记录）
+SETTLED_RESULTS = RESULTS[1:]
+# 计入投注额、分桶与玩法分组的状态（草稿只计入条数与平均赔率）
+ACTIVE_STATUSES = ("betting", "settled")
+PERIODS = ("day", "week", "month")
+
+# 账本汇总列（ledgers 表），顺序即读写顺序
+TOTAL_FIELDS = (
+    "starting_capital",
+    "bet_count",
+    "odds_sum",
+    "active_count",
+    "total_stake",
+    "betting_stake",
+    "settled_count",
+    "win_count",
+    "lose_count",
+    "total_profit",
+    "peak",
+    "max_drawdown",
+    "max_drawdown_amount",
+    "loss_streak",
+    "max_loss_streak",
+    "win_streak",
+    "max_win_streak",
+    "settle_seq",
+)
+
+# 分桶（ledger_buckets）与玩法分组（ledger_play_types）的累加列，LedgerUpdate 中的差值按此顺序排列
+COUNTER_FIELDS = ("stake", "profit", "bet_count", "settled_count", "win_count", "lose_count")
+
+BET_FIELDS = (
+    "bet_id",
+    "match_name",
+    "league",
+    "bet_type",
+    "wager_type",
+    "stake",
+    "odds",
+    "fee",
+    "platform",
+    "result",
+    "status",
+    "profit",
+    "bet_time",
+    "settle_seq",
+    "settled_at",
+    "tags",
+    "note",
+)
+
+# handicap 为让球胜平负的让球数（为空时按当前赔率中的让球数），result 为自动结算写入的选项结果 pending/win/lose
+LEG_FIELDS = (
+    "leg_index",
+    "leg_id",
+    "match_id",
+    "market",
+    "selection",
+    "handicap",
+    "result",
+    "home_team",
+    "away_team",
+    "league",
+    "match_time",
+    "bet_type",
+    "odds",
+    "stake",
+    "note",
+)
+
+
+def bet_profit(stake: float, odds: float, fee: float, result: str) -> float:
+    """已结算投注的盈亏（扣除手续费），进行中为 0"""
+    if result == "win":
+        return stake * (odds - 1) - fee
+    if result == "lose":
+        return -stake - fee
+    if result == "half-win":
+        return stake * (odds - 1) / 2 - fee
+    if result == "half-lose":
+        return -stake / 2 - fee
+    return 0.0
+
+
+@lru_cache(maxsize=4096)
+def _day_keys(text: str) -> Tuple[Tuple[str, str], ...]:
+    day = datetime.strptime(text, "%Y-%m-%d").date()
+    iso_year, iso_week, _ = day.isocalendar()
+    return (("day", day.isoformat()), ("week", f"{iso_year}-W{iso_week:02d}"), ("month", day.isoformat()[:7]))
+
+
+def period_keys(bet_time: str) -> Tuple[Tuple[str, str], ...]:
+    """投注时间所在的 (周期, 分桶)：日 YYYY-MM-DD、ISO 周 YYYY-Www、月 YYYY-MM（按日期缓存，批量结算时不重复解析）"""
+    try:
+        return _day_keys((bet_time or "").strip()[:10])
+    except ValueError:
+        raise ValueError(f"无效的投注时间: {bet_time!r}，应为 YYYY-MM-DD HH:mm")
+
+
+def _number(value: Any, default: float = 0.0) -> float:
+    try:
+        return float(value) if value not in (None, "") else default
+    except (TypeError, ValueError):
+        return default
+
+
+def normalize_bet(payload: Dict[str, Any], now: Optional[str] = None) -> Dict[str, Any]:
+    """前端格式（camelCase）的投注转换为账本记录（列名同 BET_FIELDS，legs 为 LEG_FIELDS 字典列表）。
+
+    规则与 betStore.normalizeBet 一致：没有 legs 的旧数据转为一个 leg；多个 leg 为串关，玩法记为「串关(N)」、
+    联赛记为「串关」；未传赔率时取各 leg 赔率之积；只有已结算的记录计算盈亏。
+    """
+    now = now or datetime.now().strftime("%Y-%m-%d %H:%M")
+    bet_id = str(payload.get("id") or f"{int(time.time() * 1000)}-{secrets.token_hex(3)[:5]}")
+    status = payload.get("status") or "saved"
+    result = payload.get("result") or "pending"
+    if status not in STATUSES:
+        raise ValueError(f"不支持的状态: {status}")
+    if result not in RESULTS:
+        raise ValueError(f"不支持的结果: {result}")
+    if status == "settled" and result not in SETTLED_RESULTS:
+        raise ValueError("已结算的记录需要结果 win/lose/half-win/half-lose")
+    bet_time = payload.get("betTime") or now
+    period_keys(bet_time)
+
+    raw_legs = payload.get("legs") or [{
+        "homeTeam": payload.get("homeTeam") or payload.get("matchName") or "",
+        "awayTeam": payload.get("awayTeam") or "",
+        "odds": payload.get("odds"),
+        "stake": payload.get("stake"),
+        "note": payload.get("note") or "",
+    }]
+    legs = []
+    for index, leg in enumerate(raw_legs):
+        legs.append({
+            "leg_index": index,
+            "leg_id": str(leg.get("id") or f"{bet_id}-leg-{index}"),
+            "match_id": leg.get("matchId"),
+            "market": leg.get("market"),
+            "selection": leg.get("selection") or "",
+            "handicap": _number(leg.get("handicap")) if leg.get("handicap") not in (None, "") else None,
+            "result": "pending",
+            "home_team": leg.get("homeTeam") or "",
+            "away_team": leg.get("awayTeam") or "",
+            "league": leg.get("league") or payload.get("league") or "",
+            "match_time": leg.get("matchTime") or bet_time,
+            "bet_type": leg.get("betType") or payload.get("betType") or "胜平负",
+            "odds": _number(leg.get("odds"), 1.0) or 1.0,
+            "stake": _number(leg.get("stake")),
+            "note": leg.get("note") or "",
+        })
+
+    odds_from_legs = 1.0
+    for leg in legs:
+        odds_from_legs *= leg["odds"]
+    stake = _number(payload.get("stake"))
+    fee = _number(payload.get("fee"))
+    odds = _number(payload.get("odds")) or odds_from_legs or 1.0
+    if stake < 0 or fee < 0:
+        raise ValueError("投注金额与手续费不能为负数")
+    wager_type = payload.get("wagerType") or ("parlay" if len(legs) > 1 else "single")
+    if len(legs) == 1:
+        leg = legs[0]
+        bet_type = leg["bet_type"] if wager_type != "parlay" else "串关(1)"
+        league = leg["league"]
+        if leg["home_team"] and leg["away_team"]:
+            match_name = f"{leg['home_team']} vs {leg['away_team']}"
+        else:
+            match_name = leg["home_team"] or leg["away_team"] or payload.get("matchName") or "未命名比赛"
+    else:
+        bet_type = f"串关({len(legs)})"
+        league = "串关"
+        first = legs[0]
+        match_name = f"{first['home_team'] or first['away_team'] or first['league'] or '多场串关'} 等{len(legs)}场"
+
+    return {
+        "bet_id": bet_id,
+        "match_name": match_name,
+        "league": league,
+        "bet_type": bet_type,
+        "wager_type": wager_type,
+        "stake": stake,
+        "odds": odds,
+        "fee": fee,
+        "platform": payload.get("platform") or "",
+        "result": result,
+        "status": status,
+        "profit": bet_profit(stake, odds, fee, result) if status == "settled" else 0.0,
+        "bet_time": bet_time,
+        "settle_seq": None,
+        "settled_at": None,
+        "tags": list(payload.get("tags") or []),
+        "note": payload.get("note") or "",
+        "legs": legs,
+    }
+
+
+class LedgerTotals:
+    """账本汇总（ledgers 表一行）。回撤为相对峰值的比例（负数），峰值从初始资金开始"""
+
+    __slots__ = TOTAL_FIELDS
+
+    def __init__(self, starting_capital: float, **values: Any):
+        for name in TOTAL_FIELDS:
+            setattr(self, name, values.get(name) or 0)
+        self.starting_capital = float(starting_capital)
+        if not values.get("peak"):
+            self.peak = self.starting_capital
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "LedgerTotals":
+        return cls(**{name: row.get(name) for name in TOTAL_FIELDS})
+
+    def as_row(self) -> Tuple:
+        return tuple(getattr(self, name) for name in TOTAL_FIELDS)
+
+    @property
+    def equity(self) -> float:
+        return self.starting_capital + self.total_profit
+
+    @property
+    def bankroll(self) -> float:
+        """可用余额 = 初始资金 + 已结算盈亏 - 投注中金额"""
+        return self.equity - self.betting_stake
+
+
+class LedgerUpdate:
+    """一次写事务内的增量：汇总直接修改，分桶与玩法分组累计为差值，由仓储层以加法 upsert 写回"""
+
+    def __init__(self, totals: LedgerTotals):
+        self.totals = totals
+        self.buckets: Dict[Tuple[str, str], List[float]] = {}
+        self.plays: Dict[str, List[float]] = {}
+
+    def _bump(self, bet: Dict[str, Any], values: Tuple[float, ...]) -> None:
+        targets = [self.buckets.setdefault(key, [0.0] * len(COUNTER_FIELDS)) for key in period_keys(bet["bet_time"])]
+        targets.append(self.plays.setdefault(bet["bet_type"] or "其他", [0.0] * len(COUNTER_FIELDS)))
+        for counters in targets:
+            for index, value in enumerate(values):
+                counters[index] += value
+
+    def add(self, bet: Dict[str, Any], settled_at: Optional[str] = None) -> None:
+        """新增一条记录；已结算的记录同时按结算处理（按调用顺序分配结算序号）"""
+        totals = self.totals
+        totals.bet_count += 1
+        totals.odds_sum += bet["odds"]
+        if bet["status"] in ACTIVE_STATUSES:
+            self._place(bet)
+        if bet["status"] == "settled":
+            self._settle(bet, settled_at or bet.get("settled_at") or bet["bet_time"])
+
+    def place(self, bet: Dict[str, Any]) -> None:
+        """草稿转为投注中"""
+        bet["status"] = "betting"
+        self._place(bet)
+
+    def settle(self, bet: Dict[str, Any], result: str, settled_at: str) -> None:
+        """投注中的记录结算"""
+        bet["status"] = "settled"
+        bet["result"] = result
+        bet["profit"] = bet_profit(bet["stake"], bet["odds"], bet["fee"], result)
+        self._settle(bet, settled_at)
+
+    def remove(self, bet: Dict[str, Any]) -> None:
+        """删除草稿或投注中的记录（已结算的记录需要重放，见 replay）"""
+        totals = self.totals
+        totals.bet_count -= 1
+        totals.odds_sum -= bet["odds"]
+        if bet["status"] == "betting":
+            totals.active_count -= 1
+            totals.total_stake -= bet["stake"]
+            totals.betting_stake -= bet["stake"]
+            self._bump(bet, (-bet["stake"], 0, -1, 0, 0, 0))
+
+    def _place(self, bet: Dict[str, Any]) -> None:
+        totals = self.totals
+        totals.active_count += 1
+        totals.total_stake += bet["stake"]
+        totals.betting_stake += bet["stake"]
+        self._bump(bet, (bet["stake"], 0, 1, 0, 0, 0))
+
+    def _settle(self, bet: Dict[str, Any], settled_at: str) -> None:
+        totals = self.totals
+        # 重放时沿用原有的结算序号
+        if not bet.get("settle_seq"):
+            bet["settle_seq"] = totals.settle_seq + 1
+        totals.settle_seq = max(totals.settle_seq, bet["settle_seq"])
+        bet["settled_at"] = settled_at
+        profit, result = bet["profit"], bet["result"]
+        totals.betting_stake -= bet["stake"]
+        totals.settled_count += 1
+        totals.total_profit += profit
+        # 连红连黑只看全赢 / 全输，赢半、输半与走盘不中断也不累加
+        if result == "win":
+            totals.win_count += 1
+            totals.win_streak += 1
+            totals.loss_streak = 0
+            totals.max_win_streak = max(totals.max_win_streak, totals.win_streak)
+        elif result == "lose":
+            totals.lose_count += 1
+            totals.loss_streak += 1
+            totals.win_streak = 0
+            totals.max_loss_streak = max(totals.max_loss_streak, totals.loss_streak)
+        equity = totals.equity
+        if equity > totals.peak:
+            totals.peak = equity
+        drawdown = (equity - totals.peak) / totals.peak if totals.peak else 0.0
+        totals.max_drawdown = min(totals.max_drawdown, drawdown)
+        totals.max_drawdown_amount = max(totals.max_drawdown_amount, totals.peak - equity)
+        self._bump(bet, (0, profit, 0, 1, 1 if result == "win" else 0, 1 if result == "lose" else 0))
+
+    @classmethod
+    def replay(cls, starting_capital: float, bets: Iterable[Dict[str, Any]]) -> "LedgerUpdate":
+        """从空账本按给定顺序（已结算记录须按结算序号排列）重放全部记录"""
+        update = cls(LedgerTotals(starting_capital))
+        for bet in bets:
+            update.add(bet, bet.get("settled_at"))
+        return update
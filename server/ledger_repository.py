@@ -0,0 +1,358 @@
+"""投注账本的持久化：记录与选项的读写、账本汇总 / 分桶 / 玩法分组的增量维护与全量重放，以及自动结算的读写。
+
+统计口径在 ledger.py；这里负责在一个事务内写入记录并按 LedgerUpdate 的差值更新汇总行、分桶与玩法分组。
+"""
+
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from . import settings
+from .database import get_db, iter_query
+from .ledger import BET_FIELDS, COUNTER_FIELDS, LEG_FIELDS, SETTLED_RESULTS, TOTAL_FIELDS, LedgerTotals, LedgerUpdate
+from .metrics import timed_query
+from .repository import _chunks, _execute, _executemany, _get_placeholder
+
+
+def _counter_upsert_sql(table: str, keys: Sequence[str]) -> str:
+    """账本分桶 / 玩法分组的加法 upsert：已有行在原值上累加差值"""
+    ph = _get_placeholder()
+    columns = (*keys, *COUNTER_FIELDS)
+    head = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join([ph] * len(columns))})"
+    if settings.DB_TYPE == "mysql":
+        return head + " ON DUPLICATE KEY UPDATE " + ", ".join(f"{f} = {f} + VALUES({f})" for f in COUNTER_FIELDS)
+    return head + f" ON CONFLICT({', '.join(keys)}) DO UPDATE SET " + ", ".join(f"{f} = {f} + excluded.{f}" for f in COUNTER_FIELDS)
+
+
+def _lock_ledger(conn, ledger_id: str, create: bool) -> Optional[LedgerTotals]:
+    """读取账本汇总前先写该行：SQLite 取得写锁、MySQL 锁住该行，同一账本的读-改-写串行，不会丢失更新。
+    create 为 True 时按 LEDGER_DEFAULT_CAPITAL 创建不存在的账本，否则返回 None
+    """
+    ph = _get_placeholder()
+    now = datetime.utcnow().isoformat()
+    if create:
+        verb = "INSERT IGNORE INTO" if settings.DB_TYPE == "mysql" else "INSERT OR IGNORE INTO"
+        _execute(
+            conn,
+            f"{verb} ledgers (ledger_id, starting_capital, peak, created_at, updated_at) VALUES ({ph}, {ph}, {ph}, {ph}, {ph})",
+            (ledger_id, settings.LEDGER_DEFAULT_CAPITAL, settings.LEDGER_DEFAULT_CAPITAL, now, now),
+        )
+    _execute(conn, f"UPDATE ledgers SET updated_at = {ph} WHERE ledger_id = {ph}", (now, ledger_id))
+    row = _execute(conn, f"SELECT {', '.join(TOTAL_FIELDS)} FROM ledgers WHERE ledger_id = {ph}", (ledger_id,)).fetchone()
+    if not row:
+        return None
+    return LedgerTotals.from_row({name: row[name] for name in TOTAL_FIELDS})
+
+
+def _write_ledger(conn, ledger_id: str, update: LedgerUpdate) -> None:
+    """写回账本汇总，分桶与玩法分组按差值累加"""
+    ph = _get_placeholder()
+    assignments = ", ".join(f"{name} = {ph}" for name in TOTAL_FIELDS)
+    _execute(conn, f"UPDATE ledgers SET {assignments} WHERE ledger_id = {ph}", (*update.totals.as_row(), ledger_id))
+    if update.buckets:
+        _executemany(
+            conn,
+            _counter_upsert_sql("ledger_buckets", ("ledger_id", "period", "bucket")),
+            [(ledger_id, period, bucket, *values) for (period, bucket), values in update.buckets.items()],
+        )
+    if update.plays:
+        _executemany(
+            conn,
+            _counter_upsert_sql("ledger_play_types", ("ledger_id", "bet_type")),
+            [(ledger_id, bet_type, *values) for bet_type, values in update.plays.items()],
+        )
+
+
+def _insert_bets(conn, ledger_id: str, bets: Sequence[Dict[str, Any]]) -> None:
+    ph = _get_placeholder()
+    bet_columns = ("ledger_id", *BET_FIELDS)
+    _executemany(
+        conn,
+        f"INSERT INTO ledger_bets ({', '.join(bet_columns)}) VALUES ({', '.join([ph] * len(bet_columns))})",
+        [
+            (ledger_id, *(json.dumps(bet["tags"], ensure_ascii=False) if name == "tags" else bet[name] for name in BET_FIELDS))
+            for bet in bets
+        ],
+    )
+    leg_columns = ("ledger_id", "bet_id", *LEG_FIELDS)
+    _executemany(
+        conn,
+        f"INSERT INTO ledger_bet_legs ({', '.join(leg_columns)}) VALUES ({', '.join([ph] * len(leg_columns))})",
+        [(ledger_id, bet["bet_id"], *(leg[name] for name in LEG_FIELDS)) for bet in bets for leg in bet["legs"]],
+    )
+
+
+def _update_bet_state(conn, ledger_id: str, bet: Dict[str, Any]) -> None:
+    _update_bet_states(conn, ledger_id, [bet])
+
+
+def _update_bet_states(conn, ledger_id: str, bets: Sequence[Dict[str, Any]]) -> None:
+    ph = _get_placeholder()
+    _executemany(
+        conn,
+        f"UPDATE ledger_bets SET status = {ph}, result = {ph}, profit = {ph}, settle_seq = {ph}, settled_at = {ph} "
+        f"WHERE ledger_id = {ph} AND bet_id = {ph}",
+        [
+            (bet["status"], bet["result"], bet["profit"], bet["settle_seq"], bet["settled_at"], ledger_id, bet["bet_id"])
+            for bet in bets
+        ],
+    )
+
+
+def _fetch_bets(conn, ledger_id: str, bet_ids: Sequence[str], with_legs: bool = True) -> List[Dict[str, Any]]:
+    """按 bet_ids 顺序返回投注记录（with_legs 时含 legs），不存在的记录不出现在结果中"""
+    ph = _get_placeholder()
+    bets: Dict[str, Dict[str, Any]] = {}
+    for chunk in _chunks(list(bet_ids)):
+        placeholders = ",".join([ph] * len(chunk))
+        sql = f"SELECT {', '.join(BET_FIELDS)} FROM ledger_bets WHERE ledger_id = {ph} AND bet_id IN ({placeholders})"
+        for row in iter_query(conn, sql, (ledger_id, *chunk)):
+            bet = dict(zip(BET_FIELDS, row))
+            bet["tags"] = json.loads(bet["tags"]) if bet["tags"] else []
+            bet["legs"] = []
+            bets[bet["bet_id"]] = bet
+        if not with_legs:
+            continue
+        sql = (
+            f"SELECT bet_id, {', '.join(LEG_FIELDS)} FROM ledger_bet_legs "
+            f"WHERE ledger_id = {ph} AND bet_id IN ({placeholders}) ORDER BY bet_id, leg_index"
+        )
+        for row in iter_query(conn, sql, (ledger_id, *chunk)):
+            bets[row[0]]["legs"].append(dict(zip(LEG_FIELDS, row[1:])))
+    return [bets[bet_id] for bet_id in bet_ids if bet_id in bets]
+
+
+def _replay_ledger(conn, ledger_id: str, starting_capital: float) -> LedgerUpdate:
+    """按结算顺序重放账本的全部记录，重写汇总、分桶与玩法分组"""
+    ph = _get_placeholder()
+    fields = ("bet_id", "bet_type", "stake", "odds", "fee", "result", "status", "profit", "bet_time", "settle_seq", "settled_at")
+    sql = (
+        f"SELECT {', '.join(fields)} FROM ledger_bets WHERE ledger_id = {ph} "
+        "ORDER BY settle_seq IS NULL, settle_seq, bet_time, bet_id"
+    )
+    update = LedgerUpdate.replay(starting_capital, (dict(zip(fields, row)) for row in iter_query(conn, sql, (ledger_id,))))
+    for table in ("ledger_buckets", "ledger_play_types"):
+        _execute(conn, f"DELETE FROM {table} WHERE ledger_id = {ph}", (ledger_id,))
+    _write_ledger(conn, ledger_id, update)
+    return update
+
+
+class LedgerRepository:
+    @timed_query
+    def get_ledger_stats(self, ledger_id: str, period: str) -> Optional[Dict[str, Any]]:
+        """账本统计：汇总行、指定周期的分桶、按日分桶（收益曲线）与玩法分组，读取量只与分桶数有关；账本不存在时为 None"""
+        ph = _get_placeholder()
+        counters = ", ".join(COUNTER_FIELDS)
+        with get_db() as conn:
+            row = _execute(
+                conn,
+                f"SELECT {', '.join(TOTAL_FIELDS)}, created_at, updated_at FROM ledgers WHERE ledger_id = {ph}",
+                (ledger_id,),
+            ).fetchone()
+            if not row:
+                return None
+            totals = {name: row[name] for name in (*TOTAL_FIELDS, "created_at", "updated_at")}
+            buckets: Dict[str, List[Dict[str, Any]]] = {}
+            periods = ("day",) if period == "day" else ("day", period)
+            sql = (
+                f"SELECT period, bucket, {counters} FROM ledger_buckets "
+                f"WHERE ledger_id = {ph} AND period IN ({', '.join([ph] * len(periods))}) AND bet_count > 0 "
+                "ORDER BY period, bucket"
+            )
+            for name, bucket, *values in iter_query(conn, sql, (ledger_id, *periods)):
+                buckets.setdefault(name, []).append({"bucket": bucket, **dict(zip(COUNTER_FIELDS, values))})
+            sql = (
+                f"SELECT bet_type, {counters} FROM ledger_play_types "
+                f"WHERE ledger_id = {ph} AND bet_count > 0 ORDER BY bet_type"
+            )
+            plays = [{"bet_type": bet_type, **dict(zip(COUNTER_FIELDS, values))} for bet_type, *values in iter_query(conn, sql, (ledger_id,))]
+        return {"totals": totals, "days": buckets.get("day", []), "periods": buckets.get(period, []), "plays": plays}
+
+    @timed_query
+    def set_starting_capital(self, ledger_id: str, starting_capital: float) -> None:
+        """设置初始资金（账本不存在时创建）；金额变化时峰值与回撤需要重放全部记录"""
+        with get_db() as conn:
+            totals = _lock_ledger(conn, ledger_id, create=True)
+            if totals.starting_capital != starting_capital:
+                _replay_ledger(conn, ledger_id, starting_capital)
+
+    @timed_query
+    def add_bets(self, ledger_id: str, bets: Sequence[Dict[str, Any]], *, check_balance: bool = True) -> Dict[str, List[str]]:
+        """按顺序写入 normalize_bet 规范化后的记录并增量更新统计，已存在的 bet_id 跳过。
+        每 LEDGER_IMPORT_BATCH_SIZE 条一个事务；check_balance 时投注中的记录金额超过可用余额则拒绝（ValueError），
+        不写入这一批。返回 {"added": [...], "skipped": [...]}
+        """
+        ph = _get_placeholder()
+        added: List[str] = []
+        skipped: List[str] = []
+        for batch in _chunks(list(bets), settings.LEDGER_IMPORT_BATCH_SIZE):
+            with get_db() as conn:
+                update = LedgerUpdate(_lock_ledger(conn, ledger_id, create=True))
+                seen = set()
+                for ids in _chunks([bet["bet_id"] for bet in batch]):
+                    placeholders = ",".join([ph] * len(ids))
+                    sql = f"SELECT bet_id FROM ledger_bets WHERE ledger_id = {ph} AND bet_id IN ({placeholders})"
+                    seen.update(row[0] for row in iter_query(conn, sql, (ledger_id, *ids)))
+                fresh = []
+                for bet in batch:
+                    if bet["bet_id"] in seen:
+                        skipped.append(bet["bet_id"])
+                        continue
+                    if check_balance and bet["status"] == "betting" and update.totals.bankroll < bet["stake"]:
+                        raise ValueError("账户余额不足")
+                    seen.add(bet["bet_id"])
+                    update.add(bet)
+                    fresh.append(bet)
+                if fresh:
+                    _insert_bets(conn, ledger_id, fresh)
+                    _write_ledger(conn, ledger_id, update)
+            added.extend(bet["bet_id"] for bet in fresh)
+        return {"added": added, "skipped": skipped}
+
+    @timed_query
+    def place_bet(self, ledger_id: str, bet_id: str) -> Optional[Dict[str, Any]]:
+        """草稿转为投注中（金额超过可用余额时 ValueError），返回更新后的记录；记录不存在时为 None"""
+        with get_db() as conn:
+            totals = _lock_ledger(conn, ledger_id, create=False)
+            bets = _fetch_bets(conn, ledger_id, [bet_id]) if totals else []
+            if not bets:
+                return None
+            bet = bets[0]
+            if bet["status"] != "saved":
+                raise ValueError("只能下注草稿记录")
+            if totals.bankroll < bet["stake"]:
+                raise ValueError("账户余额不足")
+            update = LedgerUpdate(totals)
+            update.place(bet)
+            _update_bet_state(conn, ledger_id, bet)
+            _write_ledger(conn, ledger_id, update)
+        return bet
+
+    @timed_query
+    def settle_bet(self, ledger_id: str, bet_id: str, result: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """结算投注中的记录（result 为空时沿用记录上的结果），返回更新后的记录；记录不存在时为 None"""
+        with get_db() as conn:
+            totals = _lock_ledger(conn, ledger_id, create=False)
+            bets = _fetch_bets(conn, ledger_id, [bet_id]) if totals else []
+            if not bets:
+                return None
+            bet = bets[0]
+            if bet["status"] != "betting":
+                raise ValueError("只能结算投注中的记录")
+            result = result or bet["result"]
+            if result not in SETTLED_RESULTS:
+                raise ValueError("请指定结算结果 win/lose/half-win/half-lose")
+            update = LedgerUpdate(totals)
+            update.settle(bet, result, datetime.now().strftime("%Y-%m-%d %H:%M"))
+            _update_bet_state(conn, ledger_id, bet)
+            _write_ledger(conn, ledger_id, update)
+        return bet
+
+    @timed_query
+    def delete_bet(self, ledger_id: str, bet_id: str) -> bool:
+        """删除记录；已结算的记录删除后按结算顺序重放整个账本"""
+        ph = _get_placeholder()
+        with get_db() as conn:
+            totals = _lock_ledger(conn, ledger_id, create=False)
+            bets = _fetch_bets(conn, ledger_id, [bet_id]) if totals else []
+            if not bets:
+                return False
+            bet = bets[0]
+            for table in ("ledger_bet_legs", "ledger_bets"):
+                _execute(conn, f"DELETE FROM {table} WHERE ledger_id = {ph} AND bet_id = {ph}", (ledger_id, bet_id))
+            if bet["status"] == "settled":
+                _replay_ledger(conn, ledger_id, totals.starting_capital)
+            else:
+                update = LedgerUpdate(totals)
+                update.remove(bet)
+                _write_ledger(conn, ledger_id, update)
+        return True
+
+    @timed_query
+    def rebuild_ledger(self, ledger_id: str) -> bool:
+        """从投注记录重新计算账本的全部统计（校验增量结果或修复数据用）；账本不存在时为 False"""
+        with get_db() as conn:
+            totals = _lock_ledger(conn, ledger_id, create=False)
+            if totals is None:
+                return False
+            _replay_ledger(conn, ledger_id, totals.starting_capital)
+        return True
+
+    @timed_query
+    def list_bets(
+        self,
+        ledger_id: str,
+        *,
+        status: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 20,
+    ) -> Dict[str, Any]:
+        """账本中的投注记录，按投注时间倒序（与前端列表一致）：{"items": [...], "total"}"""
+        ph = _get_placeholder()
+        where, params = f"WHERE ledger_id = {ph}", [ledger_id]
+        if status:
+            where += f" AND status = {ph}"
+            params.append(status)
+        with get_db() as conn:
+            ids = [
+                row[0]
+                for row in iter_query(
+                    conn,
+                    f"SELECT bet_id FROM ledger_bets {where} ORDER BY bet_time DESC, bet_id DESC LIMIT {ph} OFFSET {ph}",
+                    (*params, page_size, (page - 1) * page_size),
+                )
+            ]
+            total = next(iter_query(conn, f"SELECT COUNT(*) FROM ledger_bets {where}", params))[0]
+            items = _fetch_bets(conn, ledger_id, ids)
+        return {"items": items, "total": int(total)}
+
+    # 自动结算 ---------------------------------------------------------------
+    @timed_query
+    def list_open_legs(self) -> List[Tuple]:
+        """全部投注中记录的待定选项及其比赛结果，一次查询：
+        (ledger_id, bet_id, leg_index, market, selection, handicap, home_score, away_score, half_home_score, half_away_score, status)。
+        比赛没有结果时比分与 status 为空；选项没有记录让球数时取该场的让球胜平负让球数
+        """
+        sql = (
+            "SELECT l.ledger_id, l.bet_id, l.leg_index, l.market, l.selection, COALESCE(l.handicap, w.handicap), "
+            "r.home_score, r.away_score, r.half_home_score, r.half_away_score, r.status "
+            "FROM ledger_bets b "
+            "JOIN ledger_bet_legs l ON l.ledger_id = b.ledger_id AND l.bet_id = b.bet_id "
+            "LEFT JOIN match_results r ON r.match_id = l.match_id "
+            "LEFT JOIN odds_win_draw_lose w ON w.match_id = l.match_id AND w.odds_type = 'hhad' "
+            "WHERE b.status = 'betting' AND l.result = 'pending'"
+        )
+        with get_db() as conn:
+            return list(iter_query(conn, sql))
+
+    @timed_query
+    def apply_settlement(
+        self,
+        ledger_id: str,
+        legs: Sequence[Tuple[str, str, int]],
+        outcomes: Dict[str, str],
+        settled_at: str,
+    ) -> int:
+        """单个账本的自动结算，一个事务：写回选项结果 (result, bet_id, leg_index)，
+        按投注时间顺序结算 outcomes {bet_id: result} 中仍为投注中的记录并增量更新统计，返回结算的条数
+        """
+        ph = _get_placeholder()
+        with get_db() as conn:
+            totals = _lock_ledger(conn, ledger_id, create=False)
+            if totals is None:
+                return 0
+            _executemany(
+                conn,
+                f"UPDATE ledger_bet_legs SET result = {ph} WHERE ledger_id = {ph} AND bet_id = {ph} AND leg_index = {ph}",
+                [(result, ledger_id, bet_id, leg_index) for result, bet_id, leg_index in legs],
+            )
+            # 读取开放选项之后可能已被手动结算或删除
+            bets = [bet for bet in _fetch_bets(conn, ledger_id, list(outcomes), with_legs=False) if bet["status"] == "betting"]
+            bets.sort(key=lambda bet: (bet["bet_time"], bet["bet_id"]))
+            update = LedgerUpdate(totals)
+            for bet in bets:
+                update.settle(bet, outcomes[bet["bet_id"]], settled_at)
+            if bets:
+                _update_bet_states(conn, ledger_id, bets)
+                _write_ledger(conn, ledger_id, update)
+        return len(bets)
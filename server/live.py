@@ -0,0 +1,154 @@
+import asyncio
+import json
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from . import settings
+from .history import MARKET_SELECTIONS
+
+logger = logging.getLogger(__name__)
+
+
+def sse_frame(event: str, data: Any) -> str:
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+HEARTBEAT_FRAME = ": ping\n\n"
+RESYNC_FRAME = sse_frame("resync", {"reason": "slow_consumer"})
+
+
+class Subscriber:
+    """一个推送连接。队列元素为一次发布的全部帧，积压超过上限时丢弃积压内容，只保留一条 resync 通知"""
+
+    __slots__ = ("queue", "match_ids", "leagues", "overflows")
+
+    def __init__(self, match_ids: Set[str], leagues: Set[str], queue_size: int):
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=queue_size)
+        self.match_ids = match_ids
+        self.leagues = leagues
+        self.overflows = 0
+
+    def offer(self, frame: str) -> None:
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            # 客户端已落后，增量失去意义：清空积压，通知其重新拉取全量数据
+            self.overflows += 1
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_FRAME)
+
+
+class LiveHub:
+    """赔率变化的实时推送中心。
+
+    同步线程调用 publish_changes，事件只序列化一次，再切回事件循环按订阅索引
+    （比赛 ID、联赛、全部）分发到各连接的有界队列，空闲连接不占用额外资源。
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._all: Set[Subscriber] = set()
+        self._by_match: Dict[str, Set[Subscriber]] = {}
+        self._by_league: Dict[str, Set[Subscriber]] = {}
+        self._count = 0
+        self._lock = threading.Lock()
+        self.published = 0
+
+    # 以下方法在事件循环线程中调用 ---------------------------------------
+    def subscribe(self, match_ids: Iterable[str] = (), leagues: Iterable[str] = ()) -> Subscriber:
+        self._loop = asyncio.get_running_loop()
+        subscriber = Subscriber(set(match_ids), set(leagues), self.queue_size)
+        if not subscriber.match_ids and not subscriber.leagues:
+            self._all.add(subscriber)
+        for match_id in subscriber.match_ids:
+            self._by_match.setdefault(match_id, set()).add(subscriber)
+        for league in subscriber.leagues:
+            self._by_league.setdefault(league, set()).add(subscriber)
+        with self._lock:
+            self._count += 1
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self._all.discard(subscriber)
+        for index, keys in ((self._by_match, subscriber.match_ids), (self._by_league, subscriber.leagues)):
+            for key in keys:
+                subscribers = index.get(key)
+                if subscribers is not None:
+                    subscribers.discard(subscriber)
+                    if not subscribers:
+                        del index[key]
+        with self._lock:
+            self._count -= 1
+
+    def _fanout(self, events: List[Tuple[str, Optional[str], str]]) -> None:
+        # 同一次发布中发给同一连接的帧拼接为一个队列元素，队列上限因此对应积压的同步次数
+        frames: Dict[Subscriber, List[str]] = {}
+        for match_id, league, frame in events:
+            targets = set(self._all)
+            if match_id is not None:
+                targets.update(self._by_match.get(match_id, ()))
+            if league is not None:
+                targets.update(self._by_league.get(league, ()))
+            if match_id is None:
+                targets.update(*self._by_match.values(), *self._by_league.values())
+            for subscriber in targets:
+                frames.setdefault(subscriber, []).append(frame)
+        for subscriber, chunk in frames.items():
+            subscriber.offer("".join(chunk))
+
+    # 以下方法可在任意线程调用 -------------------------------------------
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return self._count
+
+    def publish(self, events: List[Tuple[str, Optional[str], str]]) -> None:
+        """events 为 (match_id, league, 已序列化的 SSE 帧)；match_id 为 None 表示广播给所有连接"""
+        loop = self._loop
+        if not events or loop is None or loop.is_closed() or not self.subscriber_count:
+            return
+        self.published += len(events)
+        loop.call_soon_threadsafe(self._fanout, events)
+
+    def publish_changes(
+        self,
+        price_changes: List[Tuple[str, str, int, str]],
+        leagues: Dict[str, Optional[str]],
+        summary: Dict[str, Any],
+    ) -> None:
+        """把一次同步的价格变化按比赛合并为紧凑的 odds 事件，并附带一条 sync 汇总事件"""
+        by_match: Dict[str, Dict[str, Any]] = {}
+        for match_id, market, ts, prices in price_changes:
+            item = by_match.setdefault(match_id, {"matchId": match_id, "ts": ts, "markets": {}})
+            item["markets"][market] = json.loads(prices)
+        events = [
+            (match_id, leagues.get(match_id), sse_frame("odds", dict(item, league=leagues.get(match_id))))
+            for match_id, item in by_match.items()
+        ]
+        events.append((None, None, sse_frame("sync", summary)))
+        self.publish(events)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"subscribers": self.subscriber_count, "published": self.published}
+
+
+live_hub = LiveHub(settings.LIVE_QUEUE_SIZE)
+
+
+async def event_stream(match_ids: Iterable[str] = (), leagues: Iterable[str] = ()):
+    """单个 SSE 连接的输出：先发送各玩法的选项顺序，之后转发队列中的事件并定时发送心跳"""
+    subscriber = live_hub.subscribe(match_ids, leagues)
+    try:
+        yield sse_frame("hello", {"selections": {market: list(keys) for market, keys in MARKET_SELECTIONS.items()}})
+        while True:
+            try:
+                frame = await asyncio.wait_for(subscriber.queue.get(), timeout=settings.LIVE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                frame = HEARTBEAT_FRAME
+            yield frame
+    finally:
+        live_hub.unsubscribe(subscriber)
@@ -1,12 +1,41 @@
+import itertools
+import logging
+import time
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Path, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
 
-from .database import init_db
+from . import settings
+from .archive import archive_store, record_plays
+from .cache import read_cache, snapshot_cache
+from .database import close_pool, init_db, pool_stats, schema_version
+from .history import MARKET_SELECTIONS, downsample, format_series
+from .ledger import PERIODS, SETTLED_RESULTS, STATUSES, normalize_bet
+from .ledger_repository import LedgerRepository
+from .live import event_stream, live_hub
+from .metrics import CONTENT_TYPE, MetricsMiddleware, registry
+from .parlay import UNIT_STAKE, Leg, evaluate, group_by_match, iter_tickets, resolve_sizes, ticket_odds
 from .repository import OddsRepository
-from .tasks import get_sync_status, run_sync_job, shutdown_scheduler, start_scheduler
+from .slate import slate_store
+from .snapshots import dumps, get_snapshot, snapshot_response
+from .tasks import (
+    get_sync_status,
+    leader_status,
+    readiness,
+    results_status,
+    retention_status,
+    run_results_job,
+    run_sync_job,
+    shutdown_scheduler,
+    start_scheduler,
+    sync_schedule,
+)
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Football Match Odds API", version="1.0.0")
 app.add_middleware(
@@ -16,8 +45,99 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# 实时推送为长连接，耗时没有意义
+app.add_middleware(MetricsMiddleware, excluded=("/api/live", "/metrics"))
 
 repo = OddsRepository()
+ledger_repo = LedgerRepository()
+
+# 冷启动各阶段耗时（秒），见 /api/ready
+startup_timings: Dict[str, float] = {}
+
+
+class ParlayLeg(BaseModel):
+    matchId: str
+    market: str = Field(description="玩法：had/hhad/crs/ttg/hafu")
+    selection: str = Field(description="选项，与 /plays 返回的字段一致，如 win、1:0、7+、胜平")
+
+
+class ParlayRequest(BaseModel):
+    legs: List[ParlayLeg]
+    parlayType: str = Field(description="过关方式，如 2_1、4_11、6串57；N_1 且 N 小于比赛数时为自由过关")
+    multiple: int = Field(default=1, ge=1, le=99)
+    ticketLimit: int = Field(default=0, ge=0, description="返回的明细注数，0 表示只返回汇总")
+
+
+class KellyBet(BaseModel):
+    matchId: str
+    market: str = Field(description="玩法：had/hhad/crs/ttg/hafu")
+    selection: str = Field(description="选项，与 /plays 返回的字段一致")
+    probability: float = Field(gt=0, lt=1, description="对该选项命中概率的估计")
+
+
+class KellyRequest(BaseModel):
+    bets: List[KellyBet]
+    bankroll: float = Field(gt=0, description="可用资金")
+    fraction: float = Field(default=0.5, gt=0, le=1, description="Kelly 比例，与前端 calcKellyStake 的 adjustment 相同")
+    maxExposure: float = Field(default=1.0, gt=0, le=1, description="合计投注金额占资金的上限")
+
+
+class PlaysBatchRequest(BaseModel):
+    matchIds: List[str] = Field(description="比赛 ID 列表，按此顺序返回")
+
+
+class BetLeg(BaseModel):
+    id: Optional[str] = None
+    matchId: Optional[str] = Field(default=None, description="比赛 ID，选填")
+    market: Optional[str] = Field(default=None, description="玩法：had/hhad/crs/ttg/hafu，选填")
+    selection: Optional[str] = None
+    handicap: Optional[float] = Field(default=None, description="让球胜平负的让球数，为空时自动结算按该场当前让球数")
+    homeTeam: Optional[str] = None
+    awayTeam: Optional[str] = None
+    league: Optional[str] = None
+    matchTime: Optional[str] = None
+    betType: Optional[str] = None
+    odds: Optional[float] = None
+    stake: Optional[float] = None
+    note: Optional[str] = None
+
+
+class Bet(BaseModel):
+    """与前端 betStore 的投注记录格式一致，profit 由服务端按结果计算"""
+
+    id: Optional[str] = None
+    matchName: Optional[str] = None
+    homeTeam: Optional[str] = None
+    awayTeam: Optional[str] = None
+    league: Optional[str] = None
+    betType: Optional[str] = None
+    wagerType: Optional[str] = None
+    stake: Optional[float] = None
+    odds: Optional[float] = None
+    fee: Optional[float] = None
+    platform: Optional[str] = None
+    result: Optional[str] = Field(default=None, description="pending/win/lose/half-win/half-lose")
+    status: Optional[str] = Field(default=None, description="saved/betting/settled")
+    betTime: Optional[str] = Field(default=None, description="YYYY-MM-DD HH:mm")
+    tags: List[str] = []
+    note: Optional[str] = None
+    legs: List[BetLeg] = []
+
+
+class BetImportRequest(BaseModel):
+    bets: List[Bet] = Field(description="本地账本中的全部记录，已导入过的 id 会跳过")
+    startingCapital: Optional[float] = Field(default=None, ge=0, description="同时设置初始资金")
+
+
+class LedgerConfig(BaseModel):
+    startingCapital: float = Field(ge=0)
+
+
+class SettleRequest(BaseModel):
+    result: Optional[str] = Field(default=None, description="win/lose/half-win/half-lose，不传沿用记录上的结果")
+
+
+LEDGER_ID = Path(pattern=r"^[A-Za-z0-9_-]{1,64}$", description="账本 ID，由客户端生成")
 
 
 def format_match(row: Dict[str, Any]) -> Dict[str, Any]:
@@ -52,64 +172,607 @@ def format_match(row: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+def format_plays(match: Dict[str, Any], wdl: Dict[str, Any], crs: List, ttg: List, hafu: List) -> Dict[str, Any]:
+    return {
+        "match": format_match(match),
+        "plays": {
+            "had": wdl.get("had"),
+            "hhad": wdl.get("hhad"),
+            "crs": crs,
+            "ttg": ttg,
+            "hafu": hafu,
+        },
+    }
+
+
+def format_bet(bet: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": bet["bet_id"],
+        "matchName": bet["match_name"],
+        "league": bet["league"],
+        "betType": bet["bet_type"],
+        "wagerType": bet["wager_type"],
+        "stake": bet["stake"],
+        "odds": bet["odds"],
+        "fee": bet["fee"],
+        "platform": bet["platform"],
+        "result": bet["result"],
+        "status": bet["status"],
+        "profit": bet["profit"],
+        "betTime": bet["bet_time"],
+        "settledAt": bet["settled_at"],
+        "tags": bet["tags"],
+        "note": bet["note"],
+        "legs": [
+            {
+                "id": leg["leg_id"],
+                "matchId": leg["match_id"],
+                "market": leg["market"],
+                "selection": leg["selection"],
+                "handicap": leg["handicap"],
+                "result": leg["result"],
+                "homeTeam": leg["home_team"],
+                "awayTeam": leg["away_team"],
+                "league": leg["league"],
+                "matchTime": leg["match_time"],
+                "betType": leg["bet_type"],
+                "odds": leg["odds"],
+                "stake": leg["stake"],
+                "note": leg["note"],
+            }
+            for leg in bet["legs"]
+        ],
+    }
+
+
+def format_ledger_stats(ledger_id: str, period: str, stats: Dict[str, Any]) -> Dict[str, Any]:
+    """与前端 statStore 同名字段口径一致；回撤、连黑按结算顺序累计，periodStats 与 trendSeries 按投注时间分桶"""
+    totals = stats["totals"]
+    capital = totals["starting_capital"]
+    bet_count, stake = totals["bet_count"], totals["total_stake"]
+    profit, settled = totals["total_profit"], totals["settled_count"]
+    rolling = capital
+    trend = []
+    for day in stats["days"]:
+        rolling += day["profit"]
+        trend.append({"date": day["bucket"], "stake": round(day["stake"], 2), "profit": round(day["profit"], 2), "balance": round(rolling, 2)})
+    return {
+        "ledgerId": ledger_id,
+        "startingCapital": capital,
+        "betCount": bet_count,
+        "activeCount": totals["active_count"],
+        "settledCount": settled,
+        "winCount": totals["win_count"],
+        "loseCount": totals["lose_count"],
+        "winningRate": round(totals["win_count"] / settled, 4) if settled else 0,
+        "totalStake": round(stake, 2),
+        "bettingStake": round(totals["betting_stake"], 2),
+        "totalProfit": round(profit, 2),
+        "balance": round(capital + profit, 2),
+        "bankroll": round(capital + profit - totals["betting_stake"], 2),
+        "averageStake": round(stake / bet_count, 2) if bet_count else 0,
+        "averageOdds": round(totals["odds_sum"] / bet_count, 4) if bet_count else 0,
+        "roi": round(profit / stake, 4) if stake else 0,
+        "peak": round(totals["peak"], 2),
+        "drawdown": round(totals["max_drawdown"], 4),
+        "maxDrawdownAmount": round(totals["max_drawdown_amount"], 2),
+        "consecutiveLosses": totals["loss_streak"],
+        "maxConsecutiveLoss": totals["max_loss_streak"],
+        "consecutiveWins": totals["win_streak"],
+        "maxConsecutiveWin": totals["max_win_streak"],
+        "pieDataset": [
+            {"name": play["bet_type"], "value": round(play["profit"], 2), "stake": round(play["stake"], 2), "count": play["bet_count"]}
+            for play in stats["plays"]
+        ],
+        "period": period,
+        "periodStats": [
+            {
+                "period": bucket["bucket"],
+                "stake": round(bucket["stake"], 2),
+                "profit": round(bucket["profit"], 2),
+                "count": bucket["bet_count"],
+                "settledCount": bucket["settled_count"],
+                "winCount": bucket["win_count"],
+                "loseCount": bucket["lose_count"],
+            }
+            for bucket in stats["periods"]
+        ],
+        "trendSeries": trend,
+        "updatedAt": totals["updated_at"],
+    }
+
+
+def _collect_cache_stats():
+    for name, cache in (("read", read_cache), ("snapshot", snapshot_cache)):
+        stats = cache.stats()
+        for key in ("entries", "hits", "misses", "evictions"):
+            yield (name, key), stats[key]
+
+
+def _collect_pool_stats():
+    stats = pool_stats()
+    for key in ("inUse", "peakInUse", "checkouts", "waits", "timeouts", "created", "recycled", "discarded"):
+        if key in stats:
+            yield (key,), stats[key]
+
+
+def _collect_slate_stats():
+    stats = slate_store.stats()
+    for key in ("matches", "oddsRows", "bytes", "bytesPerMatch", "builds", "reads", "fallbacks"):
+        if key in stats:
+            yield (key,), stats[key]
+
+
+registry.gauge("cache_stats", "读缓存与响应快照的条目数与命中统计（累计值）", ("cache", "stat"), _collect_cache_stats)
+registry.gauge("db_pool_stats", "连接池占用与累计统计", ("stat",), _collect_pool_stats)
+registry.gauge("live_subscribers", "实时推送连接数", (), lambda: [((), live_hub.subscriber_count)])
+registry.gauge("slate_stats", "内存赛程的比赛数、占用字节与读取回退统计", ("stat",), _collect_slate_stats)
+
+
 @app.on_event("startup")
 async def startup_event():
+    # 首次同步在调度器线程中执行，服务启动后即可响应请求（数据库中已有的数据照常返回）
+    started = time.perf_counter()
     init_db()
+    startup_timings["initDbSeconds"] = round(time.perf_counter() - started, 4)
+    scheduler_started = time.perf_counter()
     start_scheduler()
-    run_sync_job()
+    startup_timings["schedulerSeconds"] = round(time.perf_counter() - scheduler_started, 4)
+    startup_timings["startupSeconds"] = round(time.perf_counter() - started, 4)
+    logger.info("Startup completed: %s", startup_timings)
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     shutdown_scheduler()
+    close_pool()
+
+
+@app.get("/api/ready")
+def ready_check():
+    """就绪探针：启动完成且至少同步成功过一次时返回 200（数据过期时 state 为 stale，仍返回 200），否则返回 503"""
+    if "startupSeconds" not in startup_timings:
+        payload: Dict[str, Any] = {"state": "starting"}
+    else:
+        payload = readiness()
+        payload["schemaVersion"] = schema_version()
+    payload["startup"] = startup_timings
+    status_code = 200 if payload["state"] in ("ready", "stale") else 503
+    return Response(content=dumps(payload), status_code=status_code, media_type="application/json")
 
 
 @app.get("/api/health")
 def health_check():
-    return {"status": "ok", "sync": get_sync_status()}
+    return {
+        "status": "ok",
+        "sync": get_sync_status(),
+        "cache": read_cache.stats(),
+        "snapshots": snapshot_cache.stats(),
+        "pool": pool_stats(),
+        "live": live_hub.stats(),
+        "leader": leader_status(),
+        "slate": slate_store.stats(),
+        "archive": retention_status(),
+        "results": results_status(),
+    }
+
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus 文本格式的指标，METRICS_ENABLED=0 时不提供"""
+    if not registry.enabled:
+        raise HTTPException(status_code=404, detail="未启用指标")
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
 
 
 @app.post("/api/sync")
-def trigger_sync():
-    stats = run_sync_job()
+def trigger_sync(full: bool = Query(default=False, description="忽略内容指纹，强制全量重写")):
+    stats = run_sync_job(incremental=False if full else None)
     if not stats:
         raise HTTPException(status_code=500, detail="同步失败")
     return {"message": "ok", "stats": stats}
 
 
+@app.post("/api/results/sync")
+def trigger_results_sync():
+    """抓取最近几天的比赛结果，并按结果自动结算全部账本中投注中的记录"""
+    stats = run_results_job(force=True)
+    if not stats:
+        raise HTTPException(status_code=500, detail="结果同步失败")
+    return {"message": "ok", "stats": stats}
+
+
+@app.get("/api/sync/schedule")
+def get_sync_schedule():
+    """自适应同步计划：各玩法池的下次抓取时间与方式、变化率、最近开赛时间与请求预算"""
+    return sync_schedule()
+
+
 @app.get("/api/matches")
 def list_matches(
+    request: Request,
     date: Optional[str] = Query(default=None, description="按比赛日期过滤，格式 YYYY-MM-DD"),
     league: Optional[str] = Query(default=None, description="按联赛过滤"),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=50),
+    cursor: Optional[str] = Query(default=None, description="上一页返回的 nextCursor，传入时忽略 page"),
+    include_total: bool = Query(default=True, description="是否返回总数"),
 ):
-    data = repo.list_matches(date=date, league=league, page=page, page_size=page_size)
-    items = [format_match(row) for row in data["items"]]
-    return {"items": items, "total": data["total"], "page": page, "pageSize": page_size}
+    def build():
+        try:
+            data = repo.list_matches(
+                date=date,
+                league=league,
+                page=page,
+                page_size=page_size,
+                cursor=cursor,
+                with_total=include_total,
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        items = [format_match(row) for row in data["items"]]
+        return {
+            "items": items,
+            "total": data["total"],
+            "page": page,
+            "pageSize": page_size,
+            "nextCursor": data["next_cursor"],
+        }
+
+    key = ("matches", date, league, None if cursor else page, page_size, cursor, include_total)
+    return snapshot_response(request, get_snapshot(key, build))
 
 
 @app.get("/api/matches/{match_id}")
-def get_match(match_id: str):
-    match = repo.get_match(match_id)
-    if not match:
-        raise HTTPException(status_code=404, detail="未找到比赛")
-    detail = format_match(match)
-    detail["wdl"] = repo.get_wdl_odds(match_id)
-    return detail
+def get_match(request: Request, match_id: str):
+    def build():
+        match = repo.get_match(match_id)
+        if not match:
+            raise HTTPException(status_code=404, detail="未找到比赛")
+        detail = format_match(match)
+        detail["wdl"] = repo.get_wdl_odds(match_id)
+        return detail
+
+    return snapshot_response(request, get_snapshot(("match", match_id), build))
 
 
 @app.get("/api/matches/{match_id}/plays")
-def get_match_plays(match_id: str):
-    match = repo.get_match(match_id)
-    if not match:
-        raise HTTPException(status_code=404, detail="未找到比赛")
-    wdl = repo.get_wdl_odds(match_id)
-    plays = {
-        "had": wdl.get("had"),
-        "hhad": wdl.get("hhad"),
-        "crs": repo.get_scores(match_id),
-        "ttg": repo.get_total_goals(match_id),
-        "hafu": repo.get_hafu(match_id),
+def get_match_plays(request: Request, match_id: str):
+    def build():
+        match = repo.get_match(match_id)
+        if not match:
+            raise HTTPException(status_code=404, detail="未找到比赛")
+        return format_plays(
+            match,
+            repo.get_wdl_odds(match_id),
+            repo.get_scores(match_id),
+            repo.get_total_goals(match_id),
+            repo.get_hafu(match_id),
+        )
+
+    return snapshot_response(request, get_snapshot(("plays", match_id), build))
+
+
+@app.post("/api/plays:batch")
+def get_plays_batch(body: PlaysBatchRequest):
+    """一次返回多场比赛的五大玩法赔率，每张表只查询一次；不存在的比赛列在 missing 中"""
+    match_ids = list(dict.fromkeys(body.matchIds))
+    if not match_ids:
+        raise HTTPException(status_code=400, detail="请至少提供一场比赛")
+    if len(match_ids) > settings.PLAYS_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"单次最多查询 {settings.PLAYS_BATCH_MAX} 场比赛")
+    bulk = repo.get_plays_bulk(match_ids)
+    items = [
+        format_plays(data["match"], data["wdl"], data["crs"], data["ttg"], data["hafu"])
+        for data in (bulk.get(match_id) for match_id in match_ids)
+        if data is not None
+    ]
+    missing = [match_id for match_id in match_ids if match_id not in bulk]
+    return Response(content=dumps({"items": items, "missing": missing}), media_type="application/json")
+
+
+@app.get("/api/matches/{match_id}/history")
+def get_match_history(
+    match_id: str,
+    market: Optional[str] = Query(default=None, description="玩法：had/hhad/crs/ttg/hafu，不传返回全部"),
+    start: Optional[int] = Query(default=None, description="起始时间（Unix 秒），默认为 end 往前 HISTORY_WINDOW_HOURS"),
+    end: Optional[int] = Query(default=None, description="结束时间（Unix 秒），默认为当前时间"),
+    max_points: int = Query(default=200, ge=2, le=2000, description="每个玩法最多返回的点数"),
+):
+    if market and market not in MARKET_SELECTIONS:
+        raise HTTPException(status_code=400, detail=f"不支持的玩法: {market}")
+    end = end if end is not None else int(time.time())
+    start = start if start is not None else end - settings.HISTORY_WINDOW_HOURS * 3600
+    if start > end:
+        raise HTTPException(status_code=400, detail="start 不能晚于 end")
+    markets = [market] if market else list(MARKET_SELECTIONS)
+    series = {}
+    for name in markets:
+        points = downsample(repo.iter_history(match_id, name, start, end), start, end, max_points)
+        if points:
+            series[name] = format_series(name, points)
+    return {"matchId": match_id, "start": start, "end": end, "markets": series}
+
+
+@app.get("/api/archive/matches")
+def list_archived_matches(
+    date: Optional[str] = Query(default=None, description="按比赛日期过滤，格式 YYYY-MM-DD"),
+    league: Optional[str] = Query(default=None, description="按联赛过滤"),
+    page: int = Query(default=1, ge=1),
+    page_size: int = Query(default=20, ge=1, le=50),
+):
+    """已归档的比赛（超过保留期的已结束 / 已取消比赛），从归档文件读取，比 /api/matches 慢"""
+    data = repo.list_archived(date=date, league=league, page=page, page_size=page_size)
+    records = archive_store.find(dict(data["items"]))
+    items = []
+    for match_id, _ in data["items"]:
+        if match_id in records:
+            plays = record_plays(records[match_id])
+            items.append(format_match({**plays["match"], "wdl_odds": plays["wdl"]}))
+    return {"items": items, "total": data["total"], "page": page, "pageSize": page_size}
+
+
+@app.get("/api/archive/matches/{match_id}")
+def get_archived_match(match_id: str):
+    """已归档比赛的五大玩法赔率与完整赔率历史，结构与 /plays 一致，另附 history"""
+    files = repo.get_archive_files([match_id])
+    record = archive_store.find(files).get(match_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="未找到归档的比赛")
+    data = record_plays(record)
+    payload = format_plays(data["match"], data["wdl"], data["crs"], data["ttg"], data["hafu"])
+    payload["history"] = {
+        market: format_series(market, [tuple(point) for point in record["history"][market]])
+        for market in MARKET_SELECTIONS
+        if market in record["history"]
+    }
+    return Response(content=dumps(payload), media_type="application/json")
+
+
+@app.put("/api/ledgers/{ledger_id}")
+def put_ledger(body: LedgerConfig, ledger_id: str = LEDGER_ID):
+    """创建账本或修改初始资金（修改时按结算顺序重新计算峰值与回撤）"""
+    ledger_repo.set_starting_capital(ledger_id, body.startingCapital)
+    stats = format_ledger_stats(ledger_id, "week", ledger_repo.get_ledger_stats(ledger_id, "week"))
+    return Response(content=dumps(stats), media_type="application/json")
+
+
+@app.get("/api/ledgers/{ledger_id}/stats")
+def get_ledger_stats(
+    ledger_id: str = LEDGER_ID,
+    period: str = Query(default="week", description="periodStats 的分桶周期：day/week/month"),
+):
+    """账本统计（收益率、胜率、回撤、连黑、玩法饼图、周期统计与收益曲线），由写入时增量维护的汇总直接得出"""
+    if period not in PERIODS:
+        raise HTTPException(status_code=400, detail=f"不支持的周期: {period}")
+    stats = ledger_repo.get_ledger_stats(ledger_id, period)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="未找到账本")
+    return Response(content=dumps(format_ledger_stats(ledger_id, period, stats)), media_type="application/json")
+
+
+@app.get("/api/ledgers/{ledger_id}/bets")
+def list_ledger_bets(
+    ledger_id: str = LEDGER_ID,
+    status: Optional[str] = Query(default=None, description="saved/betting/settled"),
+    page: int = Query(default=1, ge=1),
+    page_size: int = Query(default=20, ge=1, le=100),
+):
+    if status and status not in STATUSES:
+        raise HTTPException(status_code=400, detail=f"不支持的状态: {status}")
+    data = ledger_repo.list_bets(ledger_id, status=status, page=page, page_size=page_size)
+    return {"items": [format_bet(bet) for bet in data["items"]], "total": data["total"], "page": page, "pageSize": page_size}
+
+
+@app.post("/api/ledgers/{ledger_id}/bets")
+def add_ledger_bet(body: Bet, ledger_id: str = LEDGER_ID):
+    """新增一条记录（账本不存在时按默认初始资金创建）；投注中的记录金额超过可用余额时拒绝"""
+    try:
+        bet = normalize_bet(body.model_dump(exclude_none=True))
+        if ledger_repo.add_bets(ledger_id, [bet])["skipped"]:
+            raise HTTPException(status_code=409, detail="投注记录已存在")
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return format_bet(bet)
+
+
+@app.post("/api/ledgers/{ledger_id}/bets:import")
+def import_ledger_bets(body: BetImportRequest, ledger_id: str = LEDGER_ID):
+    """导入本地账本：按投注时间顺序写入（已结算记录按此顺序累计回撤与连黑），已存在的 id 跳过，可重复调用"""
+    if len(body.bets) > settings.LEDGER_IMPORT_MAX:
+        raise HTTPException(status_code=400, detail=f"单次最多导入 {settings.LEDGER_IMPORT_MAX} 条记录")
+    bets = []
+    for index, item in enumerate(body.bets):
+        try:
+            bets.append(normalize_bet(item.model_dump(exclude_none=True)))
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=f"第 {index + 1} 条记录: {exc}")
+    bets.sort(key=lambda bet: bet["bet_time"])
+    if body.startingCapital is not None:
+        ledger_repo.set_starting_capital(ledger_id, body.startingCapital)
+    result = ledger_repo.add_bets(ledger_id, bets, check_balance=False)
+    return {"imported": len(result["added"]), "skipped": result["skipped"]}
+
+
+@app.post("/api/ledgers/{ledger_id}/bets/{bet_id}/place")
+def place_ledger_bet(bet_id: str, ledger_id: str = LEDGER_ID):
+    """草稿转为投注中"""
+    try:
+        bet = ledger_repo.place_bet(ledger_id, bet_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if bet is None:
+        raise HTTPException(status_code=404, detail="投注记录不存在")
+    return format_bet(bet)
+
+
+@app.post("/api/ledgers/{ledger_id}/bets/{bet_id}/settle")
+def settle_ledger_bet(body: SettleRequest, bet_id: str, ledger_id: str = LEDGER_ID):
+    """结算投注中的记录"""
+    if body.result and body.result not in SETTLED_RESULTS:
+        raise HTTPException(status_code=400, detail=f"不支持的结果: {body.result}")
+    try:
+        bet = ledger_repo.settle_bet(ledger_id, bet_id, body.result)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if bet is None:
+        raise HTTPException(status_code=404, detail="投注记录不存在")
+    return format_bet(bet)
+
+
+@app.delete("/api/ledgers/{ledger_id}/bets/{bet_id}")
+def delete_ledger_bet(bet_id: str, ledger_id: str = LEDGER_ID):
+    if not ledger_repo.delete_bet(ledger_id, bet_id):
+        raise HTTPException(status_code=404, detail="投注记录不存在")
+    return {"message": "ok"}
+
+
+@app.get("/api/live")
+async def live_updates(
+    match_id: List[str] = Query(default=[], description="只订阅指定比赛，可重复传入"),
+    league: List[str] = Query(default=[], description="只订阅指定联赛，可重复传入"),
+):
+    """Server-Sent Events：每次同步后推送价格有变化的比赛与玩法（odds），以及同步汇总（sync）。
+
+    odds 事件中每个玩法为与 hello 事件 selections 对齐的价格数组；收到 resync 时应重新拉取全量数据。
+    不传过滤条件时订阅全部比赛。
+    """
+    if len(match_id) + len(league) > settings.LIVE_MAX_FILTERS:
+        raise HTTPException(status_code=400, detail=f"订阅条件最多 {settings.LIVE_MAX_FILTERS} 个")
+    return StreamingResponse(
+        event_stream(match_id, league),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _price_legs(keys: Sequence[Tuple[str, str, str]]) -> Tuple[Dict[str, Dict[str, Dict[str, Any]]], List[Leg]]:
+    """按 (matchId, market, selection) 读取当前赔率，返回 (repo.get_prices 的价格表, 各选项的 Leg)；缺少赔率时 400"""
+    prices = repo.get_prices(list(dict.fromkeys(key[0] for key in keys)))
+    legs: List[Leg] = []
+    missing = []
+    for match_id, market, selection in keys:
+        market_prices = prices.get(match_id, {}).get(market, {})
+        odds = market_prices.get(selection) if selection != "handicap" else None
+        if not odds:
+            missing.append(f"{match_id}/{market}/{selection}")
+            continue
+        legs.append(Leg(match_id, market, selection, odds, market_prices.get("handicap")))
+    if missing:
+        raise HTTPException(status_code=400, detail=f"未找到赔率: {', '.join(missing)}")
+    return prices, legs
+
+
+@app.post("/api/parlay")
+def calculate_parlay(body: ParlayRequest):
+    """按数据库中的当前赔率计算串关注数、投注额与奖金范围，可选返回前 ticketLimit 注明细"""
+    keys = list(dict.fromkeys((leg.matchId, leg.market, leg.selection) for leg in body.legs))
+    if not keys:
+        raise HTTPException(status_code=400, detail="请至少选择一个选项")
+    if len(keys) > settings.PARLAY_MAX_LEGS:
+        raise HTTPException(status_code=400, detail=f"选项最多 {settings.PARLAY_MAX_LEGS} 个")
+    match_ids = list(dict.fromkeys(key[0] for key in keys))
+    if len(match_ids) > settings.PARLAY_MAX_MATCHES:
+        raise HTTPException(status_code=400, detail=f"比赛最多 {settings.PARLAY_MAX_MATCHES} 场")
+
+    _, legs = _price_legs(keys)
+
+    groups = group_by_match(legs)
+    try:
+        sizes = resolve_sizes(body.parlayType, len(groups))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    result = evaluate(groups, sizes, body.multiple)
+    limit = min(body.ticketLimit, settings.PARLAY_MAX_TICKETS)
+    unit = UNIT_STAKE * body.multiple
+    positions = {id(leg): index for index, leg in enumerate(legs)}
+    tickets = []
+    for ticket in itertools.islice(iter_tickets(groups, sizes), limit):
+        odds = ticket_odds(ticket)
+        tickets.append({"legs": [positions[id(leg)] for leg in ticket], "odds": round(odds, 4), "payout": round(unit * odds, 2)})
+    return {
+        "parlayType": body.parlayType,
+        "sizes": list(sizes),
+        "matches": len(groups),
+        "unitStake": UNIT_STAKE,
+        "multiple": body.multiple,
+        **result,
+        "legs": [leg.as_dict() for leg in legs],
+        "tickets": tickets,
+        "truncated": result["ticketCount"] > len(tickets),
+    }
+
+
+@app.post("/api/kelly")
+def calculate_kelly(body: KellyRequest):
+    """按当前赔率与用户给出的命中概率，联合求解多注同时投注的（分数）Kelly 资金分配"""
+    keys = list(dict.fromkeys((bet.matchId, bet.market, bet.selection) for bet in body.bets))
+    if not keys:
+        raise HTTPException(status_code=400, detail="请至少选择一个选项")
+    if len(keys) != len(body.bets):
+        raise HTTPException(status_code=400, detail="选项不能重复")
+    if len(keys) > settings.KELLY_MAX_BETS:
+        raise HTTPException(status_code=400, detail=f"选项最多 {settings.KELLY_MAX_BETS} 个")
+    # numpy 导入较慢，推迟到首次调用
+    from .kelly import independent_fraction, optimize
+
+    prices, legs = _price_legs(keys)
+
+    probabilities = [bet.probability for bet in body.bets]
+    try:
+        result = optimize(legs, probabilities, prices, body.fraction, body.maxExposure, settings.KELLY_MAX_SCENARIOS)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    bets = []
+    for leg, probability, ratio, full in zip(legs, probabilities, result["fractions"], result["fullKelly"]):
+        independent = independent_fraction(leg.odds, probability, body.fraction)
+        bets.append({
+            **leg.as_dict(),
+            "probability": probability,
+            "edge": round(probability * leg.odds - 1, 4),
+            "fraction": round(float(ratio), 6),
+            "stake": round(body.bankroll * float(ratio), 2),
+            "fullKellyFraction": round(float(full), 6),
+            "independentFraction": round(independent, 6),
+            "independentStake": round(body.bankroll * independent, 2),
+        })
+    total = float(result["fractions"].sum())
+    independent_total = sum(bet["independentFraction"] for bet in bets)
+    return {
+        "bankroll": body.bankroll,
+        "fraction": body.fraction,
+        "maxExposure": body.maxExposure,
+        "bets": bets,
+        "totalFraction": round(total, 6),
+        "totalStake": round(body.bankroll * total, 2),
+        "independentTotalFraction": round(independent_total, 6),
+        "expectedGrowth": round(result["expectedGrowth"], 6),
+        "expectedReturn": round(result["expectedReturn"], 6),
+        "lossProbability": round(result["lossProbability"], 6),
+        "worstCase": round(result["worstCase"], 6),
+        "scenarios": result["scenarios"],
+        "iterations": result["iterations"],
+    }
+
+
+@app.get("/api/analytics/margins")
+def get_margins(
+    date: Optional[str] = Query(default=None, description="按比赛日期过滤，格式 YYYY-MM-DD"),
+    league: Optional[str] = Query(default=None, description="按联赛过滤"),
+    market: Optional[str] = Query(default=None, description="玩法：had/hhad/crs/ttg/hafu，不传返回全部"),
+    method: str = Query(default="proportional", description="去水方法：proportional/power"),
+):
+    """整张赛程各玩法的返还率溢价（overround）与去水后的公平概率，按列式结构返回"""
+    # numpy 导入较慢，推迟到首次调用
+    from .analytics import DEVIG_METHODS, MARKET_OUTCOMES, devig, format_margins, load_slate
+
+    if market and market not in MARKET_OUTCOMES:
+        raise HTTPException(status_code=400, detail=f"不支持的玩法: {market}")
+    if method not in DEVIG_METHODS:
+        raise HTTPException(status_code=400, detail=f"不支持的去水方法: {method}")
+    match_ids = repo.list_match_ids(date=date, league=league)
+    frames = load_slate(repo, match_ids, [market] if market else MARKET_OUTCOMES)
+    return {
+        "method": method,
+        "markets": {name: format_margins(frame, devig(frame.odds, method)) for name, frame in frames.items()},
     }
-    return {"match": format_match(match), "plays": plays}
@@ -0,0 +1,251 @@
+import bisect
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from . import settings
+
+# 默认延迟分桶（秒），覆盖亚毫秒级查询到数秒的同步阶段
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """按标签值累加的计数器"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        if not registry.enabled:
+            return
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for label_values, value in values:
+            yield f"{self.name}_total{_format_labels(self.labels, label_values)} {_format_value(value)}"
+
+
+class Histogram:
+    """按标签值分组的累积分桶直方图，observe 只做一次二分查找与加锁累加"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # {标签值: [各桶计数..., 总和]}，桶计数非累积，输出时再累加
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        if not registry.enabled:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, *label_values: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *label_values)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            series = [(key, list(values)) for key, values in self._series.items()]
+        for label_values, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values[:-1]):
+                cumulative += count
+                le = ("le", _format_value(bound))
+                yield f"{self.name}_bucket{_format_labels(self.labels, label_values, le)} {cumulative}"
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {_format_value(values[-1])}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Gauge:
+    """渲染时由回调取值的仪表，回调返回 [(标签值, 数值)]"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str], collect: Callable[[], Iterable[Tuple[Tuple[str, ...], float]]]):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.collect = collect
+
+    def samples(self) -> Iterator[str]:
+        for label_values, value in self.collect():
+            if value is not None:
+                yield f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}"
+
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str], collect) -> Gauge:
+        return self.register(Gauge(name, documentation, labels, collect))
+
+    def render(self) -> str:
+        """Prometheus 文本格式（0.0.4）"""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            try:
+                lines.extend(metric.samples())
+            except Exception:
+                # 采集回调失败时跳过该指标，不影响其余输出
+                continue
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry(settings.METRICS_ENABLED)
+
+http_request_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP 请求耗时（按路由模板）", ("method", "route", "status")
+)
+repository_seconds = registry.histogram(
+    "repository_query_duration_seconds", "仓储方法实际执行数据库查询的耗时（读缓存命中不计入）", ("method",)
+)
+db_acquire_seconds = registry.histogram(
+    "db_connection_acquire_duration_seconds", "从连接池获取连接的耗时", ()
+)
+sync_stage_seconds = registry.histogram(
+    "sync_stage_duration_seconds", "同步各阶段耗时：fetch / parse / write / finalize / total", ("stage",)
+)
+sync_fetch_seconds = registry.histogram(
+    "sync_fetch_duration_seconds", "单个玩法池流式抓取并入库的耗时（含重试）", ("pool",)
+)
+sync_write_seconds = registry.histogram(
+    "sync_write_duration_seconds", "同步写入每张表的耗时", ("table",)
+)
+sync_rows_written = registry.counter(
+    "sync_rows_written", "同步写入的行数", ("table",)
+)
+upstream_request_seconds = registry.histogram(
+    "upstream_request_duration_seconds", "请求竞彩接口到收到响应头的耗时（每次尝试）", ("pool",)
+)
+upstream_responses = registry.counter(
+    "upstream_responses", "竞彩接口响应次数，status 为 HTTP 状态码或 error", ("pool", "status")
+)
+sync_runs = registry.counter("sync_runs", "同步次数", ("result",))
+
+
+@contextmanager
+def observe(histogram: Histogram, *label_values: str) -> Iterator[None]:
+    """关闭指标时不计时"""
+    if not registry.enabled:
+        yield
+        return
+    with histogram.time(*label_values):
+        yield
+
+
+def timed_query(func: Callable) -> Callable:
+    """记录仓储方法耗时；放在 @cached 之下时只统计未命中缓存、真正查询数据库的调用。
+    生成器方法统计到迭代结束为止。
+    """
+    name = func.__name__
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def generator_wrapper(*args, **kwargs):
+            if not registry.enabled:
+                yield from func(*args, **kwargs)
+                return
+            with repository_seconds.time(name):
+                yield from func(*args, **kwargs)
+
+        return generator_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not registry.enabled:
+            return func(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            repository_seconds.observe(time.perf_counter() - started, name)
+
+    return wrapper
+
+
+class MetricsMiddleware:
+    """ASGI 中间件：按路由模板记录请求耗时。实时推送等长连接不计入"""
+
+    def __init__(self, app, excluded: Sequence[str] = ()):
+        self.app = app
+        self.excluded = set(excluded)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not registry.enabled:
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            if template not in self.excluded:
+                http_request_seconds.observe(time.perf_counter() - started, scope["method"], template, str(status["code"]))
@@ -0,0 +1,337 @@
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from . import settings
+
+logger = logging.getLogger(__name__)
+
+# 结构版本表：每条迁移成功后记录一行，启动时只需读取最大版本号，已是最新版本时不执行任何 DDL
+_VERSION_TABLE_SQL = {
+    "sqlite": (
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, description TEXT, applied_at TEXT)"
+    ),
+    "mysql": (
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INT PRIMARY KEY, description VARCHAR(200), applied_at VARCHAR(50)"
+        ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+    ),
+}
+
+
+class Migration:
+    """一个结构版本。apply(cursor, dialect) 必须可重复执行：引入版本表之前的数据库会从第 1 版开始补齐"""
+
+    __slots__ = ("version", "description", "apply")
+
+    def __init__(self, version: int, description: str, apply: Callable[[Any, str], None]):
+        self.version = version
+        self.description = description
+        self.apply = apply
+
+
+def _fetch_all(cursor, sql: str, params: Sequence[Any] = ()) -> List[tuple]:
+    cursor.execute(sql, params)
+    return [tuple(row) for row in cursor.fetchall()]
+
+
+def _existing_columns(cursor, dialect: str, table: str) -> set:
+    if dialect == "mysql":
+        rows = _fetch_all(
+            cursor,
+            "SELECT COLUMN_NAME FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            (table,),
+        )
+        return {row[0] for row in rows}
+    return {row[1] for row in _fetch_all(cursor, f"PRAGMA table_info({table})")}
+
+
+def _existing_indexes(cursor, dialect: str, table: str) -> set:
+    if dialect == "mysql":
+        rows = _fetch_all(
+            cursor,
+            "SELECT DISTINCT INDEX_NAME FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            (table,),
+        )
+        return {row[0] for row in rows}
+    return {row[1] for row in _fetch_all(cursor, f"PRAGMA index_list({table})")}
+
+
+def _add_columns(table: str, columns: Sequence[Tuple[str, str]]) -> Callable[[Any, str], None]:
+    def apply(cursor, dialect: str) -> None:
+        existing = _existing_columns(cursor, dialect, table)
+        for name, definition in columns:
+            if name not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+    return apply
+
+
+def _add_indexes(table: str, indexes: Sequence[Tuple[str, str]]) -> Callable[[Any, str], None]:
+    def apply(cursor, dialect: str) -> None:
+        existing = _existing_indexes(cursor, dialect, table)
+        for name, columns in indexes:
+            if name not in existing:
+                cursor.execute(f"CREATE INDEX {name} ON {table} ({columns})")
+
+    return apply
+
+
+def _run_sql(*statements: str) -> Callable[[Any, str], None]:
+    def apply(cursor, dialect: str) -> None:
+        for sql in statements:
+            cursor.execute(sql)
+
+    return apply
+
+
+def _create_table(statements: Dict[str, str]) -> Callable[[Any, str], None]:
+    """按方言执行 CREATE TABLE IF NOT EXISTS"""
+    def apply(cursor, dialect: str) -> None:
+        cursor.execute(statements[dialect])
+
+    return apply
+
+
+def _steps(*steps: Callable[[Any, str], None]) -> Callable[[Any, str], None]:
+    def apply(cursor, dialect: str) -> None:
+        for step in steps:
+            step(cursor, dialect)
+
+    return apply
+
+
+def _base_schema(cursor, dialect: str) -> None:
+    """建表脚本只含 IF NOT EXISTS 语句"""
+    if dialect == "mysql":
+        script = Path(settings.SCHEMA_MYSQL_PATH).read_text(encoding="utf-8")
+        for command in script.split(";"):
+            command = command.strip()
+            if command:
+                cursor.execute(command)
+    else:
+        cursor.executescript(Path(settings.SCHEMA_PATH).read_text(encoding="utf-8"))
+
+
+_MATCH_ARCHIVE_SQL = {
+    "sqlite": (
+        "CREATE TABLE IF NOT EXISTS match_archive ("
+        "match_id TEXT PRIMARY KEY, match_date TEXT NOT NULL, league_name TEXT, "
+        "archive_file TEXT NOT NULL, archived_at TEXT NOT NULL)"
+    ),
+    "mysql": (
+        "CREATE TABLE IF NOT EXISTS match_archive ("
+        "match_id VARCHAR(100) PRIMARY KEY, match_date VARCHAR(20) NOT NULL, league_name VARCHAR(200), "
+        "archive_file VARCHAR(255) NOT NULL, archived_at VARCHAR(50) NOT NULL"
+        ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci"
+    ),
+}
+
+
+_MYSQL_TABLE_OPTIONS = ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci"
+
+# 投注账本（见 ledger.py）：账本汇总、投注记录与选项、按日 / 周 / 月的分桶与按玩法的分组
+_LEDGER_SQL = (
+    {
+        "sqlite": (
+            "CREATE TABLE IF NOT EXISTS ledgers ("
+            "ledger_id TEXT PRIMARY KEY, starting_capital REAL NOT NULL, "
+            "bet_count INTEGER DEFAULT 0, odds_sum REAL DEFAULT 0, active_count INTEGER DEFAULT 0, "
+            "total_stake REAL DEFAULT 0, betting_stake REAL DEFAULT 0, settled_count INTEGER DEFAULT 0, "
+            "win_count INTEGER DEFAULT 0, lose_count INTEGER DEFAULT 0, total_profit REAL DEFAULT 0, "
+            "peak REAL DEFAULT 0, max_drawdown REAL DEFAULT 0, max_drawdown_amount REAL DEFAULT 0, "
+            "loss_streak INTEGER DEFAULT 0, max_loss_streak INTEGER DEFAULT 0, "
+            "win_streak INTEGER DEFAULT 0, max_win_streak INTEGER DEFAULT 0, settle_seq INTEGER DEFAULT 0, "
+            "created_at TEXT, updated_at TEXT)"
+        ),
+        "mysql": (
+            "CREATE TABLE IF NOT EXISTS ledgers ("
+            "ledger_id VARCHAR(64) PRIMARY KEY, starting_capital DOUBLE NOT NULL, "
+            "bet_count INT DEFAULT 0, odds_sum DOUBLE DEFAULT 0, active_count INT DEFAULT 0, "
+            "total_stake DOUBLE DEFAULT 0, betting_stake DOUBLE DEFAULT 0, settled_count INT DEFAULT 0, "
+            "win_count INT DEFAULT 0, lose_count INT DEFAULT 0, total_profit DOUBLE DEFAULT 0, "
+            "peak DOUBLE DEFAULT 0, max_drawdown DOUBLE DEFAULT 0, max_drawdown_amount DOUBLE DEFAULT 0, "
+            "loss_streak INT DEFAULT 0, max_loss_streak INT DEFAULT 0, "
+            "win_streak INT DEFAULT 0, max_win_streak INT DEFAULT 0, settle_seq INT DEFAULT 0, "
+            "created_at VARCHAR(50), updated_at VARCHAR(50)" + _MYSQL_TABLE_OPTIONS
+        ),
+    },
+    {
+        "sqlite": (
+            "CREATE TABLE IF NOT EXISTS ledger_bets ("
+            "ledger_id TEXT NOT NULL, bet_id TEXT NOT NULL, match_name TEXT, league TEXT, bet_type TEXT, "
+            "wager_type TEXT, stake REAL DEFAULT 0, odds REAL DEFAULT 1, fee REAL DEFAULT 0, platform TEXT, "
+            "result TEXT NOT NULL, status TEXT NOT NULL, profit REAL DEFAULT 0, bet_time TEXT NOT NULL, "
+            "settle_seq INTEGER, settled_at TEXT, tags TEXT, note TEXT, "
+            "PRIMARY KEY(ledger_id, bet_id))"
+        ),
+        "mysql": (
+            "CREATE TABLE IF NOT EXISTS ledger_bets ("
+            "ledger_id VARCHAR(64) NOT NULL, bet_id VARCHAR(100) NOT NULL, match_name VARCHAR(300), "
+            "league VARCHAR(200), bet_type VARCHAR(100), wager_type VARCHAR(20), stake DOUBLE DEFAULT 0, "
+            "odds DOUBLE DEFAULT 1, fee DOUBLE DEFAULT 0, platform VARCHAR(100), result VARCHAR(20) NOT NULL, "
+            "status VARCHAR(20) NOT NULL, profit DOUBLE DEFAULT 0, bet_time VARCHAR(30) NOT NULL, "
+            "settle_seq INT, settled_at VARCHAR(30), tags TEXT, note TEXT, "
+            "PRIMARY KEY (ledger_id, bet_id)" + _MYSQL_TABLE_OPTIONS
+        ),
+    },
+    {
+        "sqlite": (
+            "CREATE TABLE IF NOT EXISTS ledger_bet_legs ("
+            "ledger_id TEXT NOT NULL, bet_id TEXT NOT NULL, leg_index INTEGER NOT NULL, leg_id TEXT, "
+            "match_id TEXT, market TEXT, selection TEXT, home_team TEXT, away_team TEXT, league TEXT, "
+            "match_time TEXT, bet_type TEXT, odds REAL DEFAULT 1, stake REAL DEFAULT 0, note TEXT, "
+            "PRIMARY KEY(ledger_id, bet_id, leg_index))"
+        ),
+        "mysql": (
+            "CREATE TABLE IF NOT EXISTS ledger_bet_legs ("
+            "ledger_id VARCHAR(64) NOT NULL, bet_id VARCHAR(100) NOT NULL, leg_index INT NOT NULL, "
+            "leg_id VARCHAR(150), match_id VARCHAR(100), market VARCHAR(20), selection VARCHAR(50), "
+            "home_team VARCHAR(200), away_team VARCHAR(200), league VARCHAR(200), match_time VARCHAR(30), "
+            "bet_type VARCHAR(100), odds DOUBLE DEFAULT 1, stake DOUBLE DEFAULT 0, note TEXT, "
+            "PRIMARY KEY (ledger_id, bet_id, leg_index)" + _MYSQL_TABLE_OPTIONS
+        ),
+    },
+    {
+        "sqlite": (
+            "CREATE TABLE IF NOT EXISTS ledger_buckets ("
+            "ledger_id TEXT NOT NULL, period TEXT NOT NULL, bucket TEXT NOT NULL, "
+            "stake REAL DEFAULT 0, profit REAL DEFAULT 0, bet_count INTEGER DEFAULT 0, "
+            "settled_count INTEGER DEFAULT 0, win_count INTEGER DEFAULT 0, lose_count INTEGER DEFAULT 0, "
+            "PRIMARY KEY(ledger_id, period, bucket))"
+        ),
+        "mysql": (
+            "CREATE TABLE IF NOT EXISTS ledger_buckets ("
+            "ledger_id VARCHAR(64) NOT NULL, period VARCHAR(10) NOT NULL, bucket VARCHAR(20) NOT NULL, "
+            "stake DOUBLE DEFAULT 0, profit DOUBLE DEFAULT 0, bet_count INT DEFAULT 0, "
+            "settled_count INT DEFAULT 0, win_count INT DEFAULT 0, lose_count INT DEFAULT 0, "
+            "PRIMARY KEY (ledger_id, period, bucket)" + _MYSQL_TABLE_OPTIONS
+        ),
+    },
+    {
+        "sqlite": (
+            "CREATE TABLE IF NOT EXISTS ledger_play_types ("
+            "ledger_id TEXT NOT NULL, bet_type TEXT NOT NULL, "
+            "stake REAL DEFAULT 0, profit REAL DEFAULT 0, bet_count INTEGER DEFAULT 0, "
+            "settled_count INTEGER DEFAULT 0, win_count INTEGER DEFAULT 0, lose_count INTEGER DEFAULT 0, "
+            "PRIMARY KEY(ledger_id, bet_type))"
+        ),
+        "mysql": (
+            "CREATE TABLE IF NOT EXISTS ledger_play_types ("
+            "ledger_id VARCHAR(64) NOT NULL, bet_type VARCHAR(100) NOT NULL, "
+            "stake DOUBLE DEFAULT 0, profit DOUBLE DEFAULT 0, bet_count INT DEFAULT 0, "
+            "settled_count INT DEFAULT 0, win_count INT DEFAULT 0, lose_count INT DEFAULT 0, "
+            "PRIMARY KEY (ledger_id, bet_type)" + _MYSQL_TABLE_OPTIONS
+        ),
+    },
+)
+
+# 比赛结果（见 scraper/results.py）：全场与半场比分，不随比赛归档删除
+_MATCH_RESULTS_SQL = {
+    "sqlite": (
+        "CREATE TABLE IF NOT EXISTS match_results ("
+        "match_id TEXT PRIMARY KEY, match_date TEXT, home_score INTEGER, away_score INTEGER, "
+        "half_home_score INTEGER, half_away_score INTEGER, status TEXT NOT NULL, updated_at TEXT)"
+    ),
+    "mysql": (
+        "CREATE TABLE IF NOT EXISTS match_results ("
+        "match_id VARCHAR(100) PRIMARY KEY, match_date VARCHAR(20), home_score INT, away_score INT, "
+        "half_home_score INT, half_away_score INT, status VARCHAR(20) NOT NULL, updated_at VARCHAR(50)"
+        + _MYSQL_TABLE_OPTIONS
+    ),
+}
+
+# 只能追加，不能修改已发布的版本；新库执行第 1 版即得到最新建表脚本，之后的版本对其为空操作
+MIGRATIONS: List[Migration] = [
+    Migration(1, "基础表结构", _base_schema),
+    Migration(
+        2,
+        "sync_status 增加新增/变更/跳过赛事数",
+        _add_columns(
+            "sync_status",
+            [
+                ("new_matches", "INTEGER DEFAULT 0"),
+                ("changed_matches", "INTEGER DEFAULT 0"),
+                ("skipped_matches", "INTEGER DEFAULT 0"),
+            ],
+        ),
+    ),
+    # 游标分页直接比较 (match_date, match_time, match_code, match_id)，排序键不能为 NULL
+    Migration(
+        3,
+        "赛事排序索引，排序键空值统一存为 ''",
+        _steps(
+            _add_indexes("matches", [("idx_matches_order", "match_date, match_time, match_code, match_id")]),
+            _run_sql(
+                *(f"UPDATE matches SET {column} = '' WHERE {column} IS NULL" for column in ("match_date", "match_time", "match_code"))
+            ),
+        ),
+    ),
+    Migration(
+        4,
+        "已归档比赛索引 match_archive",
+        _steps(
+            _create_table(_MATCH_ARCHIVE_SQL),
+            _add_indexes("match_archive", [("idx_match_archive_date", "match_date, match_id")]),
+        ),
+    ),
+    Migration(
+        5,
+        "投注账本 ledgers / ledger_bets / ledger_bet_legs / ledger_buckets / ledger_play_types",
+        _steps(
+            *(_create_table(statements) for statements in _LEDGER_SQL),
+            _add_indexes(
+                "ledger_bets",
+                [
+                    ("idx_ledger_bets_time", "ledger_id, bet_time"),
+                    ("idx_ledger_bets_settle", "ledger_id, settle_seq"),
+                ],
+            ),
+            _add_indexes("ledger_bet_legs", [("idx_ledger_legs_match", "match_id")]),
+        ),
+    ),
+    Migration(
+        6,
+        "比赛结果 match_results，投注选项增加让球数与自动结算结果",
+        _steps(
+            _create_table(_MATCH_RESULTS_SQL),
+            _add_columns("ledger_bet_legs", [("handicap", "REAL"), ("result", "VARCHAR(20) DEFAULT 'pending'")]),
+            _add_indexes("ledger_bets", [("idx_ledger_bets_status", "status")]),
+        ),
+    ),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def current_version(cursor, dialect: str) -> int:
+    cursor.execute(_VERSION_TABLE_SQL[dialect])
+    cursor.execute("SELECT MAX(version) FROM schema_version")
+    row = cursor.fetchone()
+    return int(row[0] or 0) if row else 0
+
+
+def migrate(conn, dialect: str) -> List[int]:
+    """把数据库升级到 LATEST_VERSION，每个版本单独提交，返回本次执行的版本号"""
+    placeholder = "%s" if dialect == "mysql" else "?"
+    cursor = conn.cursor()
+    try:
+        version = current_version(cursor, dialect)
+        conn.commit()
+        applied = []
+        for migration in MIGRATIONS:
+            if migration.version <= version:
+                continue
+            migration.apply(cursor, dialect)
+            cursor.execute(
+                f"INSERT INTO schema_version (version, description, applied_at) VALUES ({placeholder}, {placeholder}, {placeholder})",
+                (migration.version, migration.description, datetime.utcnow().isoformat()),
+            )
+            conn.commit()
+            applied.append(migration.version)
+            logger.info("Applied schema migration %s: %s", migration.version, migration.description)
+        return applied
+    finally:
+        cursor.close()
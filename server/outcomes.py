@@ -0,0 +1,58 @@
+from typing import Iterator, Optional, Tuple
+
+# 比分玩法中单独列出的比分，其余比分归入"胜其他/平其他/负其他"
+_LISTED_SCORES = {
+    (1, 0), (2, 0), (2, 1), (3, 0), (3, 1), (3, 2), (4, 0), (4, 1), (4, 2), (5, 0), (5, 1), (5, 2),
+    (0, 0), (1, 1), (2, 2), (3, 3),
+    (0, 1), (0, 2), (1, 2), (0, 3), (1, 3), (2, 3), (0, 4), (1, 4), (2, 4), (0, 5), (1, 5), (2, 5),
+}
+_RESULT_LABELS = {"win": "胜", "draw": "平", "lose": "负"}
+
+# 枚举赛果时每队进球数的上限，足以覆盖"其他"比分与 7+ 总进球
+MAX_ENUM_GOALS = 7
+
+
+def match_result(home: float, away: float) -> str:
+    if home > away:
+        return "win"
+    if home < away:
+        return "lose"
+    return "draw"
+
+
+def selection_wins(
+    market: str,
+    selection: str,
+    home: int,
+    away: int,
+    half_result: Optional[str],
+    handicap: Optional[float] = None,
+) -> bool:
+    """判断某玩法选项在给定赛果下是否命中。half_result 为半场胜平负（win/draw/lose），仅半全场需要"""
+    if market == "had":
+        return selection == match_result(home, away)
+    if market == "hhad":
+        return selection == match_result(home + (handicap or 0), away)
+    if market == "ttg":
+        total = home + away
+        return total >= 7 if selection == "7+" else selection == str(total)
+    if market == "crs":
+        if (home, away) in _LISTED_SCORES:
+            return selection == f"{home}:{away}"
+        return selection == _RESULT_LABELS[match_result(home, away)] + "其他"
+    if market == "hafu":
+        if half_result is None:
+            return False
+        return selection == _RESULT_LABELS[half_result] + _RESULT_LABELS[match_result(home, away)]
+    raise ValueError(f"不支持的玩法: {market}")
+
+
+def iter_outcomes(max_goals: int = MAX_ENUM_GOALS) -> Iterator[Tuple[int, int, str]]:
+    """枚举 (主队进球, 客队进球, 半场结果) 的所有可能组合；半场领先方在全场必须有进球"""
+    for home in range(max_goals + 1):
+        for away in range(max_goals + 1):
+            yield home, away, "draw"
+            if home:
+                yield home, away, "win"
+            if away:
+                yield home, away, "lose"
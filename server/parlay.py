@@ -0,0 +1,127 @@
+import itertools
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .outcomes import iter_outcomes, selection_wins
+
+# 竞彩足球 M串N 对应的过关场数组合，例如 4串11 = 6 注 2串1 + 4 注 3串1 + 1 注 4串1
+PARLAY_TYPES: Dict[str, Tuple[int, ...]] = {
+    "1_1": (1,),
+    "2_1": (2,),
+    "3_1": (3,), "3_3": (2,), "3_4": (2, 3),
+    "4_1": (4,), "4_4": (3,), "4_5": (3, 4), "4_6": (2,), "4_11": (2, 3, 4),
+    "5_1": (5,), "5_5": (4,), "5_6": (4, 5), "5_10": (2,), "5_16": (3, 4, 5), "5_20": (2, 3), "5_26": (2, 3, 4, 5),
+    "6_1": (6,), "6_6": (5,), "6_7": (5, 6), "6_15": (2,), "6_20": (3,), "6_22": (4, 5, 6), "6_35": (2, 3),
+    "6_42": (3, 4, 5, 6), "6_50": (2, 3, 4), "6_57": (2, 3, 4, 5, 6),
+    "7_1": (7,), "7_7": (6,), "7_8": (6, 7), "7_21": (5,), "7_35": (4,), "7_120": (2, 3, 4, 5, 6, 7),
+    "8_1": (8,), "8_8": (7,), "8_9": (7, 8), "8_28": (6,), "8_56": (5,), "8_70": (4,), "8_247": (2, 3, 4, 5, 6, 7, 8),
+}
+
+UNIT_STAKE = 2  # 单注金额（元）
+
+
+class Leg:
+    """一个投注选项及其当前赔率"""
+
+    __slots__ = ("match_id", "market", "selection", "odds", "handicap")
+
+    def __init__(self, match_id: str, market: str, selection: str, odds: float, handicap: Optional[float] = None):
+        self.match_id = match_id
+        self.market = market
+        self.selection = selection
+        self.odds = odds
+        self.handicap = handicap
+
+    def wins(self, home: int, away: int, half_result: str) -> bool:
+        return selection_wins(self.market, self.selection, home, away, half_result, self.handicap)
+
+    def as_dict(self) -> Dict:
+        return {
+            "matchId": self.match_id,
+            "market": self.market,
+            "selection": self.selection,
+            "odds": self.odds,
+            "handicap": self.handicap,
+        }
+
+
+def resolve_sizes(parlay_type: str, match_count: int) -> Tuple[int, ...]:
+    """把 "M_N"（或 "M串N"）解析为过关场数组合。
+
+    M 等于所选比赛数时按 M串N 规则；N 为 1 且 M 小于比赛数时为自由过关，即所有 M 场组合。
+    """
+    key = parlay_type.replace("串", "_")
+    try:
+        m, n = (int(part) for part in key.split("_"))
+    except ValueError:
+        raise ValueError(f"无法识别的过关方式: {parlay_type}")
+    if m == match_count and key in PARLAY_TYPES:
+        return PARLAY_TYPES[key]
+    if n == 1 and 1 <= m <= match_count:
+        return (m,)
+    raise ValueError(f"{parlay_type} 不适用于 {match_count} 场比赛")
+
+
+def elementary_symmetric(values: Sequence[float], max_degree: int) -> List[float]:
+    """e_0..e_max_degree：从 values 中任取 k 个相乘再求和。
+
+    M串N 的注数与奖金都是它：每场取一个选项组成一注，注数为 e_k(每场选项数)，
+    所有注的赔率乘积之和为 e_k(每场赔率之和)。O(n·k)，无需枚举组合。
+    """
+    e = [1.0] + [0.0] * max_degree
+    for value in values:
+        for k in range(max_degree, 0, -1):
+            e[k] += e[k - 1] * value
+    return e
+
+
+def best_winning_odds(legs: Sequence[Leg]) -> float:
+    """单场比赛中各选项可能同时命中的最大赔率之和（不同玩法的选项可能在同一赛果下同时命中）"""
+    if len(legs) == 1 or len({leg.market for leg in legs}) == 1:
+        return max(leg.odds for leg in legs)
+    best = 0.0
+    for home, away, half in iter_outcomes():
+        total = sum(leg.odds for leg in legs if leg.wins(home, away, half))
+        best = max(best, total)
+    return best
+
+
+def group_by_match(legs: Iterable[Leg]) -> List[List[Leg]]:
+    groups: Dict[str, List[Leg]] = {}
+    for leg in legs:
+        groups.setdefault(leg.match_id, []).append(leg)
+    return list(groups.values())
+
+
+def evaluate(groups: Sequence[Sequence[Leg]], sizes: Sequence[int], multiple: int = 1) -> Dict:
+    """计算注数、总投注额与奖金范围（奖金均已乘以单注金额与倍数）"""
+    top = max(sizes)
+    counts = elementary_symmetric([len(group) for group in groups], top)
+    best = elementary_symmetric([best_winning_odds(group) for group in groups], top)
+    ticket_count = int(sum(counts[size] for size in sizes))
+    unit = UNIT_STAKE * multiple
+    # 最小奖金：只命中最少场数的一注，且每场命中的是赔率最低的选项
+    smallest = sorted(min(leg.odds for leg in group) for group in groups)[: min(sizes)]
+    min_odds = 1.0
+    for odds in smallest:
+        min_odds *= odds
+    return {
+        "ticketCount": ticket_count,
+        "totalStake": ticket_count * unit,
+        "minPayout": round(unit * min_odds, 2),
+        "maxPayout": round(unit * sum(best[size] for size in sizes), 2),
+    }
+
+
+def iter_tickets(groups: Sequence[Sequence[Leg]], sizes: Sequence[int]) -> Iterator[Tuple[Leg, ...]]:
+    """逐注生成所有组合，不预先展开"""
+    for size in sorted(sizes):
+        for chosen in itertools.combinations(groups, size):
+            yield from itertools.product(*chosen)
+
+
+def ticket_odds(ticket: Sequence[Leg]) -> float:
+    odds = 1.0
+    for leg in ticket:
+        odds *= leg.odds
+    return odds
+
@@ -0,0 +1,256 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+
+class PoolTimeoutError(RuntimeError):
+    """等待可用连接超时"""
+
+
+class PooledConnection:
+    """池中连接及其生命周期信息"""
+
+    __slots__ = ("conn", "created_at", "last_used", "temporary")
+
+    def __init__(self, conn: Any, temporary: bool = False):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.temporary = temporary
+
+
+class _PoolStats:
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.created = 0
+        self.recycled = 0
+        self.discarded = 0
+
+    def checked_out(self) -> None:
+        self.checkouts += 1
+        self.in_use += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "checkouts": self.checkouts,
+            "waits": self.waits,
+            "waitMs": round(self.wait_seconds * 1000, 1),
+            "timeouts": self.timeouts,
+            "inUse": self.in_use,
+            "peakInUse": self.peak_in_use,
+            "created": self.created,
+            "recycled": self.recycled,
+            "discarded": self.discarded,
+        }
+
+
+def _close_quietly(conn: Any) -> None:
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+class ConnectionPool:
+    """固定容量的连接池（MySQL）。
+
+    归还的连接放回空闲队列复用；取出时超过 recycle 秒的连接会重建，
+    空闲超过 ping_interval 秒的连接会先做健康检查。池满时最多等待 timeout 秒。
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        size: int,
+        timeout: float,
+        recycle: float,
+        ping_interval: float,
+        ping: Optional[Callable[[Any], None]] = None,
+    ):
+        self._connect = connect
+        self._ping = ping
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_interval = ping_interval
+        self._idle: Deque[PooledConnection] = deque()
+        self._total = 0
+        self._cond = threading.Condition()
+        self._stats = _PoolStats()
+
+    def _create(self) -> PooledConnection:
+        entry = PooledConnection(self._connect())
+        self._stats.created += 1
+        return entry
+
+    def acquire(self) -> PooledConnection:
+        started = time.monotonic()
+        deadline = started + self.timeout
+        with self._cond:
+            waited = False
+            while not self._idle and self._total >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats.timeouts += 1
+                    raise PoolTimeoutError(f"等待数据库连接超时（{self.timeout}s，连接池容量 {self.size}）")
+                waited = True
+                self._cond.wait(remaining)
+            if waited:
+                self._stats.waits += 1
+                self._stats.wait_seconds += time.monotonic() - started
+            entry = self._idle.pop() if self._idle else None
+            if entry is None:
+                self._total += 1
+            self._stats.checked_out()
+        try:
+            return self._prepare(entry)
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._stats.in_use -= 1
+                self._cond.notify()
+            raise
+
+    def _prepare(self, entry: Optional[PooledConnection]) -> PooledConnection:
+        """在锁外完成建连、回收与健康检查"""
+        if entry is None:
+            return self._create()
+        now = time.monotonic()
+        if self.recycle and now - entry.created_at > self.recycle:
+            _close_quietly(entry.conn)
+            self._stats.recycled += 1
+            return self._create()
+        if self._ping and now - entry.last_used > self.ping_interval:
+            try:
+                self._ping(entry.conn)
+            except Exception:
+                _close_quietly(entry.conn)
+                self._stats.discarded += 1
+                return self._create()
+        return entry
+
+    def release(self, entry: PooledConnection, discard: bool = False) -> None:
+        with self._cond:
+            self._stats.in_use -= 1
+            if discard:
+                self._total -= 1
+                self._stats.discarded += 1
+            else:
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+            self._cond.notify()
+        if discard:
+            _close_quietly(entry.conn)
+
+    def close(self) -> None:
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._total -= len(idle)
+        for entry in idle:
+            _close_quietly(entry.conn)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            data = self._stats.as_dict()
+            data.update({"type": "pool", "size": self.size, "open": self._total, "idle": len(self._idle)})
+            return data
+
+
+class ThreadLocalConnections:
+    """每个线程复用一个连接（SQLite）。
+
+    SQLite 连接不适合跨线程共享，这里为每个线程缓存一个连接；同一线程内嵌套
+    获取时临时新建连接，避免内层提交影响外层事务。超过 recycle 秒的连接会重建。
+    线程池的工作线程空闲后会退出（AnyIO 为 10 秒），新建连接与读取统计时关闭已退出线程留下的连接。
+    """
+
+    def __init__(self, connect: Callable[[], Any], recycle: float):
+        self._connect = connect
+        self.recycle = recycle
+        self._local = threading.local()
+        # 连接 -> 所属线程
+        self._entries: Dict[PooledConnection, threading.Thread] = {}
+        self._lock = threading.Lock()
+        self._stats = _PoolStats()
+
+    def _create(self, temporary: bool = False) -> PooledConnection:
+        if not temporary:
+            self._prune()
+        entry = PooledConnection(self._connect(), temporary=temporary)
+        with self._lock:
+            self._stats.created += 1
+            if not temporary:
+                self._entries[entry] = threading.current_thread()
+        return entry
+
+    def _drop(self, entry: PooledConnection) -> None:
+        with self._lock:
+            self._entries.pop(entry, None)
+        _close_quietly(entry.conn)
+
+    def _prune(self) -> None:
+        """关闭所属线程已退出的连接"""
+        with self._lock:
+            dead = [entry for entry, owner in self._entries.items() if not owner.is_alive()]
+            for entry in dead:
+                del self._entries[entry]
+        for entry in dead:
+            _close_quietly(entry.conn)
+
+    def acquire(self) -> PooledConnection:
+        local = self._local
+        if getattr(local, "busy", False):
+            entry = self._create(temporary=True)
+        else:
+            entry = getattr(local, "entry", None)
+            if entry is not None and entry not in self._entries:
+                # 已被 close() 关闭
+                entry = None
+            if entry is not None and self.recycle and time.monotonic() - entry.created_at > self.recycle:
+                self._drop(entry)
+                with self._lock:
+                    self._stats.recycled += 1
+                entry = None
+            if entry is None:
+                entry = self._create()
+                local.entry = entry
+            local.busy = True
+        with self._lock:
+            self._stats.checked_out()
+        return entry
+
+    def release(self, entry: PooledConnection, discard: bool = False) -> None:
+        with self._lock:
+            self._stats.in_use -= 1
+            if discard:
+                self._stats.discarded += 1
+        if entry.temporary:
+            _close_quietly(entry.conn)
+            return
+        self._local.busy = False
+        entry.last_used = time.monotonic()
+        if discard:
+            self._local.entry = None
+            self._drop(entry)
+
+    def close(self) -> None:
+        with self._lock:
+            entries = list(self._entries)
+            self._entries.clear()
+        for entry in entries:
+            _close_quietly(entry.conn)
+
+    def stats(self) -> Dict[str, Any]:
+        self._prune()
+        with self._lock:
+            data = self._stats.as_dict()
+            data.update({"type": "thread_local", "open": len(self._entries)})
+            return data
@@ -1,8 +1,18 @@
+import base64
+import json
+import logging
+import time
 from datetime import datetime
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 from . import settings
-from .database import get_db, update_sync_status
+from .cache import cached, read_cache, snapshot_cache
+from .database import get_db, iter_query, update_sync_status
+from .history import HistoryPoint
+from .metrics import observe, sync_rows_written, sync_write_seconds, timed_query
+from .slate import PLAY_TABLES, Slate, slate_store
+
+logger = logging.getLogger(__name__)
 
 
 def _get_placeholder():
@@ -20,236 +30,583 @@ def _execute(conn, sql: str, params=None):
         return conn.execute(sql, params or ())
 
 
-class OddsRepository:
-    def upsert_match(self, match: Dict[str, Any]) -> None:
-        fields = [
-            "match_id",
-            "match_number",
-            "match_code",
-            "project_type",
-            "league_id",
-            "league_name",
-            "league_full_name",
-            "match_date",
-            "match_time",
-            "match_timestamp",
-            "home_team_id",
-            "home_team_name",
-            "home_team_rank",
-            "away_team_id",
-            "away_team_name",
-            "away_team_rank",
+def _executemany(conn, sql: str, rows: Sequence[Sequence[Any]]) -> None:
+    """批量执行SQL语句，兼容MySQL和SQLite"""
+    if settings.DB_TYPE == "mysql":
+        with conn.cursor() as cursor:
+            cursor.executemany(sql, rows)
+    else:
+        conn.executemany(sql, rows)
+
+
+# 各表的写入列与唯一键，按写入顺序排列（matches 必须先于赔率表写入以满足外键）
+MATCH_FIELDS = (
+    "match_id",
+    "match_number",
+    "match_code",
+    "project_type",
+    "league_id",
+    "league_name",
+    "league_full_name",
+    "match_date",
+    "match_time",
+    "match_timestamp",
+    "home_team_id",
+    "home_team_name",
+    "home_team_rank",
+    "away_team_id",
+    "away_team_name",
+    "away_team_rank",
+    "is_single",
+    "match_status",
+    "notice",
+    "odds_update_time",
+)
+
+# 比赛结果的写入列，status 为 finished（比分已确定）或 cancelled
+RESULT_FIELDS = ("match_id", "match_date", "home_score", "away_score", "half_home_score", "half_away_score", "status")
+
+# 归档时随比赛一并删除的表（均以 match_id 关联）
+ARCHIVE_CHILD_TABLES = (
+    "odds_win_draw_lose",
+    "odds_correct_score",
+    "odds_total_goals",
+    "odds_half_full_time",
+    "odds_history",
+    "sync_fingerprints",
+)
+
+# 赛事列表排序键（末位 match_id 保证唯一），写入时空值统一存为 ''，便于索引与游标比较
+MATCH_ORDER_FIELDS = ("match_date", "match_time", "match_code", "match_id")
+MATCH_ORDER_SQL = "ORDER BY " + ", ".join(f"{name} ASC" for name in MATCH_ORDER_FIELDS)
+_NORMALIZED_FIELDS = frozenset(MATCH_ORDER_FIELDS)
+
+UPSERT_SPECS: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+    "matches": (MATCH_FIELDS, ("match_id",)),
+    "odds_win_draw_lose": (
+        (
+            "match_id", "odds_type", "handicap",
+            "win_odds", "draw_odds", "lose_odds",
+            "win_support", "draw_support", "lose_support",
             "is_single",
-            "match_status",
-            "notice",
-            "odds_update_time",
-        ]
-        columns = ", ".join(fields)
-        values = [match.get(f) for f in fields]
-        ph = _get_placeholder()
-        
-        if settings.DB_TYPE == "mysql":
-            # MySQL语法
-            update_placeholders = ", ".join([f"{f}=VALUES({f})" for f in fields if f != "match_id"])
-            sql = f"""
-                INSERT INTO matches ({columns}) VALUES ({', '.join([ph] * len(fields))})
-                ON DUPLICATE KEY UPDATE {update_placeholders}, updated_at = CURRENT_TIMESTAMP
-            """
-        else:
-            # SQLite语法
-            update_placeholders = ", ".join([f"{f}=excluded.{f}" for f in fields if f != "match_id"])
-            sql = f"""
-                INSERT INTO matches ({columns}) VALUES ({', '.join([ph] * len(fields))})
-                ON CONFLICT(match_id) DO UPDATE SET {update_placeholders}, updated_at = CURRENT_TIMESTAMP
-            """
-        
+        ),
+        ("match_id", "odds_type"),
+    ),
+    "odds_correct_score": (
+        ("match_id", "result_type", "home_score", "away_score", "score_label", "odds", "is_other"),
+        ("match_id", "result_type", "home_score", "away_score", "is_other"),
+    ),
+    "odds_total_goals": (
+        ("match_id", "goal_range", "min_goals", "max_goals", "odds"),
+        ("match_id", "goal_range"),
+    ),
+    "odds_half_full_time": (
+        ("match_id", "half_result", "full_result", "result_label", "odds"),
+        ("match_id", "half_result", "full_result"),
+    ),
+    "sync_fingerprints": (
+        ("match_id", "pool_name", "fingerprint"),
+        ("match_id", "pool_name"),
+    ),
+    "match_results": (RESULT_FIELDS, ("match_id",)),
+}
+
+# IN (...) 查询单次携带的参数上限，避免超出 SQLite 变量数限制
+_IN_CHUNK_SIZE = 500
+
+
+def _chunks(items: Sequence[Any], size: int = _IN_CHUNK_SIZE) -> Iterable[Sequence[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _upsert_sql(table: str) -> str:
+    """生成指定表的 upsert 语句（MySQL 使用 ON DUPLICATE KEY，SQLite 使用 ON CONFLICT）"""
+    fields, keys = UPSERT_SPECS[table]
+    ph = _get_placeholder()
+    columns = ", ".join(fields)
+    values = ", ".join([ph] * len(fields))
+    update_fields = [f for f in fields if f not in keys]
+
+    if settings.DB_TYPE == "mysql":
+        updates = ", ".join([f"{f}=VALUES({f})" for f in update_fields])
+        return f"""
+            INSERT INTO {table} ({columns}, updated_at) VALUES ({values}, CURRENT_TIMESTAMP)
+            ON DUPLICATE KEY UPDATE {updates}, updated_at=CURRENT_TIMESTAMP
+        """
+    updates = ", ".join([f"{f}=excluded.{f}" for f in update_fields])
+    return f"""
+        INSERT INTO {table} ({columns}, updated_at) VALUES ({values}, CURRENT_TIMESTAMP)
+        ON CONFLICT({', '.join(keys)}) DO UPDATE SET {updates}, updated_at=CURRENT_TIMESTAMP
+    """
+
+
+def _delete_other_scores(conn, match_ids: Iterable[str]) -> None:
+    """删除比分"其他"项。
+
+    "胜其他/平其他/负其他" 的 home_score/away_score 为 NULL，唯一约束无法命中，
+    直接 upsert 会在每次同步时重复插入，因此写入前先按比赛清理。
+    """
+    ph = _get_placeholder()
+    _executemany(
+        conn,
+        f"DELETE FROM odds_correct_score WHERE match_id = {ph} AND is_other = 1",
+        [(match_id,) for match_id in match_ids],
+    )
+
+
+def _float(value: Any) -> Optional[float]:
+    """MySQL DECIMAL 列返回 Decimal，统一转为 float"""
+    return None if value is None else float(value)
+
+
+def _match_row(match: Dict[str, Any]) -> Tuple:
+    return tuple(
+        "" if f in _NORMALIZED_FIELDS and match.get(f) is None else match.get(f)
+        for f in MATCH_FIELDS
+    )
+
+
+def _wdl_row(item: Dict[str, Any]) -> Tuple:
+    return (
+        item.get("match_id"),
+        item.get("odds_type"),
+        item.get("handicap"),
+        item.get("win_odds"),
+        item.get("draw_odds"),
+        item.get("lose_odds"),
+        item.get("win_support"),
+        item.get("draw_support"),
+        item.get("lose_support"),
+        item.get("is_single", 0),
+    )
+
+
+def _score_row(match_id: str, row: Dict[str, Any]) -> Tuple:
+    return (
+        match_id,
+        row.get("result_type"),
+        row.get("home_score"),
+        row.get("away_score"),
+        row.get("score_label"),
+        row.get("odds"),
+        row.get("is_other", 0),
+    )
+
+
+def _goals_row(match_id: str, row: Dict[str, Any]) -> Tuple:
+    return (
+        match_id,
+        row.get("goal_range"),
+        row.get("min_goals"),
+        row.get("max_goals"),
+        row.get("odds"),
+    )
+
+
+def _hafu_row(match_id: str, row: Dict[str, Any]) -> Tuple:
+    return (
+        match_id,
+        row.get("half_result"),
+        row.get("full_result"),
+        row.get("result_label"),
+        row.get("odds"),
+    )
+
+
+def _match_filters(date: Optional[str], league: Optional[str]) -> Tuple[str, List[Any]]:
+    """赛事列表的过滤条件：未指定日期时只取未开赛的比赛，且默认排除已结束和已取消的比赛"""
+    where = []
+    params: List[Any] = []
+    ph = _get_placeholder()
+    
+    if date:
+        where.append(f"match_date = {ph}")
+        params.append(date)
+    if league:
+        where.append(f"league_name = {ph}")
+        params.append(league)
+    
+    if not date:
+        today = datetime.now().strftime("%Y-%m-%d")
+        where.append(f"(match_date IS NULL OR match_date = '' OR match_date >= {ph})")
+        params.append(today)
+        now_ts = int(datetime.now().timestamp())
+        where.append(f"(match_timestamp IS NULL OR match_timestamp >= {ph})")
+        params.append(now_ts)
+    
+    # 默认只展示在售或未开赛的赛事
+    where.append("(match_status IS NULL OR match_status NOT IN ('finished', 'cancelled'))")
+    return f"WHERE {' AND '.join(where)}", params
+
+
+def _insert_history(conn, points: Sequence[Tuple[str, str, int, str]]) -> None:
+    ph = _get_placeholder()
+    if settings.DB_TYPE == "mysql":
+        sql = f"""
+            INSERT INTO odds_history (match_id, market, ts, prices) VALUES ({ph}, {ph}, {ph}, {ph})
+            ON DUPLICATE KEY UPDATE prices=VALUES(prices)
+        """
+    else:
+        sql = f"""
+            INSERT INTO odds_history (match_id, market, ts, prices) VALUES ({ph}, {ph}, {ph}, {ph})
+            ON CONFLICT(match_id, market, ts) DO UPDATE SET prices=excluded.prices
+        """
+    _executemany(conn, sql, points)
+
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    """由一页最后一行的排序键生成不透明游标"""
+    key = [row.get(name) or "" for name in MATCH_ORDER_FIELDS]
+    raw = json.dumps(key, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[str]:
+    """解析游标，格式不正确时抛出 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw.decode("utf-8"))
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("无效的分页游标") from exc
+    if not isinstance(key, list) or len(key) != len(MATCH_ORDER_FIELDS) or not all(isinstance(v, str) for v in key):
+        raise ValueError("无效的分页游标")
+    return key
+
+
+class SyncBatch:
+    """同步写入单元（unit of work）。
+
+    解析阶段只往这里追加行，最后由 ``OddsRepository.write_batch`` 在一个连接、
+    一个事务内通过 executemany 一次性落库。可以承载单个玩法池，也可以承载整次同步。
+    行元组与各玩法的价格向量由 ``scraper.markets`` 中的解析表生成，价格向量用于追加赔率历史。
+    """
+
+    def __init__(self, ts: Optional[int] = None) -> None:
+        self.ts = ts if ts is not None else int(time.time())
+        self.rows: Dict[str, List[Tuple]] = {table: [] for table in UPSERT_SPECS}
+        self.score_match_ids: List[str] = []
+        self.history: Dict[Tuple[str, str], str] = {}
+        # 写入后填充：价格发生变化的 (match_id, market, ts, prices)
+        self.price_changes: List[Tuple[str, str, int, str]] = []
+
+    def add_rows(self, table: str, rows: Sequence[Tuple]) -> None:
+        """追加某张表的行元组（列顺序同 UPSERT_SPECS）"""
+        if table == "odds_correct_score" and rows:
+            self.score_match_ids.append(rows[0][0])
+        self.rows[table].extend(rows)
+
+    def add_history(self, match_id: str, market: str, vector: Optional[str]) -> None:
+        """记录某场比赛某个玩法本次的价格向量（见 history.MARKET_SELECTIONS），为空时忽略"""
+        if vector is not None:
+            self.history[(match_id, market)] = vector
+
+    def add_fingerprint(self, match_id: str, pool_name: str, fingerprint: str) -> None:
+        self.rows["sync_fingerprints"].append((match_id, pool_name, fingerprint))
+
+    def __len__(self) -> int:
+        return sum(len(rows) for rows in self.rows.values())
+
+
+class OddsRepository:
+    @timed_query
+    def write_batch(self, batch: SyncBatch) -> Dict[str, int]:
+        """在单个事务内写入整批数据，返回各表写入行数"""
+        written: Dict[str, int] = {}
+        if not len(batch):
+            return written
         with get_db() as conn:
-            _execute(conn, sql, values)
+            if batch.score_match_ids:
+                with observe(sync_write_seconds, "odds_correct_score_cleanup"):
+                    _delete_other_scores(conn, batch.score_match_ids)
+            for table, rows in batch.rows.items():
+                if rows:
+                    with observe(sync_write_seconds, table):
+                        _executemany(conn, _upsert_sql(table), rows)
+                    written[table] = len(rows)
+            if batch.history:
+                with observe(sync_write_seconds, "odds_history"):
+                    batch.price_changes = self._append_history(conn, batch.ts, batch.history)
+                if batch.price_changes:
+                    written["odds_history"] = len(batch.price_changes)
+        for table, count in written.items():
+            sync_rows_written.inc(table, amount=count)
+        return written
 
-    def upsert_odds_wdl(self, item: Dict[str, Any]) -> None:
+    def _append_history(self, conn, ts: int, vectors: Dict[Tuple[str, str], str]) -> List[Tuple[str, str, int, str]]:
+        """只为价格与最近一个历史点不同的 (比赛, 玩法) 追加新点，返回追加的点"""
         ph = _get_placeholder()
-        
-        if settings.DB_TYPE == "mysql":
-            sql = f"""
-                INSERT INTO odds_win_draw_lose (
-                    match_id, odds_type, handicap,
-                    win_odds, draw_odds, lose_odds,
-                    win_support, draw_support, lose_support,
-                    is_single, updated_at
-                ) VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph}, CURRENT_TIMESTAMP)
-                ON DUPLICATE KEY UPDATE
-                    handicap=VALUES(handicap),
-                    win_odds=VALUES(win_odds),
-                    draw_odds=VALUES(draw_odds),
-                    lose_odds=VALUES(lose_odds),
-                    win_support=VALUES(win_support),
-                    draw_support=VALUES(draw_support),
-                    lose_support=VALUES(lose_support),
-                    is_single=VALUES(is_single),
-                    updated_at=CURRENT_TIMESTAMP
-            """
-        else:
+        match_ids = sorted({match_id for match_id, _ in vectors})
+        latest: Dict[Tuple[str, str], str] = {}
+        for chunk in _chunks(match_ids):
+            placeholders = ",".join([ph] * len(chunk))
+            # 子查询按 (match_id, market) 取最大 ts，可直接走主键索引
             sql = f"""
-                INSERT INTO odds_win_draw_lose (
-                    match_id, odds_type, handicap,
-                    win_odds, draw_odds, lose_odds,
-                    win_support, draw_support, lose_support,
-                    is_single, updated_at
-                ) VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph}, CURRENT_TIMESTAMP)
-                ON CONFLICT(match_id, odds_type)
-                DO UPDATE SET
-                    handicap=excluded.handicap,
-                    win_odds=excluded.win_odds,
-                    draw_odds=excluded.draw_odds,
-                    lose_odds=excluded.lose_odds,
-                    win_support=excluded.win_support,
-                    draw_support=excluded.draw_support,
-                    lose_support=excluded.lose_support,
-                    is_single=excluded.is_single,
-                    updated_at=CURRENT_TIMESTAMP
+                SELECT h.match_id, h.market, h.prices FROM odds_history h
+                JOIN (
+                    SELECT match_id, market, MAX(ts) AS ts FROM odds_history
+                    WHERE match_id IN ({placeholders}) GROUP BY match_id, market
+                ) l ON h.match_id = l.match_id AND h.market = l.market AND h.ts = l.ts
             """
-        
-        values = [
-            item.get("match_id"),
-            item.get("odds_type"),
-            item.get("handicap"),
-            item.get("win_odds"),
-            item.get("draw_odds"),
-            item.get("lose_odds"),
-            item.get("win_support"),
-            item.get("draw_support"),
-            item.get("lose_support"),
-            item.get("is_single", 0),
+            for match_id, market, prices in iter_query(conn, sql, chunk):
+                latest[(match_id, market)] = prices
+        points = [
+            (match_id, market, ts, prices)
+            for (match_id, market), prices in vectors.items()
+            if latest.get((match_id, market)) != prices
         ]
+        if points:
+            _insert_history(conn, points)
+        return points
+
+    @timed_query
+    def insert_history(self, points: Iterable[Tuple[str, str, int, str]], batch_size: int = 5000) -> int:
+        """直接写入历史点 (match_id, market, ts, prices)，不做去重比较，用于导入与生成基准数据。
+        每 batch_size 个点一个事务，返回写入点数
+        """
+        total = 0
+        batch: List[Tuple[str, str, int, str]] = []
+        for point in points:
+            batch.append(point)
+            if len(batch) >= batch_size:
+                with get_db() as conn:
+                    _insert_history(conn, batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            with get_db() as conn:
+                _insert_history(conn, batch)
+            total += len(batch)
+        return total
+
+    @timed_query
+    def upsert_match(self, match: Dict[str, Any]) -> None:
         with get_db() as conn:
-            _execute(conn, sql, values)
+            _execute(conn, _upsert_sql("matches"), _match_row(match))
 
+    @timed_query
+    def upsert_odds_wdl(self, item: Dict[str, Any]) -> None:
+        with get_db() as conn:
+            _execute(conn, _upsert_sql("odds_win_draw_lose"), _wdl_row(item))
+
+    @timed_query
     def upsert_odds_score_bulk(self, match_id: str, rows: Iterable[Dict[str, Any]]) -> None:
-        rows = list(rows)
-        if not rows:
+        values = [_score_row(match_id, row) for row in rows]
+        if not values:
             return
-        
-        ph = _get_placeholder()
-        
-        if settings.DB_TYPE == "mysql":
-            sql = f"""
-                INSERT INTO odds_correct_score (
-                    match_id, result_type, home_score, away_score, score_label, odds, is_other, updated_at
-                ) VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph}, CURRENT_TIMESTAMP)
-                ON DUPLICATE KEY UPDATE
-                    odds=VALUES(odds),
-                    score_label=VALUES(score_label),
-                    updated_at=CURRENT_TIMESTAMP
-            """
-        else:
-            sql = f"""
-                INSERT INTO odds_correct_score (
-                    match_id, result_type, home_score, away_score, score_label, odds, is_other, updated_at
-                ) VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph}, CURRENT_TIMESTAMP)
-                ON CONFLICT(match_id, result_type, home_score, away_score, is_other)
-                DO UPDATE SET
-                    odds=excluded.odds,
-                    score_label=excluded.score_label,
-                    updated_at=CURRENT_TIMESTAMP
-            """
-        
         with get_db() as conn:
-            for row in rows:
-                _execute(conn, sql, (
-                    match_id,
-                    row.get("result_type"),
-                    row.get("home_score"),
-                    row.get("away_score"),
-                    row.get("score_label"),
-                    row.get("odds"),
-                    row.get("is_other", 0),
-                ))
+            _delete_other_scores(conn, [match_id])
+            _executemany(conn, _upsert_sql("odds_correct_score"), values)
 
+    @timed_query
     def upsert_odds_goals_bulk(self, match_id: str, rows: Iterable[Dict[str, Any]]) -> None:
-        rows = list(rows)
-        if not rows:
+        values = [_goals_row(match_id, row) for row in rows]
+        if not values:
             return
-        
-        ph = _get_placeholder()
-        
-        if settings.DB_TYPE == "mysql":
-            sql = f"""
-                INSERT INTO odds_total_goals (
-                    match_id, goal_range, min_goals, max_goals, odds, updated_at
-                ) VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, CURRENT_TIMESTAMP)
-                ON DUPLICATE KEY UPDATE
-                    min_goals=VALUES(min_goals),
-                    max_goals=VALUES(max_goals),
-                    odds=VALUES(odds),
-                    updated_at=CURRENT_TIMESTAMP
-            """
-        else:
-            sql = f"""
-                INSERT INTO odds_total_goals (
-                    match_id, goal_range, min_goals, max_goals, odds, updated_at
-                ) VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, CURRENT_TIMESTAMP)
-                ON CONFLICT(match_id, goal_range)
-                DO UPDATE SET
-                    min_goals=excluded.min_goals,
-                    max_goals=excluded.max_goals,
-                    odds=excluded.odds,
-                    updated_at=CURRENT_TIMESTAMP
-            """
-        
         with get_db() as conn:
-            for row in rows:
-                _execute(conn, sql, (
-                    match_id,
-                    row.get("goal_range"),
-                    row.get("min_goals"),
-                    row.get("max_goals"),
-                    row.get("odds"),
-                ))
+            _executemany(conn, _upsert_sql("odds_total_goals"), values)
 
+    @timed_query
     def upsert_odds_hafu_bulk(self, match_id: str, rows: Iterable[Dict[str, Any]]) -> None:
-        rows = list(rows)
-        if not rows:
+        values = [_hafu_row(match_id, row) for row in rows]
+        if not values:
             return
-        
+        with get_db() as conn:
+            _executemany(conn, _upsert_sql("odds_half_full_time"), values)
+
+    @timed_query
+    def load_fingerprints(self, match_ids: Sequence[str]) -> Dict[Tuple[str, str], str]:
+        """读取指定比赛各玩法池上次写入时的内容指纹"""
         ph = _get_placeholder()
-        
-        if settings.DB_TYPE == "mysql":
-            sql = f"""
-                INSERT INTO odds_half_full_time (
-                    match_id, half_result, full_result, result_label, odds, updated_at
-                ) VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, CURRENT_TIMESTAMP)
-                ON DUPLICATE KEY UPDATE
-                    result_label=VALUES(result_label),
-                    odds=VALUES(odds),
-                    updated_at=CURRENT_TIMESTAMP
-            """
-        else:
-            sql = f"""
-                INSERT INTO odds_half_full_time (
-                    match_id, half_result, full_result, result_label, odds, updated_at
-                ) VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, CURRENT_TIMESTAMP)
-                ON CONFLICT(match_id, half_result, full_result)
-                DO UPDATE SET
-                    result_label=excluded.result_label,
-                    odds=excluded.odds,
-                    updated_at=CURRENT_TIMESTAMP
-            """
-        
+        result: Dict[Tuple[str, str], str] = {}
+        with get_db() as conn:
+            for chunk in _chunks(list(match_ids)):
+                placeholders = ",".join([ph] * len(chunk))
+                cur = _execute(
+                    conn,
+                    f"SELECT match_id, pool_name, fingerprint FROM sync_fingerprints WHERE match_id IN ({placeholders})",
+                    chunk,
+                )
+                for row in cur.fetchall():
+                    result[(row["match_id"], row["pool_name"])] = row["fingerprint"]
+        return result
+
+    @timed_query
+    def list_kickoffs(self, since: int) -> List[int]:
+        """未开赛比赛中开赛时间不早于 since 的开赛时间戳（升序），用于安排同步计划"""
+        ph = _get_placeholder()
+        with get_db() as conn:
+            sql = (
+                f"SELECT match_timestamp FROM matches WHERE match_status = 'not_started' "
+                f"AND match_timestamp >= {ph} ORDER BY match_timestamp"
+            )
+            return [row[0] for row in iter_query(conn, sql, (since,))]
+
+    @timed_query
+    def finalize_sync(self, total_matches: Optional[int], total_odds: Optional[int], changes: Optional[Dict[str, int]] = None) -> None:
+        """记录同步完成，重建内存赛程并让读缓存与响应快照失效；总数为 None 时保留上次的值（只同步了部分玩法池或比赛）"""
         with get_db() as conn:
-            for row in rows:
-                _execute(conn, sql, (
-                    match_id,
-                    row.get("half_result"),
-                    row.get("full_result"),
-                    row.get("result_label"),
-                    row.get("odds"),
+            update_sync_status(conn, total_matches, total_odds, changes)
+        # 先替换内存赛程再清空缓存，避免缓存在新的同步代内写入旧数据
+        self.refresh_slate()
+        read_cache.bump_generation()
+        snapshot_cache.bump_generation()
+
+    @timed_query
+    def load_slate(self) -> Slate:
+        """从数据库构建当前赛程：未结束（未取消）且比赛日期不早于今天的比赛及其全部玩法赔率，每张表一次查询"""
+        ph = _get_placeholder()
+        today = datetime.now().strftime("%Y-%m-%d")
+        scope = (
+            f"(match_date IS NULL OR match_date = '' OR match_date >= {ph}) "
+            "AND (match_status IS NULL OR match_status NOT IN ('finished', 'cancelled'))"
+        )
+        scope_ids = f"SELECT match_id FROM matches WHERE {scope}"
+        with get_db() as conn:
+            status = _execute(conn, "SELECT last_synced_at FROM sync_status WHERE id = 1").fetchone()
+            latest = _execute(conn, "SELECT MAX(match_number) AS latest_issue FROM matches").fetchone()
+            cur = _execute(conn, f"SELECT * FROM matches WHERE {scope}", (today,))
+            match_columns = [column[0] for column in cur.description]
+            match_rows = [tuple(row[name] for name in match_columns) for row in cur.fetchall()]
+            cur = _execute(conn, f"SELECT * FROM odds_win_draw_lose WHERE match_id IN ({scope_ids}) ORDER BY match_id, id", (today,))
+            wdl_columns = [column[0] for column in cur.description]
+            wdl_rows = [tuple(row[name] for name in wdl_columns) for row in cur.fetchall()]
+            plays = {
+                name: list(iter_query(
+                    conn,
+                    f"SELECT match_id, {', '.join(columns)} FROM {table} WHERE match_id IN ({scope_ids}) ORDER BY match_id, id",
+                    (today,),
                 ))
+                for name, (table, columns) in PLAY_TABLES.items()
+            }
+        synced_at = status["last_synced_at"] if status else None
+        return Slate(
+            MATCH_ORDER_FIELDS,
+            match_columns,
+            match_rows,
+            wdl_columns,
+            wdl_rows,
+            plays,
+            latest_issue=(latest["latest_issue"] if latest else None) or None,
+            today=today,
+            synced_at=str(synced_at) if synced_at else None,
+        )
+
+    def refresh_slate(self) -> None:
+        """重建内存赛程；失败时丢弃旧数据（读取回退到数据库，下次读取时重试构建），不影响同步结果"""
+        if not slate_store.enabled:
+            return
+        try:
+            slate_store.rebuild(self.load_slate)
+        except Exception as exc:
+            slate_store.clear()
+            logger.exception("Rebuild slate failed: %s", exc)
+
+    def _slate(self, match_ids: Sequence[str] = (), date: Optional[str] = None) -> Optional[Slate]:
+        """可以回答本次读取的内存赛程：未启用、日期早于构建当天或 match_ids 中有不在其中的比赛时为 None（回退到数据库）"""
+        if not slate_store.enabled:
+            return None
+        slate = slate_store.get(self.load_slate)
+        served = slate.covers(date) and all(match_id in slate.matches for match_id in match_ids)
+        slate_store.record(served)
+        return slate if served else None
+
+    @timed_query
+    def iter_history(self, match_id: str, market: str, start: int, end: int) -> Iterator[HistoryPoint]:
+        """按时间顺序逐点读取 [start, end] 内的赔率历史。
 
-    def finalize_sync(self, total_matches: int, total_odds: int) -> None:
+        窗口起点之前的最后一个点也会输出（代表窗口开始时的价格），
+        全部通过 (match_id, market, ts) 主键范围扫描完成。
+        """
+        ph = _get_placeholder()
         with get_db() as conn:
-            update_sync_status(conn, total_matches, total_odds)
+            before = list(iter_query(
+                conn,
+                f"SELECT ts, prices FROM odds_history WHERE match_id = {ph} AND market = {ph} AND ts < {ph} "
+                "ORDER BY ts DESC LIMIT 1",
+                (match_id, market, start),
+            ))
+            yield from before
+            yield from iter_query(
+                conn,
+                f"SELECT ts, prices FROM odds_history WHERE match_id = {ph} AND market = {ph} "
+                f"AND ts >= {ph} AND ts <= {ph} ORDER BY ts",
+                (match_id, market, start, end),
+            )
+
+    @timed_query
+    def iter_price_rows(self, match_ids: Sequence[str]) -> Iterator[Tuple[str, str, str, Optional[float]]]:
+        """一次连接逐行读取多场比赛各玩法的当前赔率：(match_id, market, 选项, 赔率)。
 
+        胜平负/让球胜平负展开为 win/draw/lose 与 handicap 四行，选项名与 history.MARKET_SELECTIONS 一致。
+        """
+        slate = self._slate(match_ids)
+        if slate is not None:
+            for match_id, market, selection, odds in slate.price_rows(list(dict.fromkeys(match_ids))):
+                yield match_id, market, selection, _float(odds)
+            return
+        ph = _get_placeholder()
+        queries = (
+            "SELECT match_id, 'crs', score_label, odds FROM odds_correct_score",
+            "SELECT match_id, 'ttg', goal_range, odds FROM odds_total_goals",
+            "SELECT match_id, 'hafu', result_label, odds FROM odds_half_full_time",
+        )
+        with get_db() as conn:
+            for chunk in _chunks(list(match_ids)):
+                placeholders = ",".join([ph] * len(chunk))
+                sql = (
+                    "SELECT match_id, odds_type, handicap, win_odds, draw_odds, lose_odds "
+                    f"FROM odds_win_draw_lose WHERE match_id IN ({placeholders})"
+                )
+                for match_id, market, handicap, win, draw, lose in iter_query(conn, sql, chunk):
+                    yield match_id, market, "win", _float(win)
+                    yield match_id, market, "draw", _float(draw)
+                    yield match_id, market, "lose", _float(lose)
+                    yield match_id, market, "handicap", _float(handicap)
+                for sql in queries:
+                    for match_id, market, selection, odds in iter_query(conn, f"{sql} WHERE match_id IN ({placeholders})", chunk):
+                        yield match_id, market, selection, _float(odds)
+
+    @timed_query
+    def get_prices(self, match_ids: Sequence[str]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """多场比赛各玩法的当前赔率：{match_id: {market: {选项: 赔率}}}，让球玩法额外带 handicap"""
+        result: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for match_id, market, selection, odds in self.iter_price_rows(match_ids):
+            result.setdefault(match_id, {}).setdefault(market, {})[selection] = odds
+        return result
+
+    @timed_query
+    def list_match_ids(self, *, date: Optional[str] = None, league: Optional[str] = None) -> List[str]:
+        """与 list_matches 相同过滤条件下的全部比赛 ID（不分页）"""
+        slate = self._slate(date=date)
+        if slate is not None:
+            return [slate.ordered[position].match_id for position in slate.select(date, league)]
+        where_clause, params = _match_filters(date, league)
+        sql = f"SELECT match_id FROM matches {where_clause} {MATCH_ORDER_SQL}"
+        with get_db() as conn:
+            return [row[0] for row in iter_query(conn, sql, params)]
+
+    @timed_query
+    def get_match_leagues(self, match_ids: Sequence[str]) -> Dict[str, Optional[str]]:
+        slate = self._slate(match_ids)
+        if slate is not None:
+            return {match_id: slate.matches[match_id].league for match_id in match_ids}
+        ph = _get_placeholder()
+        result: Dict[str, Optional[str]] = {}
+        with get_db() as conn:
+            for chunk in _chunks(list(match_ids)):
+                placeholders = ",".join([ph] * len(chunk))
+                sql = f"SELECT match_id, league_name FROM matches WHERE match_id IN ({placeholders})"
+                for match_id, league_name in iter_query(conn, sql, chunk):
+                    result[match_id] = league_name
+        return result
+
+    @cached
+    @timed_query
     def get_latest_issue(self) -> Optional[str]:
+        slate = self._slate()
+        if slate is not None:
+            return slate.latest_issue
         with get_db() as conn:
             cur = _execute(conn, "SELECT MAX(match_number) FROM matches")
             row = cur.fetchone()
@@ -259,6 +616,8 @@ class OddsRepository:
                 return row[0] if row and row[0] else None
 
     # Query helpers for API
+    @cached
+    @timed_query
     def list_matches(
         self,
         *,
@@ -266,54 +625,52 @@ class OddsRepository:
         league: Optional[str] = None,
         page: int = 1,
         page_size: int = 20,
+        cursor: Optional[str] = None,
+        with_total: bool = True,
     ) -> Dict[str, Any]:
-        offset = (page - 1) * page_size
-        where = []
-        params: List[Any] = []
+        """赛事列表。传入 cursor 时按排序键续读（keyset），否则按 page 偏移分页；
+        每次多取一行判断是否还有下一页。total 来自按同步周期缓存的计数，with_total=False 时不计算。
+        """
+        slate = self._slate(date=date)
+        if slate is not None:
+            positions = slate.select(date, league)
+            if cursor:
+                positions = slate.after(positions, decode_cursor(cursor))
+            else:
+                positions = positions[(page - 1) * page_size:]
+            positions = positions[:page_size + 1]
+            has_more = len(positions) > page_size
+            rows = [slate.match_dict(slate.ordered[position], with_wdl=True) for position in positions[:page_size]]
+            return {
+                "items": rows,
+                "total": self.count_matches(date=date, league=league) if with_total else None,
+                "next_cursor": encode_cursor(rows[-1]) if has_more else None,
+            }
+
         ph = _get_placeholder()
-        
-        if date:
-            where.append(f"match_date = {ph}")
-            params.append(date)
-        if league:
-            where.append(f"league_name = {ph}")
-            params.append(league)
-        
         latest_issue = self.get_latest_issue()
-        if not date:
-            today = datetime.now().strftime("%Y-%m-%d")
-            where.append(f"(match_date IS NULL OR match_date >= {ph})")
-            params.append(today)
-            now_ts = int(datetime.now().timestamp())
-            where.append(f"(match_timestamp IS NULL OR match_timestamp >= {ph})")
-            params.append(now_ts)
+        where_clause, params = _match_filters(date, league)
         
-        # 默认只展示在售或未开赛的赛事
-        where.append("(match_status IS NULL OR match_status NOT IN ('finished', 'cancelled'))")
-        where_clause = f"WHERE {' AND '.join(where)}" if where else ""
+        if cursor:
+            key_columns = ", ".join(MATCH_ORDER_FIELDS)
+            key_placeholders = ", ".join([ph] * len(MATCH_ORDER_FIELDS))
+            where_clause += f" AND ({key_columns}) > ({key_placeholders})"
+            params = [*params, *decode_cursor(cursor)]
+            limit_sql, limit_params = f"LIMIT {ph}", (page_size + 1,)
+        else:
+            limit_sql, limit_params = f"LIMIT {ph} OFFSET {ph}", (page_size + 1, (page - 1) * page_size)
         
-        base_sql = (
-            "SELECT * FROM matches "
-            f"{where_clause} "
-            "ORDER BY match_date ASC, COALESCE(match_time, ''), match_code ASC "
-            f"LIMIT {ph} OFFSET {ph}"
-        )
+        base_sql = f"SELECT * FROM matches {where_clause} {MATCH_ORDER_SQL} {limit_sql}"
         
         with get_db() as conn:
-            cur = _execute(conn, base_sql, (*params, page_size, offset))
+            cur = _execute(conn, base_sql, (*params, *limit_params))
             if settings.DB_TYPE == "mysql":
                 rows = cur.fetchall()
             else:
                 rows = [dict(row) for row in cur.fetchall()]
-            
-            count_sql = f"SELECT COUNT(*) as cnt FROM matches {where_clause}"
-            cur = _execute(conn, count_sql, params)
-            count_row = cur.fetchone()
-            if settings.DB_TYPE == "mysql":
-                total = count_row["cnt"] if count_row else 0
-            else:
-                total = count_row[0] if count_row else 0
         
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
         match_ids = [row["match_id"] for row in rows]
         odds_map = self.fetch_wdl_for_matches(match_ids)
         for row in rows:
@@ -323,9 +680,33 @@ class OddsRepository:
             else:
                 row["is_latest_issue"] = 0
         
-        return {"items": rows, "total": total}
+        return {
+            "items": rows,
+            "total": self.count_matches(date=date, league=league) if with_total else None,
+            "next_cursor": encode_cursor(rows[-1]) if has_more else None,
+        }
+
+    @cached
+    @timed_query
+    def count_matches(self, *, date: Optional[str] = None, league: Optional[str] = None) -> int:
+        """赛事总数，随读缓存在每次同步后失效，同一同步周期内只计算一次"""
+        slate = self._slate(date=date)
+        if slate is not None:
+            return len(slate.select(date, league))
+        where_clause, params = _match_filters(date, league)
+        with get_db() as conn:
+            cur = _execute(conn, f"SELECT COUNT(*) as cnt FROM matches {where_clause}", params)
+            count_row = cur.fetchone()
+        if not count_row:
+            return 0
+        return int(count_row["cnt"] if settings.DB_TYPE == "mysql" else count_row[0])
 
+    @cached
+    @timed_query
     def get_match(self, match_id: str) -> Optional[Dict[str, Any]]:
+        slate = self._slate((match_id,))
+        if slate is not None:
+            return slate.match_dict(slate.matches[match_id])
         latest_issue = self.get_latest_issue()
         ph = _get_placeholder()
         
@@ -342,7 +723,12 @@ class OddsRepository:
                 data["is_latest_issue"] = 0
             return data
 
+    @cached
+    @timed_query
     def get_wdl_odds(self, match_id: str) -> Dict[str, Dict[str, Any]]:
+        slate = self._slate((match_id,))
+        if slate is not None:
+            return slate.wdl_odds(slate.matches[match_id])
         ph = _get_placeholder()
         
         with get_db() as conn:
@@ -353,9 +739,13 @@ class OddsRepository:
             else:
                 return {row["odds_type"]: dict(row) for row in rows}
 
+    @timed_query
     def fetch_wdl_for_matches(self, match_ids: List[str]) -> Dict[str, Dict[str, Dict[str, Any]]]:
         if not match_ids:
             return {}
+        slate = self._slate(match_ids)
+        if slate is not None:
+            return {match_id: slate.wdl_odds(slate.matches[match_id]) for match_id in match_ids if slate.matches[match_id].wdl}
         
         ph = _get_placeholder()
         placeholders = ",".join([ph] * len(match_ids))
@@ -373,7 +763,55 @@ class OddsRepository:
                     result.setdefault(match_id, {})[row["odds_type"]] = dict(row)
             return result
 
+    @timed_query
+    def get_plays_bulk(self, match_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """多场比赛的基础信息与五大玩法赔率：{match_id: {"match": 行, "wdl": {...}, "crs": [...], "ttg": [...], "hafu": [...]}}。
+
+        在同一个连接上每张表只执行一次 IN 查询（超过 _IN_CHUNK_SIZE 时分批），
+        各玩法的列与 get_wdl_odds / get_scores / get_total_goals / get_hafu 一致；不存在的比赛不出现在结果中。
+        """
+        ids = list(dict.fromkeys(match_ids))
+        if not ids:
+            return {}
+        slate = self._slate(ids)
+        if slate is not None:
+            return {match_id: slate.plays(slate.matches[match_id]) for match_id in ids}
+        latest_issue = self.get_latest_issue()
+        ph = _get_placeholder()
+        result: Dict[str, Dict[str, Any]] = {}
+        as_dict = dict if settings.DB_TYPE == "sqlite" else (lambda row: row)
+        
+        with get_db() as conn:
+            for chunk in _chunks(ids):
+                placeholders = ",".join([ph] * len(chunk))
+                for row in _execute(conn, f"SELECT * FROM matches WHERE match_id IN ({placeholders})", chunk).fetchall():
+                    data = as_dict(row)
+                    data["is_latest_issue"] = 1 if latest_issue and data.get("match_number") == latest_issue else 0
+                    result[data["match_id"]] = {"match": data, "wdl": {}, "crs": [], "ttg": [], "hafu": []}
+            
+            found = [match_id for match_id in ids if match_id in result]
+            for chunk in _chunks(found):
+                placeholders = ",".join([ph] * len(chunk))
+                for row in _execute(conn, f"SELECT * FROM odds_win_draw_lose WHERE match_id IN ({placeholders})", chunk).fetchall():
+                    data = as_dict(row)
+                    result[data["match_id"]]["wdl"][data["odds_type"]] = data
+                for key, columns, table in (
+                    ("crs", "result_type, home_score, away_score, score_label, odds, is_other", "odds_correct_score"),
+                    ("ttg", "goal_range, min_goals, max_goals, odds", "odds_total_goals"),
+                    ("hafu", "half_result, full_result, result_label, odds", "odds_half_full_time"),
+                ):
+                    sql = f"SELECT match_id, {columns} FROM {table} WHERE match_id IN ({placeholders}) ORDER BY match_id, id"
+                    for row in _execute(conn, sql, chunk).fetchall():
+                        data = as_dict(row)
+                        result[data.pop("match_id")][key].append(data)
+        return result
+
+    @cached
+    @timed_query
     def get_scores(self, match_id: str) -> List[Dict[str, Any]]:
+        slate = self._slate((match_id,))
+        if slate is not None:
+            return slate.play_rows(slate.matches[match_id], "crs")
         ph = _get_placeholder()
         
         with get_db() as conn:
@@ -387,7 +825,12 @@ class OddsRepository:
             else:
                 return [dict(row) for row in rows]
 
+    @cached
+    @timed_query
     def get_total_goals(self, match_id: str) -> List[Dict[str, Any]]:
+        slate = self._slate((match_id,))
+        if slate is not None:
+            return slate.play_rows(slate.matches[match_id], "ttg")
         ph = _get_placeholder()
         
         with get_db() as conn:
@@ -401,7 +844,12 @@ class OddsRepository:
             else:
                 return [dict(row) for row in rows]
 
+    @cached
+    @timed_query
     def get_hafu(self, match_id: str) -> List[Dict[str, Any]]:
+        slate = self._slate((match_id,))
+        if slate is not None:
+            return slate.play_rows(slate.matches[match_id], "hafu")
         ph = _get_placeholder()
         
         with get_db() as conn:
@@ -414,3 +862,133 @@ class OddsRepository:
                 return list(rows)
             else:
                 return [dict(row) for row in rows]
+
+    # 归档 -------------------------------------------------------------------
+    @timed_query
+    def list_archivable(self, before: str, limit: int) -> List[str]:
+        """比赛日期早于 before 的已结束 / 已取消比赛，按日期升序，最多 limit 场（日期为空的比赛不归档）"""
+        ph = _get_placeholder()
+        sql = (
+            "SELECT match_id FROM matches WHERE match_status IN ('finished', 'cancelled') "
+            f"AND match_date <> '' AND match_date < {ph} ORDER BY match_date, match_id LIMIT {ph}"
+        )
+        with get_db() as conn:
+            return [row[0] for row in iter_query(conn, sql, (before, limit))]
+
+    @timed_query
+    def load_archive_records(self, match_ids: Sequence[str]) -> List[Dict[str, Any]]:
+        """多场比赛的归档记录：matches 行、四张赔率表的行（按 id 顺序）与按玩法分组的赔率历史 [[ts, prices], ...]"""
+        ph = _get_placeholder()
+        as_dict = dict if settings.DB_TYPE == "sqlite" else (lambda row: row)
+        records: Dict[str, Dict[str, Any]] = {}
+        with get_db() as conn:
+            for chunk in _chunks(list(match_ids)):
+                placeholders = ",".join([ph] * len(chunk))
+                for row in _execute(conn, f"SELECT * FROM matches WHERE match_id IN ({placeholders})", chunk).fetchall():
+                    data = as_dict(row)
+                    records[data["match_id"]] = {
+                        "match_id": data["match_id"], "match": data,
+                        "wdl": [], "crs": [], "ttg": [], "hafu": [], "history": {},
+                    }
+                for key, table in (("wdl", "odds_win_draw_lose"), *((name, table) for name, (table, _) in PLAY_TABLES.items())):
+                    sql = f"SELECT * FROM {table} WHERE match_id IN ({placeholders}) ORDER BY match_id, id"
+                    for row in _execute(conn, sql, chunk).fetchall():
+                        data = as_dict(row)
+                        records[data["match_id"]][key].append(data)
+                sql = (
+                    f"SELECT match_id, market, ts, prices FROM odds_history WHERE match_id IN ({placeholders}) "
+                    "ORDER BY match_id, market, ts"
+                )
+                for match_id, market, ts, prices in iter_query(conn, sql, chunk):
+                    records[match_id]["history"].setdefault(market, []).append([ts, prices])
+        return [records[match_id] for match_id in match_ids if match_id in records]
+
+    @timed_query
+    def remove_archived(self, entries: Sequence[Tuple[str, str, Optional[str], str]]) -> int:
+        """在一个事务内登记归档索引 (match_id, match_date, league_name, 归档文件)，并从热表删除这些比赛的全部数据"""
+        if not entries:
+            return 0
+        ph = _get_placeholder()
+        verb = "REPLACE INTO" if settings.DB_TYPE == "mysql" else "INSERT OR REPLACE INTO"
+        archived_at = datetime.utcnow().isoformat()
+        match_ids = [entry[0] for entry in entries]
+        with get_db() as conn:
+            _executemany(
+                conn,
+                f"{verb} match_archive (match_id, match_date, league_name, archive_file, archived_at) "
+                f"VALUES ({ph}, {ph}, {ph}, {ph}, {ph})",
+                [(*entry, archived_at) for entry in entries],
+            )
+            for chunk in _chunks(match_ids):
+                placeholders = ",".join([ph] * len(chunk))
+                # matches 最后删除；外键级联之外也显式删除，不依赖连接是否开启外键约束
+                for table in (*ARCHIVE_CHILD_TABLES, "matches"):
+                    _execute(conn, f"DELETE FROM {table} WHERE match_id IN ({placeholders})", chunk)
+        return len(entries)
+
+    @timed_query
+    def list_archived(
+        self,
+        *,
+        date: Optional[str] = None,
+        league: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 20,
+    ) -> Dict[str, Any]:
+        """已归档比赛的索引：{"items": [(match_id, 归档文件)], "total"}，按比赛日期与 ID 排序"""
+        ph = _get_placeholder()
+        where, params = [], []
+        if date:
+            where.append(f"match_date = {ph}")
+            params.append(date)
+        if league:
+            where.append(f"league_name = {ph}")
+            params.append(league)
+        where_clause = f"WHERE {' AND '.join(where)}" if where else ""
+        with get_db() as conn:
+            items = list(iter_query(
+                conn,
+                f"SELECT match_id, archive_file FROM match_archive {where_clause} "
+                f"ORDER BY match_date, match_id LIMIT {ph} OFFSET {ph}",
+                (*params, page_size, (page - 1) * page_size),
+            ))
+            total = next(iter_query(conn, f"SELECT COUNT(*) FROM match_archive {where_clause}", params))[0]
+        return {"items": items, "total": int(total)}
+
+    @timed_query
+    def get_archive_files(self, match_ids: Sequence[str]) -> Dict[str, str]:
+        """已归档比赛所在的归档文件，未归档的比赛不出现在结果中"""
+        ph = _get_placeholder()
+        result: Dict[str, str] = {}
+        with get_db() as conn:
+            for chunk in _chunks(list(match_ids)):
+                placeholders = ",".join([ph] * len(chunk))
+                sql = f"SELECT match_id, archive_file FROM match_archive WHERE match_id IN ({placeholders})"
+                for match_id, archive_file in iter_query(conn, sql, chunk):
+                    result[match_id] = archive_file
+        return result
+
+    # 比赛结果 ---------------------------------------------------------------
+    @timed_query
+    def upsert_results(self, rows: Sequence[Tuple]) -> List[str]:
+        """写入比赛结果（列同 RESULT_FIELDS）并把比赛标记为已结束 / 已取消；
+        只写入比分或状态有变化的比赛，返回这些比赛的 match_id
+        """
+        ph = _get_placeholder()
+        incoming = {row[0]: tuple(row) for row in rows}
+        if not incoming:
+            return []
+        with get_db() as conn:
+            known: Dict[str, Tuple] = {}
+            for chunk in _chunks(list(incoming)):
+                sql = f"SELECT {', '.join(RESULT_FIELDS)} FROM match_results WHERE match_id IN ({','.join([ph] * len(chunk))})"
+                known.update((row[0], row) for row in iter_query(conn, sql, chunk))
+            changed = [row for match_id, row in incoming.items() if known.get(match_id) != row]
+            if changed:
+                _executemany(conn, _upsert_sql("match_results"), changed)
+                _executemany(
+                    conn,
+                    f"UPDATE matches SET match_status = {ph} WHERE match_id = {ph}",
+                    [(row[-1], row[0]) for row in changed],
+                )
+        return [row[0] for row in changed]
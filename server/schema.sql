@@ -80,16 +80,156 @@ CREATE TABLE IF NOT EXISTS odds_half_full_time (
     FOREIGN KEY(match_id) REFERENCES matches(match_id) ON DELETE CASCADE
 );
 
+CREATE TABLE IF NOT EXISTS odds_history (
+    match_id TEXT NOT NULL,
+    market TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    prices TEXT NOT NULL,
+    PRIMARY KEY(match_id, market, ts)
+) WITHOUT ROWID;
+
 CREATE TABLE IF NOT EXISTS sync_status (
     id INTEGER PRIMARY KEY CHECK (id = 1),
     last_synced_at TEXT,
     total_matches INTEGER DEFAULT 0,
-    total_odds INTEGER DEFAULT 0
+    total_odds INTEGER DEFAULT 0,
+    new_matches INTEGER DEFAULT 0,
+    changed_matches INTEGER DEFAULT 0,
+    skipped_matches INTEGER DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS sync_fingerprints (
+    match_id TEXT NOT NULL,
+    pool_name TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY(match_id, pool_name),
+    FOREIGN KEY(match_id) REFERENCES matches(match_id) ON DELETE CASCADE
+);
+
+-- 已归档比赛的索引：记录所在的归档文件（见 archive.py）
+CREATE TABLE IF NOT EXISTS match_archive (
+    match_id TEXT PRIMARY KEY,
+    match_date TEXT NOT NULL,
+    league_name TEXT,
+    archive_file TEXT NOT NULL,
+    archived_at TEXT NOT NULL
+);
+
+-- 投注账本（见 ledger.py）：账本汇总行、投注记录与选项，以及随写入增量维护的分桶与玩法分组
+CREATE TABLE IF NOT EXISTS ledgers (
+    ledger_id TEXT PRIMARY KEY,
+    starting_capital REAL NOT NULL,
+    bet_count INTEGER DEFAULT 0,
+    odds_sum REAL DEFAULT 0,
+    active_count INTEGER DEFAULT 0,
+    total_stake REAL DEFAULT 0,
+    betting_stake REAL DEFAULT 0,
+    settled_count INTEGER DEFAULT 0,
+    win_count INTEGER DEFAULT 0,
+    lose_count INTEGER DEFAULT 0,
+    total_profit REAL DEFAULT 0,
+    peak REAL DEFAULT 0,
+    max_drawdown REAL DEFAULT 0,
+    max_drawdown_amount REAL DEFAULT 0,
+    loss_streak INTEGER DEFAULT 0,
+    max_loss_streak INTEGER DEFAULT 0,
+    win_streak INTEGER DEFAULT 0,
+    max_win_streak INTEGER DEFAULT 0,
+    settle_seq INTEGER DEFAULT 0,
+    created_at TEXT,
+    updated_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS ledger_bets (
+    ledger_id TEXT NOT NULL,
+    bet_id TEXT NOT NULL,
+    match_name TEXT,
+    league TEXT,
+    bet_type TEXT,
+    wager_type TEXT,
+    stake REAL DEFAULT 0,
+    odds REAL DEFAULT 1,
+    fee REAL DEFAULT 0,
+    platform TEXT,
+    result TEXT NOT NULL,
+    status TEXT NOT NULL,
+    profit REAL DEFAULT 0,
+    bet_time TEXT NOT NULL,
+    settle_seq INTEGER,
+    settled_at TEXT,
+    tags TEXT,
+    note TEXT,
+    PRIMARY KEY(ledger_id, bet_id)
+);
+
+CREATE TABLE IF NOT EXISTS ledger_bet_legs (
+    ledger_id TEXT NOT NULL,
+    bet_id TEXT NOT NULL,
+    leg_index INTEGER NOT NULL,
+    leg_id TEXT,
+    match_id TEXT,
+    market TEXT,
+    selection TEXT,
+    handicap REAL,
+    result TEXT DEFAULT 'pending',
+    home_team TEXT,
+    away_team TEXT,
+    league TEXT,
+    match_time TEXT,
+    bet_type TEXT,
+    odds REAL DEFAULT 1,
+    stake REAL DEFAULT 0,
+    note TEXT,
+    PRIMARY KEY(ledger_id, bet_id, leg_index)
+);
+
+CREATE TABLE IF NOT EXISTS ledger_buckets (
+    ledger_id TEXT NOT NULL,
+    period TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    stake REAL DEFAULT 0,
+    profit REAL DEFAULT 0,
+    bet_count INTEGER DEFAULT 0,
+    settled_count INTEGER DEFAULT 0,
+    win_count INTEGER DEFAULT 0,
+    lose_count INTEGER DEFAULT 0,
+    PRIMARY KEY(ledger_id, period, bucket)
+);
+
+CREATE TABLE IF NOT EXISTS ledger_play_types (
+    ledger_id TEXT NOT NULL,
+    bet_type TEXT NOT NULL,
+    stake REAL DEFAULT 0,
+    profit REAL DEFAULT 0,
+    bet_count INTEGER DEFAULT 0,
+    settled_count INTEGER DEFAULT 0,
+    win_count INTEGER DEFAULT 0,
+    lose_count INTEGER DEFAULT 0,
+    PRIMARY KEY(ledger_id, bet_type)
+);
+
+-- 比赛结果（见 scraper/results.py）：全场与半场比分，不随比赛归档删除
+CREATE TABLE IF NOT EXISTS match_results (
+    match_id TEXT PRIMARY KEY,
+    match_date TEXT,
+    home_score INTEGER,
+    away_score INTEGER,
+    half_home_score INTEGER,
+    half_away_score INTEGER,
+    status TEXT NOT NULL,
+    updated_at TEXT
 );
 
 CREATE INDEX IF NOT EXISTS idx_matches_date ON matches(match_date);
 CREATE INDEX IF NOT EXISTS idx_matches_league ON matches(league_name);
+CREATE INDEX IF NOT EXISTS idx_matches_order ON matches(match_date, match_time, match_code, match_id);
 CREATE INDEX IF NOT EXISTS idx_odds_wdl_match ON odds_win_draw_lose(match_id);
 CREATE INDEX IF NOT EXISTS idx_odds_score_match ON odds_correct_score(match_id);
 CREATE INDEX IF NOT EXISTS idx_odds_goals_match ON odds_total_goals(match_id);
 CREATE INDEX IF NOT EXISTS idx_odds_hafu_match ON odds_half_full_time(match_id);
+CREATE INDEX IF NOT EXISTS idx_match_archive_date ON match_archive(match_date, match_id);
+CREATE INDEX IF NOT EXISTS idx_ledger_bets_time ON ledger_bets(ledger_id, bet_time);
+CREATE INDEX IF NOT EXISTS idx_ledger_bets_settle ON ledger_bets(ledger_id, settle_seq);
+CREATE INDEX IF NOT EXISTS idx_ledger_bets_status ON ledger_bets(status);
+CREATE INDEX IF NOT EXISTS idx_ledger_legs_match ON ledger_bet_legs(match_id);
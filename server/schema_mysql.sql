@@ -24,7 +24,8 @@ CREATE TABLE IF NOT EXISTS matches (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_matches_date (match_date),
-    INDEX idx_matches_league (league_name(100))
+    INDEX idx_matches_league (league_name(100)),
+    INDEX idx_matches_order (match_date, match_time, match_code, match_id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 CREATE TABLE IF NOT EXISTS odds_win_draw_lose (
@@ -86,10 +87,148 @@ CREATE TABLE IF NOT EXISTS odds_half_full_time (
     FOREIGN KEY (match_id) REFERENCES matches(match_id) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+CREATE TABLE IF NOT EXISTS odds_history (
+    match_id VARCHAR(100) NOT NULL,
+    market VARCHAR(20) NOT NULL,
+    ts BIGINT NOT NULL,
+    prices VARCHAR(1024) NOT NULL,
+    PRIMARY KEY (match_id, market, ts)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 CREATE TABLE IF NOT EXISTS sync_status (
     id INT PRIMARY KEY CHECK (id = 1),
     last_synced_at VARCHAR(50),
     total_matches INT DEFAULT 0,
-    total_odds INT DEFAULT 0
+    total_odds INT DEFAULT 0,
+    new_matches INT DEFAULT 0,
+    changed_matches INT DEFAULT 0,
+    skipped_matches INT DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS sync_fingerprints (
+    match_id VARCHAR(100) NOT NULL,
+    pool_name VARCHAR(50) NOT NULL,
+    fingerprint CHAR(32) NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (match_id, pool_name),
+    FOREIGN KEY (match_id) REFERENCES matches(match_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- 已归档比赛的索引：记录所在的归档文件（见 archive.py）
+CREATE TABLE IF NOT EXISTS match_archive (
+    match_id VARCHAR(100) PRIMARY KEY,
+    match_date VARCHAR(20) NOT NULL,
+    league_name VARCHAR(200),
+    archive_file VARCHAR(255) NOT NULL,
+    archived_at VARCHAR(50) NOT NULL,
+    INDEX idx_match_archive_date (match_date, match_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- 投注账本（见 ledger.py）：账本汇总行、投注记录与选项，以及随写入增量维护的分桶与玩法分组
+CREATE TABLE IF NOT EXISTS ledgers (
+    ledger_id VARCHAR(64) PRIMARY KEY,
+    starting_capital DOUBLE NOT NULL,
+    bet_count INT DEFAULT 0,
+    odds_sum DOUBLE DEFAULT 0,
+    active_count INT DEFAULT 0,
+    total_stake DOUBLE DEFAULT 0,
+    betting_stake DOUBLE DEFAULT 0,
+    settled_count INT DEFAULT 0,
+    win_count INT DEFAULT 0,
+    lose_count INT DEFAULT 0,
+    total_profit DOUBLE DEFAULT 0,
+    peak DOUBLE DEFAULT 0,
+    max_drawdown DOUBLE DEFAULT 0,
+    max_drawdown_amount DOUBLE DEFAULT 0,
+    loss_streak INT DEFAULT 0,
+    max_loss_streak INT DEFAULT 0,
+    win_streak INT DEFAULT 0,
+    max_win_streak INT DEFAULT 0,
+    settle_seq INT DEFAULT 0,
+    created_at VARCHAR(50),
+    updated_at VARCHAR(50)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+CREATE TABLE IF NOT EXISTS ledger_bets (
+    ledger_id VARCHAR(64) NOT NULL,
+    bet_id VARCHAR(100) NOT NULL,
+    match_name VARCHAR(300),
+    league VARCHAR(200),
+    bet_type VARCHAR(100),
+    wager_type VARCHAR(20),
+    stake DOUBLE DEFAULT 0,
+    odds DOUBLE DEFAULT 1,
+    fee DOUBLE DEFAULT 0,
+    platform VARCHAR(100),
+    result VARCHAR(20) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    profit DOUBLE DEFAULT 0,
+    bet_time VARCHAR(30) NOT NULL,
+    settle_seq INT,
+    settled_at VARCHAR(30),
+    tags TEXT,
+    note TEXT,
+    PRIMARY KEY (ledger_id, bet_id),
+    INDEX idx_ledger_bets_time (ledger_id, bet_time),
+    INDEX idx_ledger_bets_settle (ledger_id, settle_seq),
+    INDEX idx_ledger_bets_status (status)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS ledger_bet_legs (
+    ledger_id VARCHAR(64) NOT NULL,
+    bet_id VARCHAR(100) NOT NULL,
+    leg_index INT NOT NULL,
+    leg_id VARCHAR(150),
+    match_id VARCHAR(100),
+    market VARCHAR(20),
+    selection VARCHAR(50),
+    handicap DOUBLE,
+    result VARCHAR(20) DEFAULT 'pending',
+    home_team VARCHAR(200),
+    away_team VARCHAR(200),
+    league VARCHAR(200),
+    match_time VARCHAR(30),
+    bet_type VARCHAR(100),
+    odds DOUBLE DEFAULT 1,
+    stake DOUBLE DEFAULT 0,
+    note TEXT,
+    PRIMARY KEY (ledger_id, bet_id, leg_index),
+    INDEX idx_ledger_legs_match (match_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS ledger_buckets (
+    ledger_id VARCHAR(64) NOT NULL,
+    period VARCHAR(10) NOT NULL,
+    bucket VARCHAR(20) NOT NULL,
+    stake DOUBLE DEFAULT 0,
+    profit DOUBLE DEFAULT 0,
+    bet_count INT DEFAULT 0,
+    settled_count INT DEFAULT 0,
+    win_count INT DEFAULT 0,
+    lose_count INT DEFAULT 0,
+    PRIMARY KEY (ledger_id, period, bucket)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS ledger_play_types (
+    ledger_id VARCHAR(64) NOT NULL,
+    bet_type VARCHAR(100) NOT NULL,
+    stake DOUBLE DEFAULT 0,
+    profit DOUBLE DEFAULT 0,
+    bet_count INT DEFAULT 0,
+    settled_count INT DEFAULT 0,
+    win_count INT DEFAULT 0,
+    lose_count INT DEFAULT 0,
+    PRIMARY KEY (ledger_id, bet_type)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- 比赛结果（见 scraper/results.py）：全场与半场比分，不随比赛归档删除
+CREATE TABLE IF NOT EXISTS match_results (
+    match_id VARCHAR(100) PRIMARY KEY,
+    match_date VARCHAR(20),
+    home_score INT,
+    away_score INT,
+    half_home_score INT,
+    half_away_score INT,
+    status VARCHAR(20) NOT NULL,
+    updated_at VARCHAR(50)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
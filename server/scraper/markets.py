@@ -0,0 +1,294 @@
+"""玩法解析表：每个玩法声明上游字段、目标表和各选项的固定列，导入时编译为解析函数，
+由原始比赛数据直接生成 executemany 所需的行元组与历史价格向量。"""
+
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import orjson
+
+from .. import settings
+from ..history import MARKET_SELECTIONS
+from ..repository import MATCH_FIELDS, MATCH_ORDER_FIELDS, UPSERT_SPECS
+
+# 行模板中赔率所在位置的占位
+ODDS = object()
+
+Row = Tuple[Any, ...]
+# 解析结果：(行元组列表, 历史价格向量 JSON 或 None)
+Parsed = Tuple[List[Row], Optional[str]]
+
+
+def parse_decimal(value: Optional[str]) -> Optional[float]:
+    if value in (None, "", "-", "null"):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_single_flag(value: Optional[object]) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1 if value else 0
+    if isinstance(value, (int, float)):
+        return 1 if int(value) == 1 else 0
+    if isinstance(value, str):
+        token = value.strip().lower()
+        return 1 if token in {"1", "true", "y", "yes"} else 0
+    return 0
+
+
+def pool_single_flag(match_data: Dict, code: str) -> Optional[int]:
+    """poolList 中某个玩法的单关标记，没有该玩法时返回 None"""
+    for pool in match_data.get("poolList") or ():
+        if str(pool.get("poolCode") or "").strip().lower() == code:
+            flag = pool.get("single")
+            if flag is None:
+                flag = pool.get("bettingSingle")
+            return parse_single_flag(flag)
+    return None
+
+
+def encode_vector(values: Sequence[Optional[float]]) -> Optional[str]:
+    """把按 MARKET_SELECTIONS 顺序排列的赔率编码为紧凑的 JSON 数组，全部为空时返回 None"""
+    for value in values:
+        if value is not None:
+            return orjson.dumps(values).decode("utf-8")
+    return None
+
+
+class Selection:
+    """一个选项：上游字段名、历史向量中的标签、行模板（不含 match_id，赔率位置为 ODDS）"""
+
+    __slots__ = ("key", "label", "template")
+
+    def __init__(self, key: str, label: str, template: Tuple[Any, ...]):
+        self.key = key
+        self.label = label
+        self.template = template
+
+
+class MarketSchema:
+    """每个选项一行的玩法（比分、总进球、半全场）"""
+
+    __slots__ = ("market", "source", "table", "selections", "parse")
+
+    def __init__(self, market: str, source: str, table: str, selections: Sequence[Selection]):
+        self.market = market
+        self.source = source
+        self.table = table
+        self.selections = tuple(selections)
+        self.parse: Callable[[str, Dict], Parsed] = self._compile()
+
+    def _compile(self) -> Callable[[str, Dict], Parsed]:
+        entries = []
+        for selection in self.selections:
+            index = selection.template.index(ODDS)
+            entries.append((selection.key, selection.template[:index], selection.template[index + 1:]))
+        entries = tuple(entries)
+        source = self.source
+
+        def parse(match_id: str, match_data: Dict) -> Parsed:
+            data = match_data.get(source)
+            if not data:
+                return [], None
+            rows: List[Row] = []
+            vector: List[Optional[float]] = []
+            for key, before, after in entries:
+                raw = data.get(key)
+                if raw:
+                    # 与 parse_decimal 等价："-"、"null" 等无法转换的值记为 None
+                    try:
+                        odds = float(raw)
+                    except (TypeError, ValueError):
+                        odds = None
+                    rows.append((match_id, *before, odds, *after))
+                    vector.append(odds)
+                else:
+                    vector.append(None)
+            return rows, encode_vector(vector)
+
+        return parse
+
+
+class WideMarketSchema:
+    """一行包含全部选项的玩法（胜平负、让球胜平负），写入 odds_win_draw_lose"""
+
+    __slots__ = ("market", "source", "table", "handicap_key", "parse")
+
+    PRICE_KEYS = ("h", "d", "a")
+    SUPPORT_KEYS = ("h_trend", "d_trend", "a_trend")
+
+    def __init__(self, market: str, source: str, handicap_key: Optional[str] = None):
+        self.market = market
+        self.source = source
+        self.table = "odds_win_draw_lose"
+        self.handicap_key = handicap_key
+        self.parse: Callable[[str, Dict], Parsed] = self._compile()
+
+    def _compile(self) -> Callable[[str, Dict], Parsed]:
+        market, source, handicap_key = self.market, self.source, self.handicap_key
+        price_keys, support_keys = self.PRICE_KEYS, self.SUPPORT_KEYS
+
+        def parse(match_id: str, match_data: Dict) -> Parsed:
+            data = match_data.get(source)
+            if not data or not data.get(price_keys[0]):
+                return [], None
+            handicap: float = 0
+            if handicap_key is not None:
+                try:
+                    handicap = float(data.get(handicap_key, "0"))
+                except (TypeError, ValueError):
+                    handicap = 0
+            prices = [parse_decimal(data.get(key)) for key in price_keys]
+            supports = [parse_decimal(data.get(key)) for key in support_keys]
+            is_single = pool_single_flag(match_data, market)
+            if is_single is None:
+                is_single = parse_single_flag(match_data.get("bettingSingle"))
+            row = (match_id, market, handicap, *prices, *supports, is_single)
+            vector = [handicap, *prices] if handicap_key is not None else prices
+            return [row], encode_vector(vector)
+
+        return parse
+
+
+def _scores(result_type: str, labels: Sequence[str], other: str) -> List[Selection]:
+    selections = []
+    for label in labels:
+        home, away = (int(part) for part in label.split(":"))
+        selections.append(Selection(f"s{home:02d}s{away:02d}", label, (result_type, home, away, label, ODDS, 0)))
+    other_key = {"win": "s1sh", "draw": "spsh", "lose": "sash"}[result_type]
+    selections.append(Selection(other_key, other, (result_type, None, None, other, ODDS, 1)))
+    return selections
+
+
+_HAFU_RESULTS = {"h": ("win", "胜"), "d": ("draw", "平"), "a": ("lose", "负")}
+
+# 玩法池 -> 该池包含的玩法，顺序即解析顺序
+POOL_MARKETS: Dict[str, Tuple[Any, ...]] = {
+    "had_hhad": (
+        WideMarketSchema("had", "had"),
+        WideMarketSchema("hhad", "hhad", handicap_key="goalLineValue"),
+    ),
+    "crs": (
+        MarketSchema(
+            "crs",
+            "crs",
+            "odds_correct_score",
+            _scores("win", ("1:0", "2:0", "2:1", "3:0", "3:1", "3:2", "4:0", "4:1", "4:2", "5:0", "5:1", "5:2"), "胜其他")
+            + _scores("draw", ("0:0", "1:1", "2:2", "3:3"), "平其他")
+            + _scores("lose", ("0:1", "0:2", "1:2", "0:3", "1:3", "2:3", "0:4", "1:4", "2:4", "0:5", "1:5", "2:5"), "负其他"),
+        ),
+    ),
+    "ttg": (
+        MarketSchema(
+            "ttg",
+            "ttg",
+            "odds_total_goals",
+            [Selection(f"s{goals}", str(goals), (str(goals), goals, goals, ODDS)) for goals in range(7)]
+            + [Selection("s7", "7+", ("7+", 7, None, ODDS))],
+        ),
+    ),
+    "hafu": (
+        MarketSchema(
+            "hafu",
+            "hafu",
+            "odds_half_full_time",
+            [
+                Selection(half + full, half_label + full_label, (half_result, full_result, half_label + full_label, ODDS))
+                for half, (half_result, half_label) in _HAFU_RESULTS.items()
+                for full, (full_result, full_label) in _HAFU_RESULTS.items()
+            ],
+        ),
+    ),
+}
+
+# 提供赛事基础信息的玩法池，其余池的赔率表外键依赖它写入的 matches
+BASE_POOL = "had_hhad"
+
+
+def _check_registry() -> None:
+    for pool_name, schemas in POOL_MARKETS.items():
+        if pool_name not in settings.POOL_CODES:
+            raise ValueError(f"玩法池 {pool_name} 未在 POOL_CODES 中登记")
+        for schema in schemas:
+            if schema.table not in UPSERT_SPECS:
+                raise ValueError(f"玩法 {schema.market} 的目标表 {schema.table} 没有写入定义")
+            if isinstance(schema, MarketSchema):
+                width = len(UPSERT_SPECS[schema.table][0])
+                if tuple(s.label for s in schema.selections) != MARKET_SELECTIONS[schema.market]:
+                    raise ValueError(f"玩法 {schema.market} 的选项顺序与 MARKET_SELECTIONS 不一致")
+                if any(len(s.template) + 1 != width for s in schema.selections):
+                    raise ValueError(f"玩法 {schema.market} 的行模板与 {schema.table} 的列数不一致")
+
+
+_check_registry()
+
+
+_STATUS_MAP = {
+    "Selling": "not_started",
+    "Finished": "finished",
+    "Cancelled": "cancelled",
+}
+
+# matches 表各列对应的上游字段，其余列在 match_row 中计算
+_MATCH_SOURCE_FIELDS = {
+    "match_number": "matchNumDate",
+    "match_code": "matchNumStr",
+    "league_id": "leagueId",
+    "league_name": "leagueAbbName",
+    "league_full_name": "leagueAllName",
+    "match_date": "matchDate",
+    "match_time": "matchTime",
+    "home_team_id": "homeTeamId",
+    "home_team_name": "homeTeamAbbName",
+    "home_team_rank": "homeRank",
+    "away_team_id": "awayTeamId",
+    "away_team_name": "awayTeamAbbName",
+    "away_team_rank": "awayRank",
+    "notice": "matchTips",
+    "odds_update_time": "oddsUpdateTime",
+}
+
+
+def kickoff_timestamp(match_data: Dict) -> Optional[int]:
+    """开赛时间戳（matches.match_timestamp），日期或时间缺失、格式错误时为 None"""
+    match_date = match_data.get("matchDate")
+    match_time = match_data.get("matchTime")
+    if not match_date or not match_time:
+        return None
+    try:
+        return int(datetime.strptime(f"{match_date} {match_time}", "%Y-%m-%d %H:%M:%S").timestamp())
+    except ValueError:
+        return None
+
+
+def _compile_match_row() -> Callable[[str, Dict], Row]:
+    computed = {"match_id", "project_type", "match_timestamp", "is_single", "match_status"}
+    missing = set(MATCH_FIELDS) - computed - set(_MATCH_SOURCE_FIELDS)
+    if missing:
+        raise ValueError(f"matches 列缺少来源: {sorted(missing)}")
+    # (列名, 上游字段, 空值是否存为 '')
+    plan = tuple((field, _MATCH_SOURCE_FIELDS.get(field), field in MATCH_ORDER_FIELDS) for field in MATCH_FIELDS)
+
+    def match_row(match_id: str, match_data: Dict) -> Row:
+        computed_values = {
+            "match_id": match_id,
+            "project_type": "football",
+            "match_timestamp": kickoff_timestamp(match_data),
+            "is_single": parse_single_flag(match_data.get("bettingSingle")),
+            "match_status": _STATUS_MAP.get(match_data.get("matchStatus"), "not_started"),
+        }
+        row = []
+        for field, source, normalized in plan:
+            value = match_data.get(source) if source is not None else computed_values[field]
+            row.append("" if normalized and value is None else value)
+        return tuple(row)
+
+    return match_row
+
+
+# 原始比赛数据 -> matches 表的行元组（列顺序同 MATCH_FIELDS）
+match_row = _compile_match_row()
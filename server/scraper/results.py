@@ -0,0 +1,117 @@
+"""比赛结果抓取：分页读取竞彩赛果接口最近几天的全场 / 半场比分，写入 match_results。
+
+赛果接口每场比赛一条记录，sectionsNo999 为全场比分（如 "2:1"），sectionsNo1 为半场比分；
+比赛取消时全场比分为"取消"。比分尚未公布的比赛跳过，留到下次抓取。
+"""
+
+import re
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import orjson
+
+from .. import settings
+from ..metrics import upstream_request_seconds, upstream_responses
+from ..repository import OddsRepository
+from .sporttery_service import RETRY_STATUS_CODES, backoff_delay
+
+# 指标中的玩法池标签
+RESULTS_POOL = "results"
+
+_SCORE = re.compile(r"^\s*(\d+)\s*[:：]\s*(\d+)\s*$")
+
+
+def parse_score(text: Any) -> Optional[Tuple[int, int]]:
+    match = _SCORE.match(str(text or ""))
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def parse_result(item: Dict[str, Any]) -> Optional[Tuple]:
+    """单场赛果转换为 match_results 行（列同 RESULT_FIELDS）；没有 matchId 或比分尚未公布时为 None"""
+    match_id = item.get("matchId")
+    if not match_id:
+        return None
+    full = parse_score(item.get("sectionsNo999"))
+    if full is None:
+        if "取消" not in str(item.get("sectionsNo999") or ""):
+            return None
+        return (str(match_id), item.get("matchDate"), None, None, None, None, "cancelled")
+    half = parse_score(item.get("sectionsNo1")) or (None, None)
+    return (str(match_id), item.get("matchDate"), *full, *half, "finished")
+
+
+class ResultsSyncService:
+    def __init__(self, repository: Optional[OddsRepository] = None, api_url: Optional[str] = None):
+        self.repository = repository or OddsRepository()
+        self.api_url = api_url or settings.RESULTS_API_URL
+        self.client = httpx.Client(timeout=settings.HTTP_TIMEOUT, headers={"User-Agent": settings.USER_AGENT})
+        # 最近一次运行中比分或状态有变化的比赛
+        self.changed: List[str] = []
+
+    def fetch_page(self, start: str, end: str, page: int) -> Dict:
+        """抓取一页赛果，可重试的失败按抖动退避重试"""
+        params = {
+            "matchBeginDate": start,
+            "matchEndDate": end,
+            "pageNo": page,
+            "pageSize": settings.RESULTS_PAGE_SIZE,
+            "isFix": 0,
+            "pcOrWap": 1,
+        }
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = self.client.get(self.api_url, params=params)
+                upstream_request_seconds.observe(time.perf_counter() - started, RESULTS_POOL)
+                upstream_responses.inc(RESULTS_POOL, str(response.status_code))
+                response.raise_for_status()
+                return orjson.loads(response.content)
+            except httpx.HTTPStatusError as exc:
+                if exc.response.status_code not in RETRY_STATUS_CODES or attempt >= settings.FETCH_RETRIES:
+                    raise
+            except httpx.TransportError:
+                upstream_request_seconds.observe(time.perf_counter() - started, RESULTS_POOL)
+                upstream_responses.inc(RESULTS_POOL, "error")
+                if attempt >= settings.FETCH_RETRIES:
+                    raise
+            time.sleep(backoff_delay(attempt))
+            attempt += 1
+
+    def fetch_results(self, start: str, end: str) -> Tuple[List[Dict[str, Any]], int]:
+        """逐页读取 [start, end] 的全部赛果，最多 RESULTS_MAX_PAGES 页，返回 (赛果列表, 页数)"""
+        items: List[Dict[str, Any]] = []
+        page = 1
+        while page <= settings.RESULTS_MAX_PAGES:
+            data = self.fetch_page(start, end, page)
+            if not data.get("success"):
+                raise RuntimeError(f"赛果接口返回失败: {data.get('errorMessage') or data.get('errorCode')}")
+            value = data.get("value") or {}
+            items.extend(value.get("matchResult") or [])
+            if page >= int(value.get("pages") or 1):
+                break
+            page += 1
+        return items, min(page, settings.RESULTS_MAX_PAGES)
+
+    def run_once(self, today: Optional[date] = None) -> Dict[str, Any]:
+        """抓取最近 RESULTS_LOOKBACK_DAYS 天（含当天）的赛果并写入，返回统计"""
+        end = today or date.today()
+        start = end - timedelta(days=max(0, settings.RESULTS_LOOKBACK_DAYS))
+        started = time.perf_counter()
+        items, pages = self.fetch_results(start.isoformat(), end.isoformat())
+        rows = [row for row in map(parse_result, items) if row is not None]
+        self.changed = self.repository.upsert_results(rows)
+        return {
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "pages": pages,
+            "fetched": len(items),
+            "results": len(rows),
+            "changed": len(self.changed),
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+    def close(self) -> None:
+        self.client.close()
@@ -1,299 +1,332 @@
-from datetime import datetime
-from typing import Dict, List, Optional
+import asyncio
+import hashlib
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional, Sequence, Set, Tuple, TypeVar
 
 import httpx
+import orjson
 
 from .. import settings
-from ..repository import OddsRepository
+from ..metrics import (
+    observe,
+    sync_fetch_seconds,
+    sync_stage_seconds,
+    upstream_request_seconds,
+    upstream_responses,
+)
+from ..repository import OddsRepository, SyncBatch
+from .markets import BASE_POOL, POOL_MARKETS, kickoff_timestamp, match_row
+from .stream import MatchStreamParser
 
+logger = logging.getLogger(__name__)
 
-def parse_decimal(value: Optional[str]) -> Optional[float]:
-    if value in (None, "", "-", "null"):
-        return None
+T = TypeVar("T")
+
+# 可重试的上游响应状态码
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# poolCode 参数 -> 玩法池名，用作指标标签
+POOL_NAMES = {code: name for name, code in settings.POOL_CODES.items()}
+
+
+def fingerprint(match_data: Dict) -> str:
+    """单场比赛在某个玩法池中的内容指纹，内容不变则指纹不变。
+
+    orjson 按键排序的输出与 json.dumps(sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    逐字节一致，已存储的指纹继续有效。
+    """
+    return hashlib.blake2b(orjson.dumps(match_data, option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
+
+
+def backoff_delay(attempt: int) -> float:
+    """第 attempt 次重试前的等待时长：指数退避 + 全量随机抖动"""
+    return random.uniform(0, settings.FETCH_BACKOFF_SECONDS * (2 ** attempt))
+
+
+def run_coroutine(coro: Awaitable[T]) -> T:
+    """在同步代码中运行协程；若当前线程已有事件循环（如 FastAPI 启动事件），改在独立线程中运行"""
     try:
-        return float(value)
-    except (TypeError, ValueError):
-        return None
-
-
-def parse_single_flag(value: Optional[object]) -> int:
-    if value is None:
-        return 0
-    if isinstance(value, bool):
-        return 1 if value else 0
-    if isinstance(value, (int, float)):
-        return 1 if int(value) == 1 else 0
-    if isinstance(value, str):
-        token = value.strip().lower()
-        return 1 if token in {"1", "true", "y", "yes"} else 0
-    return 0
-
-
-def extract_pool_single_flags(match_data: Dict) -> Dict[str, int]:
-    flags: Dict[str, int] = {}
-    for pool in match_data.get("poolList", []):
-        code = str(pool.get("poolCode") or "").strip().lower()
-        if not code:
-            continue
-        flag = pool.get("single")
-        if flag is None:
-            flag = pool.get("bettingSingle")
-        flags[code] = parse_single_flag(flag)
-    return flags
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
 
 
 class SportterySyncService:
-    def __init__(self, repository: Optional[OddsRepository] = None):
+    def __init__(self, repository: Optional[OddsRepository] = None, api_url: Optional[str] = None):
         self.repository = repository or OddsRepository()
-        self.client = httpx.Client(timeout=settings.HTTP_TIMEOUT, headers={"User-Agent": settings.USER_AGENT})
-        self.stats = {"matches": 0, "odds": 0}
-
-    def fetch_pool(self, pool_code: str) -> Dict:
-        url = f"{settings.SPORTTERY_API_URL}?channel=c&poolCode={pool_code}"
-        response = self.client.get(url)
-        response.raise_for_status()
-        return response.json()
-
-    def run_once(self) -> Dict[str, int]:
-        self.stats = {"matches": 0, "odds": 0}
-        for pool_name, pool_code in settings.POOL_CODES.items():
-            data = self.fetch_pool(pool_code)
-            self.parse_pool(pool_name, data)
-        self.repository.finalize_sync(self.stats["matches"], self.stats["odds"])
+        self.api_url = api_url or settings.SPORTTERY_API_URL
+        self.stats: Dict[str, Any] = self._new_stats()
+        self.incremental = settings.SYNC_INCREMENTAL
+        # 上次写入的指纹 {(match_id, pool_name): fingerprint}，以及本次解析到的赛事与内容有变化的赛事
+        self.fingerprints: Dict[Tuple[str, str], str] = {}
+        self.seen_matches: Set[str] = set()
+        self.new_matches: Set[str] = set()
+        self.changed_matches: Set[str] = set()
+        # 本次同步中价格发生变化的 (match_id, market, ts, prices)，用于实时推送；没有订阅者时不收集
+        self.price_changes: List[Tuple[str, str, int, str]] = []
+        self.track_price_changes = True
+        # 流式同步中抓取 / 解析 / 写入交替进行，各阶段耗时分别累计
+        self.stage_seconds: Dict[str, float] = {}
+        self.sync_ts: Optional[int] = None
+        # 本次同步的玩法池；kickoff_before 不为空时只写入该时间戳之前开赛的比赛（临场刷新）
+        self.pools: List[str] = list(settings.POOL_CODES)
+        self.kickoff_before: Optional[int] = None
+        # 各玩法池中已同步过且内容有变化的比赛数，供调度估计变化率
+        self.pool_changes: Dict[str, int] = {}
+
+    @staticmethod
+    def _new_stats() -> Dict[str, Any]:
+        return {"matches": 0, "odds": 0, "rows": {}, "fetch": {}, "changes": {}}
+
+    def pool_url(self, pool_code: str) -> str:
+        return f"{self.api_url}?channel=c&poolCode={pool_code}"
+
+    async def stream_pool(
+        self,
+        client: httpx.AsyncClient,
+        semaphore: asyncio.Semaphore,
+        pool_code: str,
+        base_ready: Optional["asyncio.Future[bool]"] = None,
+    ) -> Dict[str, Any]:
+        """流式抓取并入库单个玩法池：响应体边到达边解析，每 SYNC_STREAM_BATCH_SIZE 场比赛写入一次。
+
+        base_ready 不为空时，先等待赛事基础池入库（赔率表外键依赖 matches）再发出请求，
+        基础池失败则不抓取本池。失败时按抖动退避重试，重试时跳过本池已入库的比赛。返回计时信息。
+        """
+        timing: Dict[str, Any] = {"attempts": 0, "status": None, "elapsed_ms": 0.0, "error": None, "matches": 0}
+        pool_name = POOL_NAMES.get(pool_code, pool_code)
+        started = time.perf_counter()
+        done: Set[str] = set()
+        # 先等待赛事基础池入库再占用并发名额：基础池总能取得名额，与玩法池顺序和 FETCH_CONCURRENCY 无关
+        if base_ready is not None and not await base_ready:
+            timing["error"] = f"{BASE_POOL} 玩法池失败，未抓取"
+        else:
+            async with semaphore:
+                for attempt in range(settings.FETCH_RETRIES + 1):
+                    timing["attempts"] = attempt + 1
+                    retryable = True
+                    attempt_started = time.perf_counter()
+                    try:
+                        async with client.stream("GET", self.pool_url(pool_code)) as response:
+                            upstream_request_seconds.observe(time.perf_counter() - attempt_started, pool_name)
+                            upstream_responses.inc(pool_name, str(response.status_code))
+                            timing["status"] = response.status_code
+                            retryable = response.status_code in RETRY_STATUS_CODES
+                            response.raise_for_status()
+                            await self.ingest_stream(pool_name, response.aiter_bytes(), done)
+                        timing["error"] = None
+                        break
+                    except (httpx.HTTPError, ValueError) as exc:
+                        if isinstance(exc, httpx.TransportError):
+                            # 超时、连接失败、响应体中断等
+                            upstream_request_seconds.observe(time.perf_counter() - attempt_started, pool_name)
+                            upstream_responses.inc(pool_name, "error")
+                        timing["error"] = f"{type(exc).__name__}: {exc}"
+                        if isinstance(exc, ValueError):
+                            retryable = False
+                        if not retryable or attempt >= settings.FETCH_RETRIES:
+                            break
+                    await asyncio.sleep(backoff_delay(attempt))
+        elapsed = time.perf_counter() - started
+        sync_fetch_seconds.observe(elapsed, pool_name)
+        timing["elapsed_ms"] = round(elapsed * 1000, 1)
+        timing["matches"] = len(done)
+        timing["changed"] = self.pool_changes.get(pool_name, 0)
+        return timing
+
+    async def stream_pools(self) -> None:
+        """并发抓取 self.pools 中的玩法池；其余池等赛事基础池读完入库后再发出请求，各池计时记录在 stats["fetch"]。
+
+        本次不含赛事基础池时，其余池只写入 matches 中已有的比赛（见 ingest_matches）。
+        """
+        semaphore = asyncio.Semaphore(max(1, settings.FETCH_CONCURRENCY))
+        base_ready: "asyncio.Future[bool]" = asyncio.get_running_loop().create_future()
+
+        async def stream_base(client: httpx.AsyncClient, pool_code: str) -> Dict[str, Any]:
+            timing: Dict[str, Any] = {"error": "cancelled"}
+            try:
+                timing = await self.stream_pool(client, semaphore, pool_code)
+                return timing
+            finally:
+                base_ready.set_result(timing["error"] is None)
+
+        include_base = BASE_POOL in self.pools
+        async with httpx.AsyncClient(
+            timeout=settings.HTTP_TIMEOUT, headers={"User-Agent": settings.USER_AGENT}
+        ) as client:
+            results = await asyncio.gather(
+                *(
+                    stream_base(client, settings.POOL_CODES[name])
+                    if name == BASE_POOL
+                    else self.stream_pool(client, semaphore, settings.POOL_CODES[name], base_ready if include_base else None)
+                    for name in self.pools
+                )
+            )
+        for pool_name, timing in zip(self.pools, results):
+            self.stats["fetch"][pool_name] = timing
+            if timing["error"] is not None:
+                logger.warning("Sync pool %s failed after %s attempts: %s", pool_name, timing["attempts"], timing["error"])
+
+    async def ingest_stream(self, pool_name: str, chunks: AsyncIterator[bytes], done: Set[str]) -> None:
+        """增量解析响应体，凑满一批比赛即解析入库；done 记录本池已入库的比赛"""
+        parser = MatchStreamParser()
+        pending: List[Dict] = []
+        batch_size = max(1, settings.SYNC_STREAM_BATCH_SIZE)
+        waited = time.perf_counter()
+        async for chunk in chunks:
+            received = time.perf_counter()
+            self.stage_seconds["fetch"] += received - waited
+            matches = parser.feed(chunk)
+            self.stage_seconds["parse"] += time.perf_counter() - received
+            for match_data in matches:
+                if str(match_data.get("matchId")) not in done:
+                    pending.append(match_data)
+                if len(pending) >= batch_size:
+                    self.ingest_matches(pool_name, pending, done)
+                    pending = []
+            waited = time.perf_counter()
+        for match_data in parser.close():
+            if str(match_data.get("matchId")) not in done:
+                pending.append(match_data)
+        if pending:
+            self.ingest_matches(pool_name, pending, done)
+
+    def ingest_matches(self, pool_name: str, matches: List[Dict], done: Set[str]) -> None:
+        """读取这批比赛的指纹，解析并作为一个写入单元落库"""
+        started = time.perf_counter()
+        if self.kickoff_before is not None:
+            matches = [match_data for match_data in matches if self.in_kickoff_window(match_data)]
+        match_ids = [str(match_data.get("matchId")) for match_data in matches]
+        self.fingerprints = self.repository.load_fingerprints(match_ids)
+        if BASE_POOL not in self.pools:
+            # 没有基础池指纹的是尚未写入 matches 的新比赛，留到下次抓取基础池时写入
+            known = [(match_id, match_data) for match_id, match_data in zip(match_ids, matches) if (match_id, BASE_POOL) in self.fingerprints]
+            match_ids = [match_id for match_id, _ in known]
+            matches = [match_data for _, match_data in known]
+        batch = SyncBatch(ts=self.sync_ts)
+        for match_id, match_data in zip(match_ids, matches):
+            self.parse_match(pool_name, match_id, match_data, batch)
+        parsed = time.perf_counter()
+        self.write(batch)
+        self.stage_seconds["parse"] += parsed - started
+        self.stage_seconds["write"] += time.perf_counter() - parsed
+        done.update(match_ids)
+
+    def in_kickoff_window(self, match_data: Dict) -> bool:
+        kickoff = kickoff_timestamp(match_data)
+        return kickoff is not None and kickoff <= self.kickoff_before
+
+    def run_once(
+        self,
+        incremental: Optional[bool] = None,
+        pools: Optional[Sequence[str]] = None,
+        kickoff_before: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """执行一次同步。incremental 为 False 时强制重写全部数据，默认取 SYNC_INCREMENTAL 配置；
+        pools 为空时抓取全部玩法池；kickoff_before 不为空时只写入该时间戳之前开赛的比赛。
+
+        各玩法池以流式读取，每批比赛单独一个事务写入；读缓存与响应快照在 finalize 时才整体失效。
+        只抓取部分玩法池或部分比赛时不更新 sync_status 中的赛事总数与赔率总数，有玩法池抓取失败时不更新赔率总数。
+        """
+        self.pools = [name for name in settings.POOL_CODES if pools is None or name in pools]
+        self.kickoff_before = kickoff_before
+        self.pool_changes = {}
+        self.stats = self._new_stats()
+        self.stats["pools"] = list(self.pools)
+        self.stats["kickoff_before"] = kickoff_before
+        self.incremental = settings.SYNC_INCREMENTAL if incremental is None else incremental
+        self.price_changes = []
+        self.seen_matches = set()
+        self.new_matches = set()
+        self.changed_matches = set()
+        self.stage_seconds = {"fetch": 0.0, "parse": 0.0, "write": 0.0}
+        self.sync_ts = int(time.time())
+        with observe(sync_stage_seconds, "total"):
+            try:
+                run_coroutine(self.stream_pools())
+            finally:
+                for stage, seconds in self.stage_seconds.items():
+                    sync_stage_seconds.observe(seconds, stage)
+            # 赔率表外键依赖 matches，赛事基础池失败时其它池不会写入
+            if BASE_POOL in self.pools:
+                base = self.stats["fetch"].get(BASE_POOL)
+                if base is None or base["error"] is not None:
+                    raise RuntimeError(f"{BASE_POOL} 玩法池抓取失败: {base}")
+            self.stats["changes"] = self.summarize_changes()
+            complete = kickoff_before is None
+            # 赔率总数只在全部玩法池都抓取成功时更新，失败的池不计入行数，写入的总数会偏小
+            all_pools = len(self.pools) == len(settings.POOL_CODES) and all(
+                self.stats["fetch"].get(name, {}).get("error", "missing") is None for name in self.pools
+            )
+            with observe(sync_stage_seconds, "finalize"):
+                self.repository.finalize_sync(
+                    self.stats["matches"] if complete and BASE_POOL in self.pools else None,
+                    self.stats["odds"] if complete and all_pools else None,
+                    self.stats["changes"],
+                )
         return self.stats
 
+    def detect_change(self, batch: SyncBatch, match_id: str, pool_name: str, match_data: Dict) -> bool:
+        """比较指纹判断该比赛在该玩法池是否需要写入；需要写入时同时记录新指纹"""
+        self.seen_matches.add(match_id)
+        digest = fingerprint(match_data)
+        previous = self.fingerprints.get((match_id, pool_name))
+        if previous is None and pool_name == BASE_POOL:
+            self.new_matches.add(match_id)
+        changed = previous != digest
+        if changed:
+            self.changed_matches.add(match_id)
+            if previous is not None:
+                self.pool_changes[pool_name] = self.pool_changes.get(pool_name, 0) + 1
+            batch.add_fingerprint(match_id, pool_name, digest)
+        return changed or not self.incremental
+
+    def summarize_changes(self) -> Dict[str, int]:
+        """按赛事统计：从未同步过的为 new，任一玩法内容变化的为 changed，其余为 skipped"""
+        new = self.new_matches
+        changed = self.changed_matches - new
+        return {
+            "new": len(new),
+            "changed": len(changed),
+            "skipped": len(self.seen_matches) - len(new) - len(changed),
+        }
+
+    def write(self, batch: SyncBatch) -> None:
+        """落库一个写入单元，并累计各表写入行数与价格变化"""
+        written = self.repository.write_batch(batch)
+        if self.track_price_changes:
+            self.price_changes.extend(batch.price_changes)
+        rows = self.stats["rows"]
+        for table, count in written.items():
+            rows[table] = rows.get(table, 0) + count
+
     # Parsing helpers -----------------------------------------------------
-    def parse_pool(self, pool_name: str, data: Dict) -> None:
+    def parse_pool(self, pool_name: str, data: Dict, batch: SyncBatch) -> None:
+        """解析整个玩法池的响应并追加到写入单元，由调用方落库（同步本身按批流式解析，见 ingest_stream）"""
         if not data.get("success") or data.get("emptyFlag"):
             return
         match_info_list = data.get("value", {}).get("matchInfoList", [])
         for date_group in match_info_list:
             for match_data in date_group.get("subMatchList", []):
-                if pool_name == "had_hhad":
-                    single_flags = extract_pool_single_flags(match_data)
-                    match = self.build_match(match_data)
-                    self.repository.upsert_match(match)
-                    self.stats["matches"] += 1
-                    for odds in self.build_had_hhad(match_data, single_flags):
-                        self.repository.upsert_odds_wdl(odds)
-                        self.stats["odds"] += 1
-                elif pool_name == "crs":
-                    items = self.build_crs(match_data)
-                    self.repository.upsert_odds_score_bulk(str(match_data.get("matchId")), items)
-                    self.stats["odds"] += len(items)
-                elif pool_name == "ttg":
-                    items = self.build_ttg(match_data)
-                    self.repository.upsert_odds_goals_bulk(str(match_data.get("matchId")), items)
-                    self.stats["odds"] += len(items)
-                elif pool_name == "hafu":
-                    items = self.build_hafu(match_data)
-                    self.repository.upsert_odds_hafu_bulk(str(match_data.get("matchId")), items)
-                    self.stats["odds"] += len(items)
-
-    def build_match(self, match_data: Dict) -> Dict:
-        match_id = str(match_data.get("matchId"))
-        match_date = match_data.get("matchDate")
-        match_time = match_data.get("matchTime")
-        timestamp = None
-        if match_date and match_time:
-            try:
-                dt = datetime.strptime(f"{match_date} {match_time}", "%Y-%m-%d %H:%M:%S")
-                timestamp = int(dt.timestamp())
-            except ValueError:
-                dt = None
-        else:
-            dt = None
-        status_map = {
-            "Selling": "not_started",
-            "Finished": "finished",
-            "Cancelled": "cancelled",
-        }
-        match_status = status_map.get(match_data.get("matchStatus"), "not_started")
-        return {
-            "match_id": match_id,
-            "match_number": match_data.get("matchNumDate"),
-            "match_code": match_data.get("matchNumStr"),
-            "project_type": "football",
-            "league_id": match_data.get("leagueId"),
-            "league_name": match_data.get("leagueAbbName"),
-            "league_full_name": match_data.get("leagueAllName"),
-            "match_date": match_date,
-            "match_time": match_time,
-            "match_timestamp": timestamp,
-            "home_team_id": match_data.get("homeTeamId"),
-            "home_team_name": match_data.get("homeTeamAbbName"),
-            "home_team_rank": match_data.get("homeRank"),
-            "away_team_id": match_data.get("awayTeamId"),
-            "away_team_name": match_data.get("awayTeamAbbName"),
-            "away_team_rank": match_data.get("awayRank"),
-            "is_single": parse_single_flag(match_data.get("bettingSingle")),
-            "match_status": match_status,
-            "notice": match_data.get("matchTips"),
-            "odds_update_time": match_data.get("oddsUpdateTime"),
-        }
+                self.parse_match(pool_name, str(match_data.get("matchId")), match_data, batch)
 
-    def build_had_hhad(self, match_data: Dict, single_flags: Optional[Dict[str, int]] = None) -> List[Dict]:
-        match_id = str(match_data.get("matchId"))
-        results: List[Dict] = []
-        single_flags = single_flags or {}
-        default_single = parse_single_flag(match_data.get("bettingSingle"))
-
-        had_data = match_data.get("had", {})
-        if had_data and had_data.get("h"):
-            is_single = single_flags.get("had", default_single)
-            results.append(
-                {
-                    "match_id": match_id,
-                    "odds_type": "had",
-                    "handicap": 0,
-                    "win_odds": parse_decimal(had_data.get("h")),
-                    "draw_odds": parse_decimal(had_data.get("d")),
-                    "lose_odds": parse_decimal(had_data.get("a")),
-                    "win_support": parse_decimal(had_data.get("h_trend")),
-                    "draw_support": parse_decimal(had_data.get("d_trend")),
-                    "lose_support": parse_decimal(had_data.get("a_trend")),
-                    "is_single": is_single,
-                }
-            )
-        hhad_data = match_data.get("hhad", {})
-        if hhad_data and hhad_data.get("h"):
-            goal_line = hhad_data.get("goalLineValue", "0")
-            try:
-                handicap = float(goal_line)
-            except (TypeError, ValueError):
-                handicap = 0
-            is_single = single_flags.get("hhad", default_single)
-            results.append(
-                {
-                    "match_id": match_id,
-                    "odds_type": "hhad",
-                    "handicap": handicap,
-                    "win_odds": parse_decimal(hhad_data.get("h")),
-                    "draw_odds": parse_decimal(hhad_data.get("d")),
-                    "lose_odds": parse_decimal(hhad_data.get("a")),
-                    "win_support": parse_decimal(hhad_data.get("h_trend")),
-                    "draw_support": parse_decimal(hhad_data.get("d_trend")),
-                    "lose_support": parse_decimal(hhad_data.get("a_trend")),
-                    "is_single": is_single,
-                }
-            )
-        return results
-
-    def build_crs(self, match_data: Dict) -> List[Dict]:
-        match_id = str(match_data.get("matchId"))
-        crs_data = match_data.get("crs", {})
-        if not crs_data:
-            return []
-        items: List[Dict] = []
-        segments = {
-            "win": [
-                ("1:0", "s01s00"), ("2:0", "s02s00"), ("2:1", "s02s01"),
-                ("3:0", "s03s00"), ("3:1", "s03s01"), ("3:2", "s03s02"),
-                ("4:0", "s04s00"), ("4:1", "s04s01"), ("4:2", "s04s02"),
-                ("5:0", "s05s00"), ("5:1", "s05s01"), ("5:2", "s05s02"),
-            ],
-            "draw": [
-                ("0:0", "s00s00"), ("1:1", "s01s01"), ("2:2", "s02s02"),
-                ("3:3", "s03s03"),
-            ],
-            "lose": [
-                ("0:1", "s00s01"), ("0:2", "s00s02"), ("1:2", "s01s02"),
-                ("0:3", "s00s03"), ("1:3", "s01s03"), ("2:3", "s02s03"),
-                ("0:4", "s00s04"), ("1:4", "s01s04"), ("2:4", "s02s04"),
-                ("0:5", "s00s05"), ("1:5", "s01s05"), ("2:5", "s02s05"),
-            ],
-        }
-        for result_type, pairs in segments.items():
-            for label, key in pairs:
-                odds_value = crs_data.get(key)
-                if odds_value:
-                    home, away = label.split(":")
-                    items.append(
-                        {
-                            "result_type": result_type,
-                            "home_score": int(home),
-                            "away_score": int(away),
-                            "score_label": label,
-                            "odds": parse_decimal(odds_value),
-                            "is_other": 0,
-                        }
-                    )
-        special_map = {
-            "win": ("s1sh", "胜其他"),
-            "draw": ("spsh", "平其他"),
-            "lose": ("sash", "负其他"),
-        }
-        for result_type, (key, label) in special_map.items():
-            odds_value = crs_data.get(key)
-            if odds_value:
-                items.append(
-                    {
-                        "result_type": result_type,
-                        "home_score": None,
-                        "away_score": None,
-                        "score_label": label,
-                        "odds": parse_decimal(odds_value),
-                        "is_other": 1,
-                    }
-                )
-        return items
-
-    def build_ttg(self, match_data: Dict) -> List[Dict]:
-        ttg_data = match_data.get("ttg", {})
-        if not ttg_data:
-            return []
-        ranges = [
-            ("0", 0, 0, "s0"),
-            ("1", 1, 1, "s1"),
-            ("2", 2, 2, "s2"),
-            ("3", 3, 3, "s3"),
-            ("4", 4, 4, "s4"),
-            ("5", 5, 5, "s5"),
-            ("6", 6, 6, "s6"),
-            ("7+", 7, None, "s7"),
-        ]
-        items = []
-        for label, min_goals, max_goals, key in ranges:
-            odds_value = ttg_data.get(key)
-            if odds_value:
-                items.append(
-                    {
-                        "goal_range": label,
-                        "min_goals": min_goals,
-                        "max_goals": max_goals,
-                        "odds": parse_decimal(odds_value),
-                    }
-                )
-        return items
-
-    def build_hafu(self, match_data: Dict) -> List[Dict]:
-        hafu_data = match_data.get("hafu", {})
-        if not hafu_data:
-            return []
-        mapping = {
-            "hh": ("win", "win", "胜胜"),
-            "hd": ("win", "draw", "胜平"),
-            "ha": ("win", "lose", "胜负"),
-            "dh": ("draw", "win", "平胜"),
-            "dd": ("draw", "draw", "平平"),
-            "da": ("draw", "lose", "平负"),
-            "ah": ("lose", "win", "负胜"),
-            "ad": ("lose", "draw", "负平"),
-            "aa": ("lose", "lose", "负负"),
-        }
-        items = []
-        for key, (half, full, label) in mapping.items():
-            odds_value = hafu_data.get(key)
-            if odds_value:
-                items.append(
-                    {
-                        "half_result": half,
-                        "full_result": full,
-                        "result_label": label,
-                        "odds": parse_decimal(odds_value),
-                    }
-                )
-        return items
+    def parse_match(self, pool_name: str, match_id: str, match_data: Dict, batch: SyncBatch) -> None:
+        """按 POOL_MARKETS 解析单场比赛在某个玩法池中的数据，内容有变化时追加到写入单元"""
+        changed = self.detect_change(batch, match_id, pool_name, match_data)
+        if pool_name == BASE_POOL:
+            self.stats["matches"] += 1
+            if changed:
+                batch.add_rows("matches", [match_row(match_id, match_data)])
+        for schema in POOL_MARKETS.get(pool_name, ()):
+            rows, vector = schema.parse(match_id, match_data)
+            self.stats["odds"] += len(rows)
+            if changed and rows:
+                batch.add_rows(schema.table, rows)
+                batch.add_history(match_id, schema.market, vector)
 
     def close(self) -> None:
-        self.client.close()
+        """每次同步使用各自的异步客户端并在结束时关闭，这里没有需要释放的连接"""
@@ -0,0 +1,142 @@
+import codecs
+import json
+from typing import Any, Dict, List, Optional, Sequence
+
+# 比赛对象在玩法池响应中的位置：value.matchInfoList[*].subMatchList[*]，None 表示数组元素
+MATCH_PATH: Sequence[Optional[str]] = ("value", "matchInfoList", None, "subMatchList", None)
+
+_WHITESPACE = " \t\n\r"
+
+
+class _NeedMore(Exception):
+    """缓冲区中的数据不足以完成当前一步，等待下一块"""
+
+
+class MatchStreamParser:
+    """玩法池响应的增量解析器：按块输入响应字节，取出已经完整到达的比赛对象。
+
+    路径上的容器只逐个字符扫描结构，每场比赛用 json 的 C 扫描器整体解码，路径之外的值解码后丢弃
+    （顶层字段保留在 header 中）。缓冲区只保留尚未解析的尾部，内存占用与单场比赛的大小相关，
+    与整个玩法池的大小无关。
+
+    与整包解析时的判断一致，success 为假或 emptyFlag 为真的响应不产出比赛；
+    这两个字段出现在比赛列表之后时，已解析的比赛会暂存到响应结束。
+    """
+
+    def __init__(self, path: Sequence[Optional[str]] = MATCH_PATH):
+        self.path = tuple(path)
+        self.header: Dict[str, Any] = {}
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._final = False
+        self._started = False
+        # 路径上尚未闭合的容器：[类型 "{" / "[", 子元素对应的路径层级]
+        self._stack: List[List[Any]] = []
+        self._held: List[Dict] = []
+
+    def feed(self, chunk: bytes) -> List[Dict]:
+        self._buf = self._buf[self._pos:] + self._utf8.decode(chunk)
+        self._pos = 0
+        return self._release(self._run())
+
+    def close(self) -> List[Dict]:
+        """输入结束，返回剩余的比赛；响应不完整或格式错误时抛出 ValueError"""
+        self._buf = self._buf[self._pos:] + self._utf8.decode(b"", final=True)
+        self._pos = 0
+        self._final = True
+        items = self._run()
+        if not self._started or self._stack or self._buf[self._pos:].strip(_WHITESPACE):
+            raise ValueError("玩法池响应不完整")
+        return self._release(items, final=True)
+
+    def _release(self, items: List[Dict], final: bool = False) -> List[Dict]:
+        if "success" not in self.header and not final:
+            self._held.extend(items)
+            return []
+        if not self.header.get("success") or self.header.get("emptyFlag"):
+            self._held = []
+            return []
+        if self._held:
+            items = self._held + items
+            self._held = []
+        return items
+
+    def _run(self) -> List[Dict]:
+        items: List[Dict] = []
+        while True:
+            checkpoint = self._pos
+            try:
+                if not self._step(items):
+                    return items
+            except _NeedMore:
+                self._pos = checkpoint
+                return items
+
+    def _skip_whitespace(self) -> str:
+        buf = self._buf
+        pos = self._pos
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        self._pos = pos
+        if pos >= len(buf):
+            raise _NeedMore
+        return buf[pos]
+
+    def _decode(self) -> Any:
+        try:
+            value, end = self._decoder.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            if self._final:
+                raise
+            raise _NeedMore
+        # 恰好结束在缓冲区末尾的数字或字面量可能还没有到齐
+        if end >= len(self._buf) and not self._final:
+            raise _NeedMore
+        self._pos = end
+        return value
+
+    def _value(self, level: int, key: Optional[str], items: List[Dict]) -> None:
+        """解析一个值：路径终点解码产出，路径上的容器入栈，其余解码丢弃"""
+        char = self._skip_whitespace()
+        on_path = level < len(self.path) and self.path[level] == key
+        if on_path and level == len(self.path) - 1:
+            value = self._decode()
+            if isinstance(value, dict):
+                items.append(value)
+        elif on_path and char in "{[":
+            self._pos += 1
+            self._stack.append([char, level + 1])
+        else:
+            value = self._decode()
+            if key is not None and len(self._stack) == 1:
+                self.header[key] = value
+
+    def _step(self, items: List[Dict]) -> bool:
+        """处理一个结构单元（一个键值对、一个数组元素或一个括号），返回 False 表示解析结束"""
+        if not self._stack:
+            if self._started:
+                return False
+            if self._skip_whitespace() != "{":
+                raise ValueError("玩法池响应不是 JSON 对象")
+            self._pos += 1
+            self._started = True
+            self._stack.append(["{", 0])
+            return True
+        kind, level = self._stack[-1]
+        char = self._skip_whitespace()
+        if char == ",":
+            self._pos += 1
+        elif char in "}]":
+            self._pos += 1
+            self._stack.pop()
+        elif kind == "{":
+            key = self._decode()
+            if self._skip_whitespace() != ":":
+                raise ValueError("玩法池响应格式错误")
+            self._pos += 1
+            self._value(level, key, items)
+        else:
+            self._value(level, None, items)
+        return True
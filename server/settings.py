@@ -14,6 +14,14 @@ DB_TYPE = os.getenv("DB_TYPE", "sqlite")  # sqlite 或 mysql
 
 # SQLite 配置
 SQLITE_PATH = os.getenv("SQLITE_PATH", str(DATA_DIR / "football_odds.sqlite"))
+# SQLite 性能配置：wal 为 WAL 日志 + synchronous=NORMAL，读请求不被同步写入阻塞；default 为 SQLite 默认的回滚日志模式
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "wal")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "16384"))  # 每个连接的页缓存
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHED_STATEMENTS = int(os.getenv("SQLITE_CACHED_STATEMENTS", "256"))  # 每个连接缓存的预编译语句数
+# 多个进程同时启动时等待其它进程完成结构迁移的时长（秒）
+SCHEMA_LOCK_TIMEOUT = float(os.getenv("SCHEMA_LOCK_TIMEOUT", "60"))
 
 # MySQL 配置
 MYSQL_CONFIG = {
@@ -25,10 +33,18 @@ MYSQL_CONFIG = {
     "charset": "utf8mb4",
 }
 
+# 连接池：MySQL 为固定容量连接池，SQLite 为每线程复用一个连接
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))  # 池满时等待连接的最长时间（秒）
+DB_POOL_RECYCLE_SECONDS = float(os.getenv("DB_POOL_RECYCLE_SECONDS", "3600"))  # 连接最长存活时间，0 表示不回收
+DB_POOL_PING_INTERVAL = float(os.getenv("DB_POOL_PING_INTERVAL", "30"))  # 空闲超过该时长的连接取出前先做健康检查
+
 SCHEMA_PATH = BASE_DIR / "schema.sql"
 SCHEMA_MYSQL_PATH = BASE_DIR / "schema_mysql.sql"
 
-SPORTTERY_API_URL = "https://webapi.sporttery.cn/gateway/uniform/football/getMatchCalculatorV1.qry"
+SPORTTERY_API_URL = os.getenv(
+    "SPORTTERY_API_URL", "https://webapi.sporttery.cn/gateway/uniform/football/getMatchCalculatorV1.qry"
+)
 POOL_CODES = {
     "had_hhad": "hhad,had",
     "crs": "crs",
@@ -37,5 +53,79 @@ POOL_CODES = {
 }
 
 SYNC_INTERVAL_SECONDS = int(os.getenv("SYNC_INTERVAL_SECONDS", "600"))  # 10分钟
+# 增量同步：按内容指纹跳过未变化的比赛，设为 0 则每次全量重写
+SYNC_INCREMENTAL = os.getenv("SYNC_INCREMENTAL", "1") == "1"
+# 流式同步时每个写入事务包含的比赛场数，决定同步期间的峰值内存
+SYNC_STREAM_BATCH_SIZE = int(os.getenv("SYNC_STREAM_BATCH_SIZE", "200"))
+# 多进程部署时只由一个 leader 进程执行定时同步（SQLite 为文件锁，MySQL 为 GET_LOCK），其余进程每隔
+# SYNC_LEADER_CHECK_SECONDS 尝试接管；手动同步在任意进程执行，但跨进程串行，最多等待 SYNC_RUN_LOCK_TIMEOUT 秒
+SYNC_LEADER_LOCK = os.getenv("SYNC_LEADER_LOCK", "1") == "1"
+SYNC_LEADER_CHECK_SECONDS = int(os.getenv("SYNC_LEADER_CHECK_SECONDS", "15"))
+SYNC_RUN_LOCK_TIMEOUT = float(os.getenv("SYNC_RUN_LOCK_TIMEOUT", "120"))
+# 自适应调度：每隔 SYNC_TICK_SECONDS 按各玩法池的计划决定是否抓取，设为 0 则固定每 SYNC_INTERVAL_SECONDS 抓取全部玩法池。
+# 全量轮询间隔以 SYNC_INTERVAL_SECONDS 为基准，随各池的内容变化率在 0.5~2 倍之间伸缩；
+# 最近一场未开赛比赛超过 SYNC_IDLE_LEAD_SECONDS 才开赛（或没有未开赛比赛）时放宽到 SYNC_MAX_INTERVAL_SECONDS。
+# 有比赛在 SYNC_KICKOFF_WINDOW_SECONDS 内开赛时，额外每 SYNC_KICKOFF_INTERVAL_SECONDS 只刷新这些比赛。
+# 任意 SYNC_BUDGET_WINDOW_SECONDS 内最多向上游发出 SYNC_REQUEST_BUDGET 次请求（含重试，0 表示不限制）
+SYNC_ADAPTIVE = os.getenv("SYNC_ADAPTIVE", "1") == "1"
+SYNC_TICK_SECONDS = int(os.getenv("SYNC_TICK_SECONDS", "15"))
+SYNC_MAX_INTERVAL_SECONDS = int(os.getenv("SYNC_MAX_INTERVAL_SECONDS", "3600"))
+SYNC_IDLE_LEAD_SECONDS = int(os.getenv("SYNC_IDLE_LEAD_SECONDS", str(6 * 3600)))
+SYNC_KICKOFF_WINDOW_SECONDS = int(os.getenv("SYNC_KICKOFF_WINDOW_SECONDS", "3600"))
+SYNC_KICKOFF_INTERVAL_SECONDS = int(os.getenv("SYNC_KICKOFF_INTERVAL_SECONDS", "120"))
+SYNC_REQUEST_BUDGET = int(os.getenv("SYNC_REQUEST_BUDGET", "150"))
+SYNC_BUDGET_WINDOW_SECONDS = int(os.getenv("SYNC_BUDGET_WINDOW_SECONDS", "3600"))
+# /api/ready 把距上次成功同步超过该时长（秒）的数据标记为过期，默认为 3 个最长同步周期
+READY_STALE_SECONDS = int(
+    os.getenv("READY_STALE_SECONDS", str(3 * (SYNC_MAX_INTERVAL_SECONDS if SYNC_ADAPTIVE else SYNC_INTERVAL_SECONDS)))
+)
 HTTP_TIMEOUT = int(os.getenv("HTTP_TIMEOUT", "20"))
+# 抓取并发与重试
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", "4"))  # 同时请求的玩法池数量上限
+FETCH_RETRIES = int(os.getenv("FETCH_RETRIES", "2"))  # 失败后的重试次数
+FETCH_BACKOFF_SECONDS = float(os.getenv("FETCH_BACKOFF_SECONDS", "0.5"))  # 退避基准时长，实际按指数增长并加随机抖动
+# 进程内读缓存：最多缓存的查询结果数与过期时间，任一为 0 则关闭缓存
+READ_CACHE_MAX_ENTRIES = int(os.getenv("READ_CACHE_MAX_ENTRIES", "2048"))
+READ_CACHE_TTL_SECONDS = float(os.getenv("READ_CACHE_TTL_SECONDS", "60"))
+# 接口响应快照（序列化 + 预压缩后的字节）最多缓存的份数，0 则每次请求重新生成
+SNAPSHOT_MAX_ENTRIES = int(os.getenv("SNAPSHOT_MAX_ENTRIES", "1024"))
+# 归档：比赛日期早于 RETENTION_DAYS 天前的已结束 / 已取消比赛移出热表，写入 ARCHIVE_DIR 下按月分区的压缩文件（0 表示不归档）
+RETENTION_DAYS = int(os.getenv("RETENTION_DAYS", "90"))
+RETENTION_INTERVAL_SECONDS = int(os.getenv("RETENTION_INTERVAL_SECONDS", "3600"))
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "50"))  # 每个写事务归档的比赛数
+RETENTION_MAX_BATCHES = int(os.getenv("RETENTION_MAX_BATCHES", "40"))  # 每次运行最多归档的批数，其余留到下一次
+RETENTION_BATCH_PAUSE_SECONDS = float(os.getenv("RETENTION_BATCH_PAUSE_SECONDS", "0.2"))  # 批次之间让出写锁的时长
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR") or str(Path(SQLITE_PATH).parent / "archive")
+ARCHIVE_COMPRESS_LEVEL = int(os.getenv("ARCHIVE_COMPRESS_LEVEL", "6"))
+# 当前赛程的内存存储：同步完成后整体重建，赛事列表与玩法接口不再查询数据库
+SLATE_ENABLED = os.getenv("SLATE_ENABLED", "1") == "1"
+# 投注账本：新账本的默认初始资金（与前端默认配置一致），单次导入的最大条数与每个写事务的条数
+LEDGER_DEFAULT_CAPITAL = float(os.getenv("LEDGER_DEFAULT_CAPITAL", "10000"))
+LEDGER_IMPORT_MAX = int(os.getenv("LEDGER_IMPORT_MAX", "20000"))
+LEDGER_IMPORT_BATCH_SIZE = int(os.getenv("LEDGER_IMPORT_BATCH_SIZE", "1000"))
+# 比赛结果：定时抓取最近 RESULTS_LOOKBACK_DAYS 天的全场 / 半场比分并自动结算投注中的记录（间隔为 0 表示不抓取）
+RESULTS_API_URL = os.getenv(
+    "RESULTS_API_URL", "https://webapi.sporttery.cn/gateway/uniform/football/getMatchResultV1.qry"
+)
+RESULTS_INTERVAL_SECONDS = int(os.getenv("RESULTS_INTERVAL_SECONDS", "900"))
+RESULTS_LOOKBACK_DAYS = int(os.getenv("RESULTS_LOOKBACK_DAYS", "3"))
+RESULTS_PAGE_SIZE = int(os.getenv("RESULTS_PAGE_SIZE", "100"))
+RESULTS_MAX_PAGES = int(os.getenv("RESULTS_MAX_PAGES", "20"))
+# 实时推送：每个连接最多积压的事件数，以及心跳间隔
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "100"))
+LIVE_HEARTBEAT_SECONDS = float(os.getenv("LIVE_HEARTBEAT_SECONDS", "15"))
+LIVE_MAX_FILTERS = int(os.getenv("LIVE_MAX_FILTERS", "200"))
+# 串关计算：最多比赛场数与选项数，单次最多返回的明细注数
+PARLAY_MAX_MATCHES = int(os.getenv("PARLAY_MAX_MATCHES", "15"))
+PARLAY_MAX_LEGS = int(os.getenv("PARLAY_MAX_LEGS", "60"))
+PARLAY_MAX_TICKETS = int(os.getenv("PARLAY_MAX_TICKETS", "1000"))
+# Kelly 组合：单次最多的注数，以及收益矩阵的情景数上限（情景数 × 注数 个 float64）
+KELLY_MAX_BETS = int(os.getenv("KELLY_MAX_BETS", "20"))
+KELLY_MAX_SCENARIOS = int(os.getenv("KELLY_MAX_SCENARIOS", "262144"))
+# 批量玩法接口单次最多查询的比赛场数
+PLAYS_BATCH_MAX = int(os.getenv("PLAYS_BATCH_MAX", "300"))
+# 是否采集并在 /metrics 暴露 Prometheus 指标
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+# 赔率历史接口默认查询窗口
+HISTORY_WINDOW_HOURS = int(os.getenv("HISTORY_WINDOW_HOURS", "168"))
 USER_AGENT = "football-rational-betting-tracker/1.0"
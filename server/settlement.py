@@ -0,0 +1,92 @@
+"""按比赛结果自动结算投注中的记录。
+
+每次结果同步后执行一遍：一次查询取出全部投注中记录的待定选项及其比赛结果，逐个选项判定
+（相同的玩法、选项、让球数与比分只判定一次），再按账本分组，每个账本一个事务批量写回选项结果并结算
+已能确定结果的记录：任一选项未中为输，全部选项命中为赢。比赛未完赛、已取消或选项无法识别时
+该选项保持待定，所在记录留给下次结算或手动结算。
+"""
+
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+from .history import MARKET_SELECTIONS
+from .outcomes import match_result, selection_wins
+
+if TYPE_CHECKING:
+    from .ledger_repository import LedgerRepository
+
+# 各玩法可自动结算的选项（hhad 的 handicap 是让球数列，不是选项）
+_SELECTIONS = {market: frozenset(options) - {"handicap"} for market, options in MARKET_SELECTIONS.items()}
+
+
+def leg_result(
+    market: Optional[str],
+    selection: Optional[str],
+    handicap: Optional[float],
+    home: Optional[int],
+    away: Optional[int],
+    half_home: Optional[int],
+    half_away: Optional[int],
+) -> Optional[str]:
+    """单个选项在给定比分下的结果 win / lose；无法判定（缺少比分、半场比分或让球数，玩法或选项未知）时为 None"""
+    if home is None or away is None or selection not in _SELECTIONS.get(market or "", ()):
+        return None
+    half = None
+    if market == "hafu":
+        if half_home is None or half_away is None:
+            return None
+        half = match_result(half_home, half_away)
+    if market == "hhad":
+        if handicap is None:
+            return None
+        handicap = float(handicap)
+    return "win" if selection_wins(market, selection, home, away, half, handicap) else "lose"
+
+
+def bet_outcome(results: Sequence[Optional[str]]) -> Optional[str]:
+    """记录的结果：任一选项未中为 lose，全部命中为 win，否则（仍有待定选项）为 None。
+    results 只含本次的待定选项，之前已判定的选项必然是命中（否则记录早已结算为输）
+    """
+    if "lose" in results:
+        return "lose"
+    if all(result == "win" for result in results):
+        return "win"
+    return None
+
+
+def settle_open_bets(repository: "LedgerRepository", settled_at: Optional[str] = None) -> Dict[str, Any]:
+    """判定全部待定选项并结算能确定结果的记录，返回 {"legs", "bets", "ledgers", "seconds"}"""
+    started = time.perf_counter()
+    settled_at = settled_at or datetime.now().strftime("%Y-%m-%d %H:%M")
+    decided: Dict[Tuple, Optional[str]] = {}
+    # {ledger_id: ([(result, bet_id, leg_index)], {bet_id: [本次各待定选项的结果]})}
+    ledgers: Dict[str, Tuple[List[Tuple[str, str, int]], Dict[str, List[Optional[str]]]]] = {}
+    for ledger_id, bet_id, leg_index, market, selection, handicap, home, away, half_home, half_away, status in repository.list_open_legs():
+        result = None
+        if status == "finished":
+            key = (market, selection, handicap, home, away, half_home, half_away)
+            if key in decided:
+                result = decided[key]
+            else:
+                result = decided[key] = leg_result(*key)
+        legs, bets = ledgers.setdefault(ledger_id, ([], {}))
+        if result is not None:
+            legs.append((result, bet_id, leg_index))
+        bets.setdefault(bet_id, []).append(result)
+
+    stats = {"legs": 0, "bets": 0, "ledgers": 0}
+    for ledger_id, (legs, bets) in ledgers.items():
+        if not legs:
+            continue
+        outcomes = {}
+        for bet_id, results in bets.items():
+            outcome = bet_outcome(results)
+            if outcome is not None:
+                outcomes[bet_id] = outcome
+        settled = repository.apply_settlement(ledger_id, legs, outcomes, settled_at)
+        stats["legs"] += len(legs)
+        stats["bets"] += settled
+        stats["ledgers"] += 1 if settled else 0
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    return stats
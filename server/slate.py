@@ -0,0 +1,330 @@
+"""当前赛程的内存存储（slate）。
+
+每次同步完成后从数据库一次性读出未结束、比赛日期不早于当天的比赛及其五大玩法赔率，构建为只读的 Slate，
+再以一次引用赋值替换旧对象；读取方先取得当前引用再查询，同一次查询内看到的始终是同一份数据。
+比赛为 __slots__ 记录，各玩法赔率行为元组（列名按表共享），重复的字符串与赔率值在构建时去重。
+Slate 之外的数据（已结束的比赛、早于构建当天的日期）仍由 OddsRepository 查询数据库。
+"""
+
+import bisect
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from . import settings
+
+# 各玩法赔率行的列，与 OddsRepository.get_scores / get_total_goals / get_hafu 返回的字段一致
+PLAY_TABLES: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "crs": ("odds_correct_score", ("result_type", "home_score", "away_score", "score_label", "odds", "is_other")),
+    "ttg": ("odds_total_goals", ("goal_range", "min_goals", "max_goals", "odds")),
+    "hafu": ("odds_half_full_time", ("half_result", "full_result", "result_label", "odds")),
+}
+# 当前赔率中作为选项名的列，与 OddsRepository.iter_price_rows 一致
+PRICE_LABELS = {"crs": "score_label", "ttg": "goal_range", "hafu": "result_label"}
+
+
+class SlateMatch:
+    """一场比赛：matches 表的一行（按 Slate.match_columns 排列的元组），以及各玩法的赔率行元组"""
+
+    __slots__ = ("match_id", "row", "key", "timestamp", "league", "wdl", "crs", "ttg", "hafu")
+
+    def __init__(self, match_id: str, row: tuple, key: tuple, timestamp: Optional[int], league: Optional[str]):
+        self.match_id = match_id
+        self.row = row
+        # 赛事列表排序键（MATCH_ORDER_FIELDS），首位为比赛日期
+        self.key = key
+        self.timestamp = timestamp
+        self.league = league
+        self.wdl: tuple = ()
+        self.crs: tuple = ()
+        self.ttg: tuple = ()
+        self.hafu: tuple = ()
+
+
+def deep_size(root: Any) -> int:
+    """对象图占用的字节数（sys.getsizeof 之和），共享对象只计一次"""
+    seen = set()
+    stack = [root]
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif hasattr(type(obj), "__slots__"):
+            stack.extend(getattr(obj, name) for name in type(obj).__slots__ if hasattr(obj, name))
+    return total
+
+
+class _Compactor:
+    """构建期间的值去重：联赛名、比分标签、更新时间与赔率在各比赛之间大量重复"""
+
+    __slots__ = ("strings", "floats")
+
+    def __init__(self) -> None:
+        self.strings: Dict[str, str] = {}
+        self.floats: Dict[float, float] = {}
+
+    def row(self, values: Iterable[Any]) -> tuple:
+        strings, floats = self.strings, self.floats
+        return tuple(
+            strings.setdefault(value, value) if type(value) is str
+            else floats.setdefault(value, value) if type(value) is float
+            else value
+            for value in values
+        )
+
+
+class Slate:
+    """某次同步后的当前赛程，构建完成后只读。
+
+    ordered 按排序键升序排列，keys 为对应的排序键；by_date / by_league 保存 ordered 中的位置（升序），
+    by_number 为期号到比赛 ID 的索引。today 为构建当天，只有不早于这一天的日期由本对象回答。
+    """
+
+    __slots__ = (
+        "match_columns", "wdl_columns", "matches", "ordered", "keys",
+        "by_date", "by_league", "by_number", "latest_issue", "latest_ids",
+        "today", "synced_at", "built_at", "build_seconds", "odds_rows", "_nbytes",
+    )
+
+    def __init__(
+        self,
+        order_fields: Sequence[str],
+        match_columns: Sequence[str],
+        match_rows: Iterable[Sequence[Any]],
+        wdl_columns: Sequence[str],
+        wdl_rows: Iterable[Sequence[Any]],
+        plays: Dict[str, Iterable[Sequence[Any]]],
+        latest_issue: Optional[str],
+        today: str,
+        synced_at: Optional[str] = None,
+    ):
+        started = time.perf_counter()
+        compact = _Compactor()
+        self.match_columns = tuple(match_columns)
+        self.wdl_columns = tuple(wdl_columns)
+        index = {name: position for position, name in enumerate(self.match_columns)}
+        order = [index[name] for name in order_fields]
+        id_at, ts_at, league_at, number_at = (
+            index["match_id"], index["match_timestamp"], index["league_name"], index["match_number"]
+        )
+
+        records = []
+        for values in match_rows:
+            row = compact.row(values)
+            key = tuple(row[position] or "" for position in order)
+            records.append(SlateMatch(row[id_at], row, key, row[ts_at], row[league_at]))
+        # 排序键均为字符串，按码点比较与 SQLite 的 BINARY 排序规则一致
+        records.sort(key=lambda record: record.key)
+        self.ordered: List[SlateMatch] = records
+        self.keys: List[tuple] = [record.key for record in records]
+        self.matches: Dict[str, SlateMatch] = {record.match_id: record for record in records}
+
+        by_date: Dict[str, List[int]] = {}
+        by_league: Dict[Optional[str], List[int]] = {}
+        by_number: Dict[Optional[str], List[str]] = {}
+        for position, record in enumerate(records):
+            by_date.setdefault(record.key[0], []).append(position)
+            by_league.setdefault(record.league, []).append(position)
+            by_number.setdefault(record.row[number_at], []).append(record.match_id)
+        self.by_date = {date: tuple(positions) for date, positions in by_date.items()}
+        self.by_league = {league: tuple(positions) for league, positions in by_league.items()}
+        self.by_number = {number: tuple(ids) for number, ids in by_number.items()}
+        self.latest_issue = latest_issue
+        self.latest_ids = frozenset(self.by_number.get(latest_issue, ())) if latest_issue else frozenset()
+
+        # 赔率行按 (match_id, id) 顺序读入，分组后保持原顺序
+        odds_rows = 0
+        wdl_match_at = self.wdl_columns.index("match_id")
+        groups: Dict[str, List[tuple]] = {}
+        for values in wdl_rows:
+            groups.setdefault(values[wdl_match_at], []).append(compact.row(values))
+        for match_id, rows in groups.items():
+            record = self.matches.get(match_id)
+            if record is not None:
+                record.wdl = tuple(rows)
+                odds_rows += len(rows)
+        for name in PLAY_TABLES:
+            groups = {}
+            for match_id, *values in plays.get(name, ()):
+                groups.setdefault(match_id, []).append(compact.row(values))
+            for match_id, rows in groups.items():
+                record = self.matches.get(match_id)
+                if record is not None:
+                    setattr(record, name, tuple(rows))
+                    odds_rows += len(rows)
+
+        self.today = today
+        self.synced_at = synced_at
+        self.odds_rows = odds_rows
+        self.built_at = time.time()
+        self._nbytes: Optional[int] = None
+        self.build_seconds = time.perf_counter() - started
+
+    def __len__(self) -> int:
+        return len(self.ordered)
+
+    @property
+    def nbytes(self) -> int:
+        """占用字节数。遍历整个对象图较慢，不放在同步后的构建中，首次读取统计时计算一次"""
+        if self._nbytes is None:
+            self._nbytes = deep_size((self.ordered, self.keys, self.matches, self.by_date, self.by_league, self.by_number))
+        return self._nbytes
+
+    # 赛事列表 -----------------------------------------------------------------
+    def covers(self, date: Optional[str]) -> bool:
+        """该日期过滤条件下的比赛是否全部在本对象中（未指定日期时只取未开赛的比赛，总是覆盖）"""
+        return not date or date >= self.today
+
+    def select(self, date: Optional[str], league: Optional[str]) -> List[int]:
+        """与 repository._match_filters 相同的过滤条件，返回 ordered 中的位置（升序）"""
+        if date:
+            positions: Sequence[int] = self.by_date.get(date, ())
+            if league:
+                by_league = self.by_league.get(league, ())
+                if len(by_league) < len(positions):
+                    return [position for position in by_league if self.ordered[position].key[0] == date]
+                return [position for position in positions if self.ordered[position].league == league]
+            return list(positions)
+
+        today = datetime.now().strftime("%Y-%m-%d")
+        now_ts = int(datetime.now().timestamp())
+        if league:
+            positions = [
+                position for position in self.by_league.get(league, ())
+                if not self.ordered[position].key[0] or self.ordered[position].key[0] >= today
+            ]
+        else:
+            # 日期为空的比赛排在最前，其余从今天起连续排列
+            positions = [*self.by_date.get("", ()), *range(bisect.bisect_left(self.keys, (today,)), len(self.keys))]
+        ordered = self.ordered
+        return [
+            position for position in positions
+            if ordered[position].timestamp is None or ordered[position].timestamp >= now_ts
+        ]
+
+    def after(self, positions: List[int], key: Sequence[str]) -> List[int]:
+        """排序键严格大于 key 的位置（keyset 分页）"""
+        start = bisect.bisect_right(self.keys, tuple(key))
+        return positions[bisect.bisect_left(positions, start):]
+
+    # 行数据 -------------------------------------------------------------------
+    def match_dict(self, record: SlateMatch, with_wdl: bool = False) -> Dict[str, Any]:
+        """与 SELECT * FROM matches 相同的字典，附加 is_latest_issue（with_wdl 时附加 wdl_odds）"""
+        data = dict(zip(self.match_columns, record.row))
+        if with_wdl:
+            data["wdl_odds"] = self.wdl_odds(record)
+        data["is_latest_issue"] = 1 if record.match_id in self.latest_ids else 0
+        return data
+
+    def wdl_odds(self, record: SlateMatch) -> Dict[str, Dict[str, Any]]:
+        columns = self.wdl_columns
+        return {data["odds_type"]: data for data in (dict(zip(columns, row)) for row in record.wdl)}
+
+    def play_rows(self, record: SlateMatch, name: str) -> List[Dict[str, Any]]:
+        columns = PLAY_TABLES[name][1]
+        return [dict(zip(columns, row)) for row in getattr(record, name)]
+
+    def plays(self, record: SlateMatch) -> Dict[str, Any]:
+        """与 OddsRepository.get_plays_bulk 单场结果相同的结构"""
+        return {
+            "match": self.match_dict(record),
+            "wdl": self.wdl_odds(record),
+            **{name: self.play_rows(record, name) for name in PLAY_TABLES},
+        }
+
+    def price_rows(self, match_ids: Sequence[str]) -> Iterator[Tuple[str, str, str, Any]]:
+        """(match_id, market, 选项, 赔率)，展开方式与 OddsRepository.iter_price_rows 一致；赔率未做类型转换"""
+        wdl_at = [self.wdl_columns.index(name) for name in ("odds_type", "handicap", "win_odds", "draw_odds", "lose_odds")]
+        label_at = {name: (columns.index(PRICE_LABELS[name]), columns.index("odds")) for name, (_, columns) in PLAY_TABLES.items()}
+        for match_id in match_ids:
+            record = self.matches[match_id]
+            for row in record.wdl:
+                market, handicap, win, draw, lose = (row[position] for position in wdl_at)
+                yield match_id, market, "win", win
+                yield match_id, market, "draw", draw
+                yield match_id, market, "lose", lose
+                yield match_id, market, "handicap", handicap
+            for name, (label, odds) in label_at.items():
+                for row in getattr(record, name):
+                    yield match_id, name, row[label], row[odds]
+
+    def stats(self) -> Dict[str, Any]:
+        nbytes = self.nbytes
+        return {
+            "matches": len(self.ordered),
+            "oddsRows": self.odds_rows,
+            "dates": len(self.by_date),
+            "leagues": len(self.by_league),
+            "today": self.today,
+            "syncedAt": self.synced_at,
+            "builtAt": int(self.built_at),
+            "buildSeconds": round(self.build_seconds, 4),
+            "bytes": nbytes,
+            "bytesPerMatch": round(nbytes / len(self.ordered)) if self.ordered else 0,
+        }
+
+
+class SlateStore:
+    """持有当前 Slate 的引用。构建在锁内串行执行，替换为一次引用赋值，读取不加锁"""
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.current: Optional[Slate] = None
+        self.builds = 0
+        self.reads = 0
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+
+    def get(self, loader: Callable[[], Slate]) -> Slate:
+        """当前 Slate，尚未构建时调用 loader 构建（同时到达的请求只构建一次）"""
+        slate = self.current
+        if slate is not None:
+            return slate
+        with self._lock:
+            if self.current is None:
+                self.current = loader()
+                self.builds += 1
+            return self.current
+
+    def rebuild(self, loader: Callable[[], Slate]) -> Slate:
+        with self._lock:
+            slate = loader()
+            self.current = slate
+            self.builds += 1
+            return slate
+
+    def clear(self) -> None:
+        self.current = None
+
+    def record(self, served: bool) -> None:
+        """记录一次读取由内存回答还是回退到数据库"""
+        if served:
+            self.reads += 1
+        else:
+            self.fallbacks += 1
+
+    def stats(self) -> Dict[str, Any]:
+        slate = self.current
+        payload: Dict[str, Any] = {
+            "enabled": self.enabled,
+            "loaded": slate is not None,
+            "builds": self.builds,
+            "reads": self.reads,
+            "fallbacks": self.fallbacks,
+        }
+        if slate is not None:
+            payload.update(slate.stats())
+        return payload
+
+
+slate_store = SlateStore(settings.SLATE_ENABLED)
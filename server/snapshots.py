@@ -0,0 +1,116 @@
+import gzip
+import hashlib
+from decimal import Decimal
+from typing import Any, Callable, Hashable, Optional
+
+import brotli
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+
+from .cache import snapshot_cache
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# 小于该长度的响应压缩收益不大，直接返回原文
+MIN_COMPRESS_BYTES = 512
+
+
+# 各内容编码的强 ETag 后缀：不同编码是不同的表示，强校验值必须互不相同
+_ETAG_SUFFIXES = {None: "", "gzip": "-gz", "br": "-br"}
+
+
+class Snapshot:
+    """一份已经序列化、压缩并带 ETag 的响应体，同一同步代内在请求间共享。
+    etag 为原文的 ETag，压缩后的响应体各有带后缀的 ETag（见 etag_for）
+    """
+
+    __slots__ = ("body", "gzip", "br", "digest", "etag")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.etag = self.etag_for(None)
+        if len(body) >= MIN_COMPRESS_BYTES:
+            self.gzip: Optional[bytes] = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+            self.br: Optional[bytes] = brotli.compress(body, quality=BROTLI_QUALITY)
+        else:
+            self.gzip = None
+            self.br = None
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        return f'"{self.digest}{_ETAG_SUFFIXES[encoding]}"'
+
+
+def _default(value: Any) -> Any:
+    # MySQL 的 DECIMAL 列
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+
+def dumps(payload: Any) -> bytes:
+    return orjson.dumps(payload, default=_default)
+
+
+def get_snapshot(key: Hashable, build: Callable[[], Any]) -> Snapshot:
+    """取 key 对应的快照，本同步代内首次请求时调用 build 生成响应数据并序列化"""
+    return snapshot_cache.get_or_load(key, lambda: Snapshot(dumps(build())))
+
+
+def _accepted_encodings(header: str) -> set:
+    """Accept-Encoding 中可接受（q > 0）的编码；"*" 代表未单独列出的 br 与 gzip"""
+    weights = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = params.strip()
+        weight = 1.0
+        if q.startswith("q="):
+            try:
+                weight = float(q[2:])
+            except ValueError:
+                continue
+        weights[name] = weight
+    accepted = {name for name, weight in weights.items() if weight > 0 and name != "*"}
+    if weights.get("*", 0) > 0:
+        accepted.update(name for name in ("br", "gzip") if name not in weights)
+    return accepted
+
+
+def _etag_matches(header: str, snapshot: Snapshot) -> bool:
+    # If-None-Match 使用弱比较，忽略 W/ 前缀；任一编码的 ETag 都表示客户端持有同一份数据
+    etags = {snapshot.etag_for(encoding) for encoding in _ETAG_SUFFIXES}
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate in etags:
+            return True
+    return False
+
+
+def snapshot_response(request: Request, snapshot: Snapshot) -> Response:
+    """按 Accept-Encoding 选择 br / gzip / 原文，If-None-Match 命中时返回 304（带所选编码的 ETag）"""
+    encoding = None
+    if snapshot.gzip is not None:
+        accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+        if "br" in accepted:
+            encoding = "br"
+        elif "gzip" in accepted:
+            encoding = "gzip"
+    headers = {"ETag": snapshot.etag_for(encoding), "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, snapshot):
+        return Response(status_code=304, headers=headers)
+
+    body = snapshot.body
+    if encoding == "br":
+        body = snapshot.br
+    elif encoding == "gzip":
+        body = snapshot.gzip
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,170 @@
+import bisect
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+from . import settings
+from .scraper.markets import BASE_POOL
+
+# 变化率的指数滑动平均系数
+_RATE_ALPHA = 0.3
+
+
+class PoolSchedule:
+    """单个玩法池的轮询状态"""
+
+    __slots__ = ("pool", "last_polled_at", "last_full_at", "change_rate", "deferred")
+
+    def __init__(self, pool: str, last_full_at: float = 0.0):
+        self.pool = pool
+        self.last_polled_at = last_full_at
+        self.last_full_at = last_full_at
+        # 最近几次抓取中内容有变化的比赛占比，尚未抓取过时为 None
+        self.change_rate: Optional[float] = None
+        # 已到期但因请求预算不足而推迟
+        self.deferred = False
+
+
+class SyncPlan:
+    """一次调度要执行的同步：玩法池列表，以及只刷新该时间戳之前开赛的比赛（None 表示全部比赛）"""
+
+    __slots__ = ("pools", "kickoff_before")
+
+    def __init__(self, pools: List[str], kickoff_before: Optional[int] = None):
+        self.pools = pools
+        self.kickoff_before = kickoff_before
+
+
+class SyncPlanner:
+    """按开赛时间与内容变化率为每个玩法池安排下一次抓取，并限制上游请求数。
+
+    每个池有两条计划：全量轮询（写入全部比赛）与临场轮询（只写入 SYNC_KICKOFF_WINDOW_SECONDS 内开赛的比赛），
+    取先到期者。上游接口按玩法池整包返回，临场轮询同样是一次请求，节省的是解析与写入。
+    状态只保存在 leader 进程内存中，接管时从 sync_status 的上次同步时间恢复。
+    """
+
+    def __init__(self, pools: Sequence[str] = tuple(settings.POOL_CODES), last_synced_at: float = 0.0):
+        self._lock = threading.Lock()
+        self.pools: Dict[str, PoolSchedule] = {pool: PoolSchedule(pool, last_synced_at) for pool in pools}
+        # 未开赛比赛的开赛时间戳（升序），每次同步后刷新
+        self.kickoffs: List[int] = []
+        # 预算窗口内每次请求的时间
+        self.requests: Deque[float] = deque()
+
+    # 输入 -------------------------------------------------------------------
+    def load_kickoffs(self, kickoffs: Sequence[int]) -> None:
+        with self._lock:
+            self.kickoffs = sorted(kickoffs)
+
+    def record(self, now: float, pools: Sequence[str], kickoff_before: Optional[int], fetch: Dict[str, Dict[str, Any]]) -> None:
+        """记录一次同步：fetch 为同步结果中各池的计时（attempts / matches / changed），同步整体失败时为空"""
+        with self._lock:
+            for pool in pools:
+                timing = fetch.get(pool) or {}
+                for _ in range(max(1, int(timing.get("attempts") or 1))):
+                    self.requests.append(now)
+                state = self.pools.get(pool)
+                if state is None:
+                    continue
+                state.last_polled_at = now
+                state.deferred = False
+                if kickoff_before is None:
+                    state.last_full_at = now
+                matches = timing.get("matches") or 0
+                if timing.get("error") is None and matches:
+                    ratio = (timing.get("changed") or 0) / matches
+                    state.change_rate = ratio if state.change_rate is None else (
+                        _RATE_ALPHA * ratio + (1 - _RATE_ALPHA) * state.change_rate
+                    )
+
+    # 计划 -------------------------------------------------------------------
+    def next_kickoff(self, now: float) -> Optional[int]:
+        index = bisect.bisect_left(self.kickoffs, now)
+        return self.kickoffs[index] if index < len(self.kickoffs) else None
+
+    def hot_matches(self, now: float) -> int:
+        """SYNC_KICKOFF_WINDOW_SECONDS 内开赛的比赛数"""
+        start = bisect.bisect_left(self.kickoffs, now)
+        end = bisect.bisect_right(self.kickoffs, now + settings.SYNC_KICKOFF_WINDOW_SECONDS)
+        return end - start
+
+    def full_interval(self, state: PoolSchedule, now: float) -> float:
+        """全量轮询间隔：变化率为 50% 时等于基准间隔，0% 时加倍，100% 时减半"""
+        kickoff = self.next_kickoff(now)
+        if kickoff is None or kickoff - now > settings.SYNC_IDLE_LEAD_SECONDS:
+            base = settings.SYNC_MAX_INTERVAL_SECONDS
+        else:
+            base = settings.SYNC_INTERVAL_SECONDS
+        factor = 1.0 if state.change_rate is None else 2 ** (1 - 2 * state.change_rate)
+        return min(max(base * factor, settings.SYNC_KICKOFF_INTERVAL_SECONDS), settings.SYNC_MAX_INTERVAL_SECONDS)
+
+    def next_due(self, state: PoolSchedule, now: float) -> Tuple[float, bool]:
+        """(下次到期时间, 是否为全量轮询)"""
+        full_at = state.last_full_at + self.full_interval(state, now)
+        if self.hot_matches(now):
+            focus_at = state.last_polled_at + settings.SYNC_KICKOFF_INTERVAL_SECONDS
+            if focus_at < full_at:
+                return focus_at, False
+        return full_at, True
+
+    def requests_used(self, now: float) -> int:
+        window_start = now - settings.SYNC_BUDGET_WINDOW_SECONDS
+        while self.requests and self.requests[0] <= window_start:
+            self.requests.popleft()
+        return len(self.requests)
+
+    def due(self, now: float) -> Optional[SyncPlan]:
+        """当前到期的玩法池。预算不足时优先赛事基础池，其余按逾期程度排序，放不下的推迟到下一次调度"""
+        with self._lock:
+            candidates = []
+            for state in self.pools.values():
+                due_at, full = self.next_due(state, now)
+                if due_at <= now:
+                    overdue = (now - due_at) / max(1.0, due_at - state.last_polled_at)
+                    # 赛事基础池提供新比赛，其余池只能写入 matches 中已有的比赛
+                    candidates.append((state.pool != BASE_POOL, -overdue, state.pool, full))
+            if not candidates:
+                return None
+            candidates.sort()
+            if settings.SYNC_REQUEST_BUDGET > 0:
+                remaining = max(0, settings.SYNC_REQUEST_BUDGET - self.requests_used(now))
+                for *_, pool, _ in candidates[remaining:]:
+                    self.pools[pool].deferred = True
+                candidates = candidates[:remaining]
+            if not candidates:
+                return None
+            # 同一个池的全量与临场轮询都是一次请求，有池到期全量时本次一并全量写入
+            full = any(item[3] for item in candidates)
+            kickoff_before = None if full else int(now + settings.SYNC_KICKOFF_WINDOW_SECONDS)
+            return SyncPlan([item[2] for item in candidates], kickoff_before)
+
+    def snapshot(self, now: float) -> Dict[str, Any]:
+        with self._lock:
+            used = self.requests_used(now)
+            pools = []
+            for state in self.pools.values():
+                due_at, full = self.next_due(state, now)
+                pools.append({
+                    "pool": state.pool,
+                    "mode": "full" if full else "kickoff",
+                    "nextRunAt": int(due_at),
+                    "dueInSeconds": round(max(0.0, due_at - now), 1),
+                    "fullIntervalSeconds": round(self.full_interval(state, now), 1),
+                    "lastPolledAt": int(state.last_polled_at) or None,
+                    "lastFullAt": int(state.last_full_at) or None,
+                    "changeRate": None if state.change_rate is None else round(state.change_rate, 3),
+                    "deferred": state.deferred,
+                })
+            return {
+                "nextKickoff": self.next_kickoff(now),
+                "kickoffWindowSeconds": settings.SYNC_KICKOFF_WINDOW_SECONDS,
+                "kickoffIntervalSeconds": settings.SYNC_KICKOFF_INTERVAL_SECONDS,
+                "hotMatches": self.hot_matches(now),
+                "budget": {
+                    "limit": settings.SYNC_REQUEST_BUDGET,
+                    "windowSeconds": settings.SYNC_BUDGET_WINDOW_SECONDS,
+                    "used": used,
+                    "remaining": None if settings.SYNC_REQUEST_BUDGET <= 0 else max(0, settings.SYNC_REQUEST_BUDGET - used),
+                },
+                "pools": pools,
+            }
@@ -1,39 +1,366 @@
 import logging
+import os
 import threading
-from typing import Optional
-
-from apscheduler.schedulers.background import BackgroundScheduler
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, Optional, Sequence
 
 from . import settings
-from .database import fetch_sync_status, init_db
-from .scraper.sporttery_service import SportterySyncService
+from .archive import archive_batch, archive_store, retention_cutoff
+from .cache import read_cache, snapshot_cache
+from .database import fetch_sync_status
+from .leader import process_lock
+from .ledger_repository import LedgerRepository
+from .live import live_hub
+from .metrics import sync_runs
+from .repository import OddsRepository
+from .settlement import settle_open_bets
+from .slate import slate_store
+from .sync_plan import SyncPlanner
+
+# apscheduler 与 httpx（抓取服务）导入较慢，启动时推迟到首次使用
+if TYPE_CHECKING:
+    from apscheduler.schedulers.background import BackgroundScheduler
+
+    from .scraper.sporttery_service import SportterySyncService
 
 logger = logging.getLogger(__name__)
 _lock = threading.Lock()
-_scheduler: Optional[BackgroundScheduler] = None
+_scheduler: Optional["BackgroundScheduler"] = None
+# 进程间锁：leader 锁决定由哪个进程执行定时同步，run 锁保证任意时刻只有一个进程在同步
+_leader_lock = None
+_run_lock = None
+# follower 最近一次看到的 last_synced_at，用于发现 leader 完成的同步
+_seen_synced_at: Optional[str] = None
+# 自适应调度的计划，首次使用时创建，成为 leader 时重建
+_planner: Optional[SyncPlanner] = None
 
 
-def run_sync_job() -> Optional[dict]:
+def run_sync_job(
+    incremental: Optional[bool] = None,
+    pools: Optional[Sequence[str]] = None,
+    kickoff_before: Optional[int] = None,
+) -> Optional[dict]:
     with _lock:
+        if not _acquire_run_lock():
+            sync_runs.inc("skipped")
+            logger.warning("Sync skipped: another process is still syncing")
+            return None
+        from .scraper.sporttery_service import SportterySyncService
+
         service = SportterySyncService()
+        service.track_price_changes = live_hub.subscriber_count > 0
+        started = time.time()
         try:
-            stats = service.run_once()
+            stats = service.run_once(incremental, pools=pools, kickoff_before=kickoff_before)
+            sync_runs.inc("ok")
             logger.info("Sync completed: %s", stats)
+            publish_live_changes(service, stats)
             return stats
         except Exception as exc:
+            sync_runs.inc("failed")
             logger.exception("Sync failed: %s", exc)
             return None
+        finally:
+            _record_sync(service, started)
+            service.close()
+            if _run_lock is not None:
+                _run_lock.release()
+
+
+# 最近一次归档运行的结果，见 /api/health
+retention_state: Dict[str, Any] = {"lastRunAt": None}
+
+
+def run_retention_job() -> Optional[dict]:
+    """归档已结束的旧比赛，只在 leader 进程执行。每批单独获取同步锁，批次之间让出写锁，同步不会被整次归档阻塞"""
+    if settings.RETENTION_DAYS <= 0 or not is_sync_leader():
+        return None
+    repository = OddsRepository()
+    cutoff = retention_cutoff(settings.RETENTION_DAYS)
+    started = time.perf_counter()
+    stats: Dict[str, Any] = {"cutoff": cutoff, "archived": 0, "batches": 0, "error": None}
+    try:
+        for _ in range(settings.RETENTION_MAX_BATCHES):
+            with _lock:
+                if not _acquire_run_lock():
+                    logger.warning("Retention stopped: another process is syncing")
+                    break
+                try:
+                    archived = archive_batch(repository, archive_store, cutoff, settings.RETENTION_BATCH_SIZE)
+                finally:
+                    if _run_lock is not None:
+                        _run_lock.release()
+            if not archived:
+                break
+            stats["archived"] += archived
+            stats["batches"] += 1
+            if archived < settings.RETENTION_BATCH_SIZE:
+                break
+            time.sleep(settings.RETENTION_BATCH_PAUSE_SECONDS)
+    except Exception as exc:
+        stats["error"] = str(exc)
+        logger.exception("Retention failed: %s", exc)
+    if stats["archived"]:
+        read_cache.bump_generation()
+        snapshot_cache.bump_generation()
+        logger.info("Archived %s finished matches before %s", stats["archived"], cutoff)
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    retention_state.update(stats, lastRunAt=datetime.utcnow().isoformat())
+    return stats
+
+
+def retention_status() -> Dict[str, Any]:
+    return {
+        "retentionDays": settings.RETENTION_DAYS,
+        **retention_state,
+        **archive_store.stats(),
+    }
+
+
+# 最近一次结果同步与自动结算的结果，见 /api/health
+results_state: Dict[str, Any] = {"lastRunAt": None}
+
+
+def run_results_job(force: bool = False) -> Optional[dict]:
+    """抓取比赛结果并自动结算投注中的记录。定时任务只在 leader 进程执行，force 为 True（手动触发）时不检查。
+    与赔率同步共用同步锁；有比赛变为已结束 / 已取消时重建内存赛程并让读缓存失效
+    """
+    if not force and (settings.RESULTS_INTERVAL_SECONDS <= 0 or not is_sync_leader()):
+        return None
+    from .scraper.results import ResultsSyncService
+
+    stats: Dict[str, Any] = {"error": None}
+    with _lock:
+        if not _acquire_run_lock():
+            logger.warning("Results sync skipped: another process is syncing")
+            return None
+        service = ResultsSyncService()
+        try:
+            stats["results"] = service.run_once()
+            stats["settlement"] = settle_open_bets(LedgerRepository())
+            logger.info("Results synced: %s", stats)
+        except Exception as exc:
+            stats["error"] = str(exc)
+            logger.exception("Results sync failed: %s", exc)
         finally:
             service.close()
+            if _run_lock is not None:
+                _run_lock.release()
+    if service.changed:
+        service.repository.refresh_slate()
+        read_cache.bump_generation()
+        snapshot_cache.bump_generation()
+    results_state.update(stats, lastRunAt=datetime.utcnow().isoformat())
+    return None if stats["error"] else stats
+
+
+def results_status() -> Dict[str, Any]:
+    return {"intervalSeconds": settings.RESULTS_INTERVAL_SECONDS, **results_state}
+
+
+def sync_planner() -> SyncPlanner:
+    """本进程的同步计划，从 sync_status 的上次同步时间恢复各玩法池的轮询进度"""
+    global _planner
+    if _planner is None:
+        elapsed = _seconds_since_sync(fetch_sync_status())
+        planner = SyncPlanner(last_synced_at=0.0 if elapsed is None else time.time() - elapsed)
+        try:
+            planner.load_kickoffs(OddsRepository().list_kickoffs(int(time.time())))
+        except Exception as exc:
+            logger.warning("Load kickoff times failed: %s", exc)
+        _planner = planner
+    return _planner
+
+
+def _record_sync(service: "SportterySyncService", started: float) -> None:
+    """把本次同步的请求数与各池变化率计入同步计划，并刷新开赛时间"""
+    try:
+        planner = sync_planner()
+        planner.record(started, service.pools, service.kickoff_before, service.stats.get("fetch", {}))
+        planner.load_kickoffs(service.repository.list_kickoffs(int(time.time())))
+    except Exception as exc:
+        logger.warning("Update sync plan failed: %s", exc)
 
 
-def start_scheduler() -> BackgroundScheduler:
+def _acquire_run_lock() -> bool:
+    global _run_lock
+    if not settings.SYNC_LEADER_LOCK:
+        return True
+    if _run_lock is None:
+        _run_lock = process_lock("sync-run")
+    try:
+        return _run_lock.acquire(timeout=settings.SYNC_RUN_LOCK_TIMEOUT)
+    except Exception as exc:
+        logger.exception("Acquire sync run lock failed: %s", exc)
+        return False
+
+
+def is_sync_leader() -> bool:
+    """当前进程是否负责定时同步。未持有 leader 锁时尝试非阻塞获取，原 leader 进程退出后由其它进程接管"""
+    global _leader_lock
+    if not settings.SYNC_LEADER_LOCK:
+        return True
+    if _leader_lock is None:
+        _leader_lock = process_lock("sync-leader")
+    try:
+        return _leader_lock.held() or _leader_lock.acquire()
+    except Exception as exc:
+        logger.warning("Acquire sync leader lock failed: %s", exc)
+        return False
+
+
+def run_scheduled_sync() -> Optional[dict]:
+    """定时同步任务，只在 leader 进程执行。自适应调度时每次只抓取计划中已到期的玩法池"""
+    if not is_sync_leader():
+        return None
+    if not settings.SYNC_ADAPTIVE:
+        return run_sync_job()
+    plan = sync_planner().due(time.time())
+    if plan is None:
+        return None
+    return run_sync_job(pools=plan.pools, kickoff_before=plan.kickoff_before)
+
+
+def sync_schedule() -> Dict[str, Any]:
+    """各玩法池的下次抓取计划与请求预算；计划只由 leader 进程执行"""
+    payload: Dict[str, Any] = {
+        "adaptive": settings.SYNC_ADAPTIVE,
+        "isLeader": leader_status()["isLeader"],
+        "tickSeconds": settings.SYNC_TICK_SECONDS if settings.SYNC_ADAPTIVE else settings.SYNC_INTERVAL_SECONDS,
+    }
+    payload.update(sync_planner().snapshot(time.time()))
+    return payload
+
+
+def check_leadership() -> None:
+    """定时检查 leader 状态：接管时重建同步计划（固定间隔调度时若距上次同步已超过同步间隔则立即同步）；
+    仍为 follower 时，发现 leader 完成了新的同步就重建本进程的内存赛程并让读缓存失效
+    """
+    global _planner
+    was_leader = _leader_lock is not None and _leader_lock.held()
+    if is_sync_leader():
+        if not was_leader:
+            logger.info("Process %s became sync leader", os.getpid())
+            if settings.SYNC_ADAPTIVE:
+                # 从上次同步时间重建计划，到期的玩法池在下一次调度时抓取
+                _planner = None
+            elif _sync_overdue():
+                run_sync_job()
+        else:
+            # 手动触发的同步可能在其它进程完成
+            _refresh_stale_slate()
+        return
+    _refresh_follower_caches()
+
+
+def _seconds_since_sync(status: Dict[str, Any]) -> Optional[float]:
+    """距上次成功同步的秒数，从未同步过时为 None（last_synced_at 为 UTC 时间）"""
+    last = status.get("last_synced_at")
+    if not last:
+        return None
+    return (datetime.utcnow() - datetime.fromisoformat(str(last))).total_seconds()
+
+
+def _sync_overdue() -> bool:
+    elapsed = _seconds_since_sync(fetch_sync_status())
+    return elapsed is None or elapsed >= settings.SYNC_INTERVAL_SECONDS
+
+
+def _refresh_follower_caches() -> None:
+    global _seen_synced_at
+    synced_at = _refresh_stale_slate()
+    if _seen_synced_at is not None and synced_at != _seen_synced_at:
+        read_cache.bump_generation()
+        snapshot_cache.bump_generation()
+    _seen_synced_at = synced_at
+
+
+def _refresh_stale_slate() -> Optional[str]:
+    """内存赛程早于数据库中最近一次同步时重建（先于缓存失效执行），返回 last_synced_at"""
+    synced_at = fetch_sync_status().get("last_synced_at")
+    synced_at = str(synced_at) if synced_at else None
+    slate = slate_store.current
+    if slate_store.enabled and slate is not None and slate.synced_at != synced_at:
+        OddsRepository().refresh_slate()
+    return synced_at
+
+
+# 本进程启动同步的状态，供 /api/ready 区分"尚无数据"与"数据可能过期"
+startup_sync_state: Dict[str, Any] = {"state": "pending", "seconds": None}
+
+
+def run_startup_sync() -> Optional[dict]:
+    """启动时同步一次（在调度器线程中执行，不阻塞服务启动），多进程部署时只有获得 leader 锁的进程执行"""
+    if not is_sync_leader():
+        logger.info("Process %s started as sync follower", os.getpid())
+        startup_sync_state["state"] = "follower"
+        return None
+    startup_sync_state["state"] = "running"
+    started = time.perf_counter()
+    stats = run_sync_job()
+    startup_sync_state["seconds"] = round(time.perf_counter() - started, 3)
+    startup_sync_state["state"] = "done" if stats is not None else "failed"
+    return stats
+
+
+def readiness() -> Dict[str, Any]:
+    """empty：从未同步成功，没有可返回的数据；stale：有数据但超过 READY_STALE_SECONDS 未更新；ready：数据新鲜"""
+    status = fetch_sync_status()
+    elapsed = _seconds_since_sync(status)
+    if elapsed is None:
+        state = "empty"
+    elif elapsed > settings.READY_STALE_SECONDS:
+        state = "stale"
+    else:
+        state = "ready"
+    return {
+        "state": state,
+        "lastSyncedAt": status.get("last_synced_at"),
+        "syncAgeSeconds": None if elapsed is None else round(elapsed, 1),
+        "totalMatches": status.get("total_matches") or 0,
+        "startupSync": dict(startup_sync_state),
+    }
+
+
+def leader_status() -> Dict[str, Any]:
+    return {
+        "enabled": settings.SYNC_LEADER_LOCK,
+        "pid": os.getpid(),
+        "isLeader": (not settings.SYNC_LEADER_LOCK) or (_leader_lock is not None and _leader_lock.held()),
+    }
+
+
+def publish_live_changes(service: "SportterySyncService", stats: dict) -> None:
+    """把本次同步的价格变化推送给实时订阅者，推送失败不影响同步结果"""
+    if not live_hub.subscriber_count:
+        return
+    try:
+        match_ids = sorted({match_id for match_id, *_ in service.price_changes})
+        leagues = service.repository.get_match_leagues(match_ids) if match_ids else {}
+        live_hub.publish_changes(service.price_changes, leagues, {"changes": stats.get("changes", {})})
+    except Exception as exc:
+        logger.exception("Publish live changes failed: %s", exc)
+
+
+def start_scheduler() -> "BackgroundScheduler":
+    """启动定时任务，并立即在后台执行一次启动同步"""
     global _scheduler
     if _scheduler:
         return _scheduler
-    init_db()
+    from apscheduler.schedulers.background import BackgroundScheduler
+
     scheduler = BackgroundScheduler()
-    scheduler.add_job(run_sync_job, "interval", seconds=settings.SYNC_INTERVAL_SECONDS, id="sporttery-sync", max_instances=1, coalesce=True)
+    interval = settings.SYNC_TICK_SECONDS if settings.SYNC_ADAPTIVE else settings.SYNC_INTERVAL_SECONDS
+    scheduler.add_job(run_scheduled_sync, "interval", seconds=interval, id="sporttery-sync", max_instances=1, coalesce=True)
+    if settings.SYNC_LEADER_LOCK:
+        scheduler.add_job(check_leadership, "interval", seconds=settings.SYNC_LEADER_CHECK_SECONDS, id="sync-leader", max_instances=1, coalesce=True)
+    if settings.RETENTION_DAYS > 0:
+        scheduler.add_job(run_retention_job, "interval", seconds=settings.RETENTION_INTERVAL_SECONDS, id="retention", max_instances=1, coalesce=True)
+    if settings.RESULTS_INTERVAL_SECONDS > 0:
+        scheduler.add_job(run_results_job, "interval", seconds=settings.RESULTS_INTERVAL_SECONDS, id="results", max_instances=1, coalesce=True)
+    # 不指定触发器的任务在调度器启动后立即执行一次
+    scheduler.add_job(run_startup_sync, id="startup-sync")
     scheduler.start()
     _scheduler = scheduler
     return scheduler
@@ -44,6 +371,9 @@ def shutdown_scheduler():
     if _scheduler and _scheduler.running:
         _scheduler.shutdown(wait=False)
     _scheduler = None
+    # 主动释放 leader 锁，其它进程在下一次检查时即可接管
+    if _leader_lock is not None:
+        _leader_lock.release()
 
 
 def get_sync_status():